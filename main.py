@@ -1,10 +1,23 @@
+import io
+import os
 import pathlib
-from typing import List, Tuple
-from flask import Flask, redirect, render_template, request, Response
+import secrets
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from flask import (
+    Blueprint, Flask, abort, jsonify, redirect, render_template, request,
+    Response, send_file, session, url_for)
 import scripts.progres_counter as progres
 import scripts.images_manager as imgManager
 import scripts.unsplash_api as unsplash
 import scripts.pillow_api as pillow
+import scripts.thumbnails as thumbnails
+import scripts.batch_edit as batch_edit
+import scripts.collage as collage
+import scripts.encoding as encoding
+import scripts.edit_sessions as edit_sessions_manager
 
 # Declaration of all const paths using by app
 IMAGE_EXTENSION = '.jpg'
@@ -13,32 +26,161 @@ CURRENT_PATH = str(pathlib.Path(__file__).parent.resolve()) + '/'
 IMAGES_FOLDER_SATIC = 'uploads/'
 IMAGES_FOLDER_PATH = f'{CURRENT_PATH}static/{IMAGES_FOLDER_SATIC}'
 
-EDIT_FILE_STATIC = 'tmp/edit' + IMAGE_EXTENSION
-EDIT_FILE_PATH = f'{CURRENT_PATH}static/{EDIT_FILE_STATIC}'
+COLLAGE_ROWS_FOLDER_PATH = f'{CURRENT_PATH}static/tmp/collage_rows/'
 
-COLLAGE_FILE_STATIC = 'tmp/collage' + IMAGE_EXTENSION
-COLLAGE_FILE_PATH = f'{CURRENT_PATH}static/{COLLAGE_FILE_STATIC}'
+THUMBNAILS_FOLDER_PATH = f'{CURRENT_PATH}static/tmp/thumbnails/'
 
 
 # Declaration of all const values used for display web
 IMAGES_IN_ROW = 4
+# number of rows rendered at once, next rows are loaded while scrolling
+GALERY_PAGE_ROWS = 10
+# thumbnails heights, the smallest one fits galery image height
+THUMBNAIL_SIZES = [256, 512, 1024]
+THUMBNAILS_DISK_BUDGET = 512 * 1024 * 1024
+# max width and height of edited image preview,
+# full resolution image is edited only when it is saved
+EDIT_PREVIEW_SIZE = 1600
+COLLAGE_ROW_HEIGHT = 300
+# max number of bytes of collage kept in memory, bigger collages
+# are rendered in strips and downloaded as png
+COLLAGE_MEMORY_BUDGET = 256 * 1024 * 1024
+COLLAGE_ROWS_DISK_BUDGET = 1024 * 1024 * 1024
+# preview is encoded after every effect, so it is encoded fast
+EDIT_PREVIEW_PROFILE = encoding.EncoderProfile('JPEG', quality=80)
+# images saved in images directory keep its extension,
+# so they are always encoded as jpeg
+EDIT_SAVE_PROFILE = encoding.EncoderProfile(
+    'JPEG', quality=90, progressive=True, optimize=True)
+COLLAGE_PROFILE = encoding.EncoderProfile(
+    'JPEG', quality=85, progressive=True, optimize=True)
+if encoding.is_supported('WEBP'):
+    THUMBNAILS_PROFILE = encoding.EncoderProfile('WEBP', quality=80, method=4)
+else:
+    THUMBNAILS_PROFILE = encoding.EncoderProfile(
+        'JPEG', quality=80, progressive=True, optimize=True)
+# edit sessions not used for this number of seconds are removed
+EDIT_SESSION_TIME_TO_LIVE = 60 * 60
+# max number of bytes used by all edit sessions,
+# least recently used sessions are removed
+EDIT_SESSIONS_MEMORY_BUDGET = 2 * 1024 * 1024 * 1024
+# number of seconds browser keeps preview, preview url
+# changes with each edit, so it is never outdated
+EDIT_PREVIEW_MAX_AGE = 60 * 60
+# max number of images requested by one search,
+# unsplash results are requested page by page
+SEARCH_MAX_RESULTS = 300
+# number of images downloaded at once from unsplash
+UNSPLASH_DOWNLOAD_WORKERS = 8
+# max number of connections to one host while downloading images
+UNSPLASH_CONNECTIONS_PER_HOST = 4
+# default curve of curves effect, increases contrast of midtones
+EDIT_CURVE_POINTS = '0:0,64:48,192:208,255:255'
+
+
+# Routes of app, registered by create_app
+pages = Blueprint('pages', __name__)
+
+
+# Modules using by app, they are created by create_app, not at import,
+# so processes importing this file, like batch edit workers, don't
+# create them
+task_progres = progres.ProgresCounter(0, 100)
+images_manager: imgManager.ImagesManager
+edit_sessions: edit_sessions_manager.EditSessions
+thumbnails_cache: thumbnails.ThumbnailsCache
+images_downloader: unsplash.ImagesDownloader
+collage_rows_cache: collage.CollageRowsCache
+# pool of batch edit processes, created at first batch edit
+batch_executor: Optional[ProcessPoolExecutor] = None
+_batch_executor_lock = threading.Lock()
+
+
+def create_app() -> Flask:
+    """Create flask app and modules using by it"""
+    global images_manager, edit_sessions, thumbnails_cache
+    global images_downloader, collage_rows_cache
+
+    app = Flask(__name__)
+    app.config['UPLOAD_PATH'] = IMAGES_FOLDER_PATH
+    # sessions keep only id of edit session, which is lost after restart
+    app.secret_key = os.environ.get('SECRET_KEY', secrets.token_hex(32))
+    app.register_blueprint(pages)
+
+    # index is kept in instance folder, which is not served by app
+    os.makedirs(app.instance_path, exist_ok=True)
+    index_path = os.path.join(app.instance_path, imgManager.INDEX_FILE_NAME)
+    _move_legacy_index(index_path)
+    images_manager = imgManager.ImagesManager(
+        IMAGES_FOLDER_PATH, IMAGE_EXTENSION, index_path)
+    edit_sessions = edit_sessions_manager.EditSessions(
+        lambda session_id: pillow.PhotoEditor(
+            None,
+            preview_size=EDIT_PREVIEW_SIZE,
+            preview_profile=EDIT_PREVIEW_PROFILE,
+            save_profile=EDIT_SAVE_PROFILE,
+            orientation_metadata=True
+            ),
+        EDIT_SESSION_TIME_TO_LIVE,
+        EDIT_SESSIONS_MEMORY_BUDGET
+        )
+    thumbnails_cache = thumbnails.ThumbnailsCache(
+        THUMBNAILS_FOLDER_PATH,
+        THUMBNAIL_SIZES,
+        THUMBNAILS_DISK_BUDGET,
+        THUMBNAILS_PROFILE
+        )
+    images_downloader = unsplash.ImagesDownloader(
+        UNSPLASH_DOWNLOAD_WORKERS, UNSPLASH_CONNECTIONS_PER_HOST)
+    collage_rows_cache = collage.CollageRowsCache(
+        COLLAGE_ROWS_FOLDER_PATH, COLLAGE_ROWS_DISK_BUDGET)
+    return app
 
 
-# Init flask app
-app = Flask(__name__)
-app.config['UPLOAD_PATH'] = IMAGES_FOLDER_PATH
+# Local methods
+def _move_legacy_index(index_path: str) -> None:
+    """Move images index from images directory, where older versions
+    kept it, to given path, index is not moved when it already exists"""
+    if os.path.exists(index_path):
+        return
+    try:
+        os.replace(IMAGES_FOLDER_PATH + imgManager.INDEX_FILE_NAME, index_path)
+    except FileNotFoundError:
+        pass
 
 
-# Init modules using by app
-task_progres = progres.ProgresCounter(0, 100)
-images_manager = imgManager.ImagesManager(IMAGES_FOLDER_PATH, IMAGE_EXTENSION)
-photo_editor = pillow.PhotoEditor(EDIT_FILE_PATH)
+def _edit_session_id() -> str:
+    """Returns id of user edit session, id is kept in session cookie"""
+    if 'edit_session' not in session:
+        session['edit_session'] = secrets.token_hex(16)
+    return session['edit_session']
 
 
-# Local methods
-def _format_images_to_galery() -> List[List[pathlib.Path]]:
-    """Returns images paths from images directory framed in rows"""
-    images = images_manager.get_images_from_directory(task_progres)
+def _render_edit_page(
+        image_name: str,
+        photo_editor: pillow.PhotoEditor
+        ) -> str:
+    """Render edit page with preview of current version of edited image"""
+    return render_template(
+        'image_edit.html',
+        image_name=image_name,
+        preview_url=url_for(
+            '.route_get_edit_preview', version=photo_editor.version)
+        )
+
+
+def _format_images_to_galery() -> List[List[collage.CollageImage]]:
+    """Returns images from images directory framed in rows,
+    images sizes and hashes are read from images metadata"""
+    metadata = images_manager.get_images_metadata(task_progres)
+    images = [
+        collage.CollageImage(
+            pathlib.Path(IMAGES_FOLDER_PATH + m.file),
+            None if m.width is None else (m.width, m.height),
+            m.hash
+            )
+        for m in metadata
+    ]
     images_rows = []
     index = len(images) - 1
     while index >= 0:
@@ -52,27 +194,74 @@ def _format_images_to_galery() -> List[List[pathlib.Path]]:
     return images_rows
 
 
-def _format_images_to_display() -> List[List[Tuple[str, str, int]]]:
-    """Returns images data needed to display on page.
+def _format_images_to_display(
+        before: int
+        ) -> Tuple[List[List[Tuple[str, str, int, str]]], int]:
+    """Returns images data needed to display one page of galery.
+    Galery is displayed from the last image, so page contains images
+    with indexes lower than given one.
     Datas are frmaed in rows.
     Each data is a tuple build of:
         (str) web path
         (str) image formated name
         (int) image index
-        """
-    images_rows = _format_images_to_galery()
+        (str) image file name
+
+    Args:
+        before: index after the first displayed image
+
+    Returns:
+        tuple (images rows, index to request next page)
+    """
+    start = max(0, before - GALERY_PAGE_ROWS * IMAGES_IN_ROW)
+    images = images_manager.get_images_slice(start, before, task_progres)
     formated_images_rows = []
-    for row in images_rows:
-        formated_row = []
-        formated_images_rows.append(formated_row)
-        for image in row:
-            web_path = IMAGES_FOLDER_SATIC + image.name
-            formated_row.append((
-                web_path,
-                images_manager.format_image_name(image.name),
-                images_manager.get_image_index(image.name)
-                ))
-    return formated_images_rows
+    index = before - 1
+    for image, name in reversed(images):
+        if (before - 1 - index) % IMAGES_IN_ROW == 0:
+            formated_row = []
+            formated_images_rows.append(formated_row)
+        web_path = IMAGES_FOLDER_SATIC + image.name
+        formated_row.append((
+            web_path,
+            name,
+            index,
+            image.name
+            ))
+        index -= 1
+    return formated_images_rows, start
+
+
+def _galery_page_url(index: int) -> str:
+    """Returns url of galery page that shows image of given index
+    with one row above it, pages are aligned to galery rows"""
+    count = images_manager.count_images(task_progres)
+    index = max(0, min(index, count - 1))
+    row = max(0, (count - 1 - index) // IMAGES_IN_ROW - 1)
+    before = count - row * IMAGES_IN_ROW
+    if before >= count:
+        return '/'
+    return f'/?before={before}'
+
+
+def _get_batch_executor() -> ProcessPoolExecutor:
+    """Returns pool of batch edit processes, pool is created
+    at first batch edit and used by following ones"""
+    global batch_executor
+    with _batch_executor_lock:
+        if batch_executor is None:
+            batch_executor = batch_edit.create_executor()
+        return batch_executor
+
+
+def _parse_curve_points(text: str) -> List[Tuple[int, int]]:
+    """Returns curve points from text "input:output,input:output...",
+    raises ValueError when text has other format"""
+    points = []
+    for point in text.split(','):
+        value_in, value_out = point.split(':')
+        points.append((int(value_in), int(value_out)))
+    return points
 
 
 def _return_exception(text: str) -> str:
@@ -84,92 +273,175 @@ def _return_exception(text: str) -> str:
 
 
 # Web methos - used to provide page actions
-@app.route('/', methods=['GET', 'POST'])
+@pages.route('/', methods=['GET', 'POST'])
 def route_main() -> Response:
-    """Display main galery page"""
+    """Display main galery page, starting from image before given index"""
+    images_count = images_manager.count_images(task_progres)
+    before = request.args.get('before', images_count, type=int)
+    before = max(0, min(before, images_count))
+    uploads_rows, next_before = _format_images_to_display(before)
     return render_template(
         'galery.html',
-        uploads_rows=_format_images_to_display(),
+        uploads_rows=uploads_rows,
+        next_before=next_before,
+        newer_before=None if before == images_count else min(
+            images_count, before + GALERY_PAGE_ROWS * IMAGES_IN_ROW),
+        images_count=images_count,
+        thumbnail_sizes=thumbnails_cache.sizes,
+        sort_columns=imgManager.SORT_COLUMNS,
         resolutions=unsplash.get_resolutions(),
+        search_max_results=SEARCH_MAX_RESULTS,
+        )
+
+
+@pages.route('/galery-rows', methods=['GET'])
+def route_galery_rows() -> Response:
+    """Returns next rows of galery, starting from image before given index"""
+    images_count = images_manager.count_images(task_progres)
+    before = request.args.get('before', images_count, type=int)
+    before = max(0, min(before, images_count))
+    uploads_rows, next_before = _format_images_to_display(before)
+    return render_template(
+        'galery_rows.html',
+        uploads_rows=uploads_rows,
+        next_before=next_before,
+        thumbnail_sizes=thumbnails_cache.sizes,
         )
 
 
-@app.route('/search', methods=['GET', 'POST'])
+@pages.route('/search', methods=['GET', 'POST'])
 def route_search_images() -> Response:
     """Request images from unsplash api and save them in images directory"""
     if request.method == 'POST':
         query = request.form['search_photos']
-        results_number = int(request.form['results_number'])
+        results_number = min(
+            int(request.form['results_number']), SEARCH_MAX_RESULTS)
         resolution = request.form['resolution']
         try:
-            images = unsplash.search_images(
-                query, results_number, resolution, task_progres)
+            # images are saved while next images are downloading,
+            # images are streamed to files in images directory
+            images = unsplash.iterate_images(
+                query,
+                results_number,
+                resolution,
+                images_downloader,
+                IMAGES_FOLDER_PATH
+                )
+            images_manager.save_images(images, task_progres, results_number)
         except Exception as e:
             return _return_exception(e)
-        images_manager.save_images(images, task_progres)
         return redirect('/')
 
 
-@app.route('/delete-all', methods=['GET'])
+@pages.route('/delete-all', methods=['GET'])
 def route_delete_all_images() -> Response:
     """Delete all images from images directory"""
     images_manager.delete_all_images(task_progres)
     return redirect('/')
 
 
-@app.route('/delete/<image_index>', methods=['GET'])
+@pages.route('/delete/<image_index>', methods=['GET'])
 def route_delete_image(image_index: str) -> Response:
     """Delete single image of given index from images directory"""
     image_index = int(image_index)
     images_manager.delate_image_on_index(image_index, task_progres)
-    return redirect('/')
+    return redirect(_galery_page_url(image_index))
 
 
-@app.route('/save-as-collage', methods=['GET'])
+@pages.route('/save-as-collage', methods=['GET'])
 def route_save_as_collage() -> Response:
-    """Save all images fromimages directory as one image"""
+    """Save all images fromimages directory as one image,
+    collage is edited when it fits in memory budget,
+    else it is downloaded"""
     images_rows = _format_images_to_galery()
-    try:
-        photo_editor.save_images_as_collage(
-            images_rows,
-            300,
-            COLLAGE_FILE_PATH)
-    except pillow.EmptyGaleryExpection as e:
-        return _return_exception(e)
-    photo_editor.set_edit_image(pathlib.Path(COLLAGE_FILE_PATH))
-    return render_template(
-        'image_edit.html',
-        image_name='collage',
-        image_path=EDIT_FILE_STATIC
-        )
+    if len(images_rows) > 0:
+        layout = collage.create_layout(images_rows, COLLAGE_ROW_HEIGHT)
+        if layout.memory > COLLAGE_MEMORY_BUDGET:
+            # file is removed after response is sent
+            collage_file = tempfile.TemporaryFile()
+            collage.save_collage_png(
+                layout,
+                collage_file,
+                COLLAGE_MEMORY_BUDGET,
+                task_progres,
+                rows_cache=collage_rows_cache
+                )
+            collage_file.seek(0)
+            return send_file(
+                collage_file,
+                mimetype='image/png',
+                as_attachment=True,
+                download_name='collage.png'
+                )
+    collage_file = io.BytesIO()
+    with edit_sessions.edit(_edit_session_id()) as photo_editor:
+        try:
+            photo_editor.save_images_as_collage(
+                images_rows,
+                COLLAGE_ROW_HEIGHT,
+                collage_file,
+                task_progres,
+                rows_cache=collage_rows_cache,
+                profile=COLLAGE_PROFILE)
+        except pillow.EmptyGaleryExpection as e:
+            return _return_exception(e)
+        photo_editor.set_edit_image_bytes(collage_file.getvalue(), 'collage')
+        return _render_edit_page('collage', photo_editor)
 
 
-@app.route('/edit-set/<image_index>', methods=['GET'])
+@pages.route('/edit-set/<image_index>', methods=['GET'])
 def route_edit_set_image(image_index: str) -> Response:
     """Select image to edit and redirect to image edit page"""
     image_index = int(image_index)
     images = images_manager.get_images_from_directory(task_progres)
+    names = images_manager.get_images_names(task_progres)
     image = images[image_index]
-    photo_editor.set_edit_image(image)
-    return render_template(
-        'image_edit.html',
-        image_name=images_manager.format_image_name(image.name),
-        image_path=EDIT_FILE_STATIC
-        )
+    with edit_sessions.edit(_edit_session_id()) as photo_editor:
+        photo_editor.set_edit_image(image, names[image_index])
+        return _render_edit_page(names[image_index], photo_editor)
 
 
-@app.route('/edit-save/<name>', methods=['GET'])
+@pages.route('/edit-save/<name>', methods=['GET'])
 def route_edit_save_image(name: str) -> Response:
     """Save edited image in images directory"""
     try:
-        image_bytes = photo_editor.get_edit_image_bytes()
+        with edit_sessions.edit(_edit_session_id()) as photo_editor:
+            image_bytes = photo_editor.get_edit_image_bytes()
     except Exception as e:
         return _return_exception(e)
     images_manager.save_image(name, image_bytes, False)
     return redirect('/')
 
 
-@app.route('/edit-apply/<method>', methods=['GET'])
+@pages.route('/edit-preview/<version>', methods=['GET'])
+def route_get_edit_preview(version: str) -> Response:
+    """Returns preview of edited image from memory,
+    url contains version of edited image, so preview can be cached,
+    request of older version is redirected to current version"""
+    with edit_sessions.edit(_edit_session_id()) as photo_editor:
+        if version != photo_editor.version:
+            response = redirect(url_for(
+                '.route_get_edit_preview', version=photo_editor.version))
+            response.cache_control.no_store = True
+            return response
+        if request.if_none_match.contains(version):
+            # preview is not encoded when browser has it
+            response = Response(status=304)
+        else:
+            try:
+                image_bytes = photo_editor.get_preview_bytes()
+            except pillow.NoEditFileExpection:
+                abort(404)
+            response = Response(
+                image_bytes, mimetype=photo_editor.preview_mimetype)
+    response.set_etag(version)
+    response.cache_control.private = True
+    response.cache_control.max_age = EDIT_PREVIEW_MAX_AGE
+    response.cache_control.immutable = True
+    return response
+
+
+@pages.route('/edit-apply/<method>', methods=['GET'])
 def route_edit_image(method: str) -> Response:
     """Applay given effect to edited image
     Available effect (name as str):
@@ -178,27 +450,98 @@ def route_edit_image(method: str) -> Response:
     - flip-vertical
     - flip-horizontal
     - blur
+    - sharpen
+    - brightness (argument "factor")
+    - contrast (argument "factor")
+    - gamma (argument "gamma")
+    - saturation (argument "factor")
+    - grayscale
+    - sepia
+    - levels (arguments "black", "white", "gamma")
+    - curves (argument "points" as "input:output,input:output...")
+    - undo
+    - redo
     """
+    args = request.args
+    with edit_sessions.edit(_edit_session_id()) as photo_editor:
+        return _apply_edit(photo_editor, method, args)
+
+
+def _apply_edit(
+        photo_editor: pillow.PhotoEditor,
+        method: str,
+        args: dict
+        ) -> Response:
+    """Applay effect of given name on edited image of session
+    and render edit page"""
     dir = {
         'turn-left': lambda: photo_editor.edit_rotate(90),
         'turn-right': lambda: photo_editor.edit_rotate(-90),
         'flip-vertical': lambda: photo_editor.edit_flip(False),
         'flip-horizontal': lambda: photo_editor.edit_flip(True),
-        'blur': lambda: photo_editor.edit_blur()
+        'blur': lambda: photo_editor.edit_blur(),
+        'sharpen': lambda: photo_editor.edit_sharpen(),
+        'brightness': lambda: photo_editor.edit_brightness(
+            args.get('factor', 1.1, type=float)),
+        'contrast': lambda: photo_editor.edit_contrast(
+            args.get('factor', 1.2, type=float)),
+        'gamma': lambda: photo_editor.edit_gamma(
+            args.get('gamma', 1.2, type=float)),
+        'saturation': lambda: photo_editor.edit_saturation(
+            args.get('factor', 1.2, type=float)),
+        'grayscale': lambda: photo_editor.edit_grayscale(),
+        'sepia': lambda: photo_editor.edit_sepia(),
+        'levels': lambda: photo_editor.edit_levels(
+            args.get('black', 16, type=int),
+            args.get('white', 240, type=int),
+            args.get('gamma', 1.0, type=float)),
+        'curves': lambda: photo_editor.edit_curves(
+            _parse_curve_points(args.get('points', EDIT_CURVE_POINTS))),
+        'undo': lambda: photo_editor.undo(),
+        'redo': lambda: photo_editor.redo()
     }
     if method not in dir:
         return _return_exception(f'no edit method as {method}!')
-    dir[method]()
-    image_name = photo_editor.edit_file_name
-    image_name = images_manager.format_image_name(image_name)
-    return render_template(
-        'image_edit.html',
-        image_name=image_name,
-        image_path=EDIT_FILE_STATIC
-        )
-
-
-@app.route('/move-galery-image/<dir>/<image_index>', methods=['GET'])
+    try:
+        dir[method]()
+    except ValueError as e:
+        return _return_exception(e)
+    return _render_edit_page(photo_editor.edit_file_name, photo_editor)
+
+
+@pages.route('/batch-edit', methods=['POST'])
+def route_batch_edit_images() -> Response:
+    """Applay the same effects on many images from images directory.
+    Request JSON should contain "pipeline" - list of effects
+    as lists [effect name, arguments...], effects names are the same
+    as PhotoEditor methods without "edit_" prefix,
+    e.g. [["rotate", 90], ["blur"], ["grayscale"]].
+    Optional "images" is list of indexes of edited images,
+    by default all images are edited
+    """
+    data = request.get_json(silent=True)
+    if data is None or not isinstance(data.get('pipeline'), list) \
+            or len(data['pipeline']) == 0:
+        return jsonify(error=_return_exception('no edit pipeline!')), 400
+    try:
+        operations = [
+            pillow.create_operation(effect[0], effect[1:])
+            for effect in data['pipeline']
+        ]
+        result = batch_edit.edit_images(
+            images_manager,
+            operations,
+            task_progres,
+            data.get('images'),
+            profile=EDIT_SAVE_PROFILE,
+            executor=_get_batch_executor()
+            )
+    except (ValueError, TypeError, IndexError) as e:
+        return jsonify(error=_return_exception(e)), 400
+    return jsonify(edited=result.edited, failed=result.failed)
+
+
+@pages.route('/move-galery-image/<dir>/<image_index>', methods=['GET'])
 def route_move_image_position(dir: str, image_index: str) -> Response:
     """Change image index in images directory.
     Available dirs (str):
@@ -218,14 +561,63 @@ def route_move_image_position(dir: str, image_index: str) -> Response:
         return _return_exception(f'no galry image move as {dir}!')
     shift = shifts[dir]
     images_manager.move_image_position(index, shift, task_progres)
+    return redirect(_galery_page_url(index + shift))
+
+
+@pages.route('/reorder-galery', methods=['POST'])
+def route_reorder_images() -> Response:
+    """Change order of all images in images directory.
+    Request JSON should contain "order" - list where value at index i
+    is current index of image that will be moved to index i
+    """
+    data = request.get_json(silent=True)
+    if data is None or not isinstance(data.get('order'), list):
+        return jsonify(error=_return_exception('no images order!')), 400
+    try:
+        images_manager.reorder_images(data['order'], task_progres)
+    except imgManager.IncorrectOrderExpection as e:
+        return jsonify(error=_return_exception(e)), 400
+    return jsonify(order=data['order'])
+
+
+@pages.route('/sort-galery/<column>', methods=['GET'])
+def route_sort_images(column: str) -> Response:
+    """Order images in images directory by value of their metadata.
+    Available columns are returned by imgManager.SORT_COLUMNS,
+    order is descending when "reverse" argument is set
+    """
+    reverse = request.args.get('reverse', 0, type=int) == 1
+    try:
+        # galery is displayed from the last image
+        images_manager.sort_images(column, not reverse, task_progres)
+    except imgManager.IncorrectSortExpection as e:
+        return _return_exception(e)
     return redirect('/')
 
 
-@app.route('/progres')
+@pages.route('/thumbnail/<int:size>/<file>', methods=['GET'])
+def route_get_thumbnail(size: int, file: str) -> Response:
+    """Returns downscaled image from images directory,
+    thumbnail is created at first request"""
+    image_hash = images_manager.get_image_hash(file)
+    if image_hash is None:
+        abort(404)
+    try:
+        thumbnail = thumbnails_cache.get_thumbnail(
+            pathlib.Path(IMAGES_FOLDER_PATH + file), image_hash, size)
+    except thumbnails.IncorrectThumbnailSizeExpection:
+        abort(404)
+    return send_file(thumbnail)
+
+
+@pages.route('/progres')
 def route_get_progres() -> str:
     """Returns current task progress"""
     return str(task_progres.progres)
 
 
 if __name__ == '__main__':
+    app = create_app()
+    # nothing writes images before app is run
+    images_manager.remove_unfinished_files()
     app.run(debug=True)
@@ -0,0 +1,180 @@
+import math
+from typing import Callable, List, Tuple
+from PIL import Image
+
+
+# values of channel before any adjustment
+IDENTITY_TABLE = tuple(float(value) for value in range(256))
+
+# 3x4 matrix of linear color transform, each row is
+# (red, green, blue, offset) weights of one output channel
+IDENTITY_MATRIX = (
+    1.0, 0.0, 0.0, 0.0,
+    0.0, 1.0, 0.0, 0.0,
+    0.0, 0.0, 1.0, 0.0,
+)
+
+SEPIA_MATRIX = (
+    0.393, 0.769, 0.189, 0.0,
+    0.349, 0.686, 0.168, 0.0,
+    0.272, 0.534, 0.131, 0.0,
+)
+
+# weights of channels in perceived luminance
+_LUMINANCE = (0.299, 0.587, 0.114)
+
+
+def _clamp(value: float) -> float:
+    return min(max(value, 0.0), 255.0)
+
+
+def _check_finite(*values: float) -> None:
+    """raise ValueError when any of values is infinite or not a number"""
+    if not all(math.isfinite(value) for value in values):
+        raise ValueError('adjustment values have to be finite')
+
+
+def brightness(factor: float) -> Callable[[float], float]:
+    """Returns function scaling channel value by factor
+
+    Raises:
+        ValueError: factor is not finite
+    """
+
+    _check_finite(factor)
+    return lambda value: value * factor
+
+
+def contrast(factor: float) -> Callable[[float], float]:
+    """Returns function scaling channel value distance from middle gray
+
+    Raises:
+        ValueError: factor is not finite
+    """
+
+    _check_finite(factor)
+    return lambda value: (value - 128.0) * factor + 128.0
+
+
+def gamma(value_gamma: float) -> Callable[[float], float]:
+    """Returns gamma correction function, gamma above 1 brightens image.
+
+    Raises:
+        ValueError: gamma is not positive or it is not finite
+    """
+
+    _check_finite(value_gamma)
+    if value_gamma <= 0:
+        raise ValueError('gamma has to be positive')
+    return lambda value: 255.0 * (value / 255.0) ** (1.0 / value_gamma)
+
+
+def levels(
+        black: int,
+        white: int,
+        value_gamma: float = 1.0
+        ) -> Callable[[float], float]:
+    """Returns function stretching values between black and white point
+    to full range, values outside are clipped.
+
+    Raises:
+        ValueError: white point is not above black point, gamma
+        is not positive or any value is not finite
+    """
+
+    _check_finite(black, white, value_gamma)
+    if white <= black:
+        raise ValueError('white point has to be above black point')
+    correct = gamma(value_gamma)
+
+    def function(value: float) -> float:
+        scaled = (value - black) * 255.0 / (white - black)
+        return correct(_clamp(scaled))
+    return function
+
+
+def curves(points: List[Tuple[int, int]]) -> Callable[[float], float]:
+    """Returns function interpolating linearly between given
+    (input, output) points, values outside points are flat.
+
+    Raises:
+        ValueError: less than two points or repeated inputs
+    """
+
+    points = sorted(points)
+    if len(points) < 2:
+        raise ValueError('curve needs at least two points')
+    if len({point[0] for point in points}) != len(points):
+        raise ValueError('curve points have to have different inputs')
+
+    def function(value: float) -> float:
+        if value <= points[0][0]:
+            return float(points[0][1])
+        for (x0, y0), (x1, y1) in zip(points, points[1:]):
+            if value <= x1:
+                return y0 + (y1 - y0) * (value - x0) / (x1 - x0)
+        return float(points[-1][1])
+    return function
+
+
+def compose_table(
+        table: Tuple[float, ...],
+        function: Callable[[float], float]
+        ) -> Tuple[float, ...]:
+    """Returns table of values after table followed by function,
+    values are clipped after each adjustment"""
+    return tuple(_clamp(function(value)) for value in table)
+
+
+def apply_table(image: Image, table: Tuple[float, ...]) -> Image:
+    """Map values of each channel by table in one pass over pixels"""
+    image = _adjustable(image)
+    lookup = [int(value + 0.5) for value in table]
+    return image.point(lookup * len(image.getbands()))
+
+
+def saturation(factor: float) -> Tuple[float, ...]:
+    """Returns matrix scaling color distance from gray,
+    0 makes image grayscale
+
+    Raises:
+        ValueError: factor is not finite
+    """
+
+    _check_finite(factor)
+    matrix = []
+    for channel in range(3):
+        row = [(1.0 - factor) * weight for weight in _LUMINANCE]
+        row[channel] += factor
+        matrix.extend(row + [0.0])
+    return tuple(matrix)
+
+
+def compose_matrix(
+        matrix: Tuple[float, ...],
+        following: Tuple[float, ...]
+        ) -> Tuple[float, ...]:
+    """Returns matrix of transform by matrix followed by following"""
+    composed = []
+    for row in range(3):
+        weights = following[row * 4:row * 4 + 3]
+        for column in range(4):
+            composed.append(sum(
+                weights[i] * matrix[i * 4 + column] for i in range(3)
+            ))
+        composed[-1] += following[row * 4 + 3]
+    return tuple(composed)
+
+
+def apply_matrix(image: Image, matrix: Tuple[float, ...]) -> Image:
+    """Transform colors of image by matrix in one pass over pixels"""
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    return image.convert('RGB', matrix)
+
+
+def _adjustable(image: Image) -> Image:
+    """Returns image in mode which channels can be adjusted"""
+    if image.mode in ('L', 'RGB'):
+        return image
+    return image.convert('RGB')
@@ -0,0 +1,130 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+from PIL import Image
+from scripts.encoding import EncoderProfile, encode_image
+from scripts.images_manager import ImagesManager
+import scripts.orientation as orientation
+from scripts.pillow_api import EditOperation, replay_operations
+from scripts.progres_counter import ProgresCounter
+
+
+class BatchEditResult(NamedTuple):
+    """numbers of images edited by edit_images"""
+    edited: int
+    failed: List[int]
+
+
+def create_executor(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """Returns pool of processes editing images. Processes are spawned,
+    not forked, so they don't copy locks and connections of server
+    threads, pool should be created once and used by many batch edits.
+
+    Args:
+        max_workers: number of processes, by default number of cores
+    """
+
+    if max_workers is None:
+        max_workers = os.cpu_count()
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context('spawn')
+        )
+
+
+def edit_images(
+        images_manager: ImagesManager,
+        operations: List[EditOperation],
+        task_progres: ProgresCounter,
+        indexes: Optional[List[int]] = None,
+        max_workers: Optional[int] = None,
+        profile: EncoderProfile = EncoderProfile(),
+        executor: Optional[ProcessPoolExecutor] = None
+        ) -> BatchEditResult:
+    """Apply the same effects on many images from images directory.
+    Images are edited in separate processes, edited images replace
+    content of source images as soon as they are ready.
+
+    Args:
+        images_manager: manager of edited images directory
+        operations: effects created by pillow_api.create_operation
+        task_progres: class to track task progress
+        indexes: indexes of edited images, by default all images
+        max_workers: number of processes of pool created for this edit,
+        used only when executor is not given
+        profile: encoding settings of edited images
+        executor: pool created by create_executor, by default
+        pool is created for this edit
+
+    Raises:
+        ValueError: index of image is out of range
+
+    Returns:
+        number of edited images, images removed or moved
+        while editing are skipped, and indexes of images
+        that couldn't be read or written
+    """
+
+    images = images_manager.get_images_from_directory(task_progres)
+    if indexes is None:
+        indexes = list(range(len(images)))
+    for index in indexes:
+        if not 0 <= index < len(images):
+            raise ValueError(f'no image on index {index}')
+
+    if executor is None:
+        with create_executor(max_workers) as executor:
+            return _edit_images(
+                images_manager, images, indexes, operations, profile,
+                executor, task_progres)
+    return _edit_images(
+        images_manager, images, indexes, operations, profile,
+        executor, task_progres)
+
+
+def _edit_images(
+        images_manager: ImagesManager,
+        images: List[Path],
+        indexes: List[int],
+        operations: List[EditOperation],
+        profile: EncoderProfile,
+        executor: ProcessPoolExecutor,
+        task_progres: ProgresCounter
+        ) -> BatchEditResult:
+    """edit images of given indexes in processes of given pool"""
+    task_progres.set_new_task('editing images', max(len(indexes), 1))
+    edited = 0
+    failed = []
+    futures = {
+        executor.submit(
+            _edit_image, str(images[index]), operations, profile): index
+        for index in indexes
+    }
+    for future in as_completed(futures):
+        index = futures[future]
+        try:
+            image = future.result()
+        except OSError:
+            # image file is not a correct image or it was removed
+            failed.append(index)
+        else:
+            if images_manager.replace_image_on_index(
+                    index, images[index].name, image):
+                edited += 1
+        task_progres.complate_subtask()
+    task_progres.complate_task()
+    return BatchEditResult(edited, sorted(failed))
+
+
+def _edit_image(
+        path: str,
+        operations: List[EditOperation],
+        profile: EncoderProfile
+        ) -> bytes:
+    """Returns bytes of image file after effects,
+    runs in worker process"""
+    with Image.open(path) as img:
+        image = orientation.exif_transpose(img)
+        return encode_image(replay_operations(image, operations), profile)
@@ -0,0 +1,405 @@
+import collections
+import hashlib
+import os
+import pathlib
+import struct
+import tempfile
+import threading
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, List, NamedTuple, Optional, Tuple
+from PIL import Image
+import scripts.orientation as orientation
+from scripts.progres_counter import ProgresCounter
+
+
+BACKGROUND_COLOR = (51, 62, 73)
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# max number of compressed bytes in one png data chunk
+_PNG_CHUNK_SIZE = 64 * 1024
+_ROW_EXTENSION = '.rgb'
+
+
+class CollageImage(NamedTuple):
+    """image placed in collage, size (width, height) is read
+    from image header when it is None,
+    rows with images without hash are not cached"""
+    path: pathlib.Path
+    size: Optional[Tuple[int, int]] = None
+    hash: Optional[str] = None
+
+
+class CollageRowsCache:
+    """Class keeps rendered collage rows as files with raw pixels,
+    so unchanged rows are not rendered again.
+    Rows are named by hash of their images contents and row height.
+    When files take more space than disk budget least recently used
+    rows are removed."""
+
+    def __init__(self, cache_path: str, disk_budget: int) -> None:
+        """Sets basic values and reads rows rendered before.
+
+        Args:
+            cache_path: folder where rows are store
+            disk_budget: max number of bytes of all rows files
+        """
+
+        self._cache_path = cache_path
+        self._disk_budget = disk_budget
+        self._lock = threading.Lock()
+        # row file name -> file size, from least recently used
+        self._files = collections.OrderedDict()
+        self._total_size = 0
+        os.makedirs(cache_path, exist_ok=True)
+        self._load_files()
+
+    @property
+    def total_size(self) -> int:
+        """number of bytes of all rows files"""
+        return self._total_size
+
+    def get_row(self, key: str, size: Tuple[int, int]) -> Optional[Image]:
+        """Returns rendered row of given key, None when it is not cached.
+
+        Args:
+            key: key created by row_key
+            size: width and height of row
+        """
+
+        file = key + _ROW_EXTENSION
+        path = pathlib.Path(self._cache_path + file)
+        with self._lock:
+            if file not in self._files:
+                return None
+            self._files.move_to_end(file)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            return None
+        if len(data) != size[0] * size[1] * 3:
+            return None
+        return Image.frombytes('RGB', size, data)
+
+    def add_row(self, key: str, row: Image) -> None:
+        """Save rendered row, row is written to temporary file
+        first, so unfinished row is never read.
+
+        Args:
+            key: key created by row_key
+            row: rendered row in RGB mode
+        """
+
+        file = key + _ROW_EXTENSION
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=self._cache_path)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(row.tobytes())
+        os.replace(tmp_path, self._cache_path + file)
+        with self._lock:
+            if file in self._files:
+                self._total_size -= self._files[file]
+            self._files[file] = row.width * row.height * 3
+            self._total_size += self._files[file]
+            self._files.move_to_end(file)
+            self._evict(file)
+
+    def _evict(self, keep: str) -> None:
+        """Remove least recently used rows until all files
+        fit in disk budget, must be called with lock.
+
+        Args:
+            keep: row file that can't be removed
+        """
+
+        while self._total_size > self._disk_budget and len(self._files) > 1:
+            file, file_size = self._files.popitem(last=False)
+            if file == keep:
+                self._files[file] = file_size
+                continue
+            self._total_size -= file_size
+            pathlib.Path(self._cache_path + file).unlink(missing_ok=True)
+
+    def _load_files(self) -> None:
+        """read rows files ordered by last usage"""
+        with os.scandir(self._cache_path) as entries:
+            files = [
+                entry for entry in entries
+                if entry.name.endswith(_ROW_EXTENSION) and entry.is_file()
+            ]
+        files.sort(key=lambda entry: entry.stat().st_mtime_ns)
+        for entry in files:
+            self._files[entry.name] = entry.stat().st_size
+            self._total_size += entry.stat().st_size
+
+
+def row_key(images: List[CollageImage], row_height: int) -> Optional[str]:
+    """Returns key of rendered row, None when any image has no hash"""
+    if any(image.hash is None for image in images):
+        return None
+    text = f'{row_height}:' + ','.join(image.hash for image in images)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class CollageLayout(NamedTuple):
+    """Sizes of images placed in collage, rows are centered"""
+    rows: List[List[CollageImage]]
+    # sizes of images in collage
+    sizes: List[List[Tuple[int, int]]]
+    rows_widths: List[int]
+    row_height: int
+
+    @property
+    def width(self) -> int:
+        return max(self.rows_widths)
+
+    @property
+    def height(self) -> int:
+        return self.row_height * len(self.rows)
+
+    @property
+    def memory(self) -> int:
+        """number of bytes of decoded collage pixels"""
+        return self.width * self.height * len(BACKGROUND_COLOR)
+
+
+def create_layout(
+        images_rows: List[List[CollageImage]],
+        row_height: int
+        ) -> CollageLayout:
+    """Place images in collage, keeps images order in rows and columns.
+
+    Args:
+        images_rows: list of rows with images
+        row_height: number of pixeles of each row height
+
+    Returns:
+        sizes of images in collage
+    """
+
+    sizes = [
+        [_scale_size(_read_size(image), row_height) for image in row]
+        for row in images_rows
+    ]
+    rows_widths = [sum(size[0] for size in row) for row in sizes]
+    return CollageLayout(images_rows, sizes, rows_widths, row_height)
+
+
+def create_collage(
+        layout: CollageLayout,
+        task_progres: ProgresCounter,
+        max_workers: Optional[int] = None,
+        rows_cache: Optional[CollageRowsCache] = None
+        ) -> Image:
+    """Create one image with all images of layout.
+    Images are decoded at reduced scale when it is possible,
+    so tile decoding cost depends on tile size not image size.
+    Tiles are decoded in many threads and pasted in order.
+
+    Args:
+        layout: sizes of images in collage
+        task_progres: class to track task progress
+        max_workers: number of decoding threads,
+        by default number of cores
+        rows_cache: cache of rendered rows, by default rows
+        are not cached
+
+    Returns:
+        collage image
+    """
+
+    _start_collage_task(layout, task_progres)
+    with _create_tiles_executor(max_workers) as executor:
+        image = _render_rows(
+            layout, 0, len(layout.rows), executor, task_progres, rows_cache)
+        task_progres.complate_task()
+    return image
+
+
+def save_collage_png(
+        layout: CollageLayout,
+        file: BinaryIO,
+        memory_budget: int,
+        task_progres: ProgresCounter,
+        max_workers: Optional[int] = None,
+        rows_cache: Optional[CollageRowsCache] = None
+        ) -> None:
+    """Write collage as png image rendering it strip by strip,
+    each strip has as many rows as fits in memory budget,
+    so memory usage doesn't depend on collage size.
+
+    Args:
+        layout: sizes of images in collage
+        file: binary file where png image will be written
+        memory_budget: max number of bytes of rendered strip,
+        strip has at least one row
+        task_progres: class to track task progress
+        max_workers: number of decoding threads,
+        by default number of cores
+        rows_cache: cache of rendered rows, by default rows
+        are not cached
+    """
+
+    file.write(_PNG_SIGNATURE)
+    _write_png_chunk(file, b'IHDR', struct.pack(
+        '>IIBBBBB', layout.width, layout.height, 8, 2, 0, 0, 0))
+
+    # strip is kept as image and as raw bytes
+    row_memory = 2 * layout.width * layout.row_height * 3
+    strip_rows = max(1, memory_budget // row_memory)
+    stride = layout.width * 3
+    compressor = zlib.compressobj()
+    data = bytearray()
+    _start_collage_task(layout, task_progres)
+    with _create_tiles_executor(max_workers) as executor:
+        for start in range(0, len(layout.rows), strip_rows):
+            strip = _render_rows(
+                layout,
+                start,
+                start + strip_rows,
+                executor,
+                task_progres,
+                rows_cache
+                )
+            pixels = memoryview(strip.tobytes())
+            # only raw bytes are needed to encode strip
+            strip = None
+            for line in range(0, len(pixels), stride):
+                # each png line starts with filter type
+                data += compressor.compress(b'\x00')
+                data += compressor.compress(pixels[line:line + stride])
+                if len(data) >= _PNG_CHUNK_SIZE:
+                    _write_png_chunk(file, b'IDAT', bytes(data))
+                    data.clear()
+    data += compressor.flush()
+    _write_png_chunk(file, b'IDAT', bytes(data))
+    _write_png_chunk(file, b'IEND', b'')
+    task_progres.complate_task()
+
+
+def _render_rows(
+        layout: CollageLayout,
+        start: int,
+        stop: int,
+        executor: ThreadPoolExecutor,
+        task_progres: ProgresCounter,
+        rows_cache: Optional[CollageRowsCache]
+        ) -> Image:
+    """Create image with given rows of layout, cached rows are reused,
+    tiles of other rows are decoded by executor"""
+    rows = range(start, min(stop, len(layout.rows)))
+    image = Image.new(
+        'RGB',
+        (layout.width, layout.row_height * len(rows)),
+        BACKGROUND_COLOR
+        )
+    # row index -> key, cached row or futures of decoded tiles
+    rendered_rows = {}
+    for index in rows:
+        row_size = (layout.rows_widths[index], layout.row_height)
+        key = None
+        if rows_cache is not None:
+            key = row_key(layout.rows[index], layout.row_height)
+        row = None if key is None else rows_cache.get_row(key, row_size)
+        if row is None:
+            row = [
+                executor.submit(_load_tile, img.path, size)
+                for img, size in zip(layout.rows[index], layout.sizes[index])
+            ]
+        rendered_rows[index] = (key, row)
+
+    for i, index in enumerate(rows):
+        key, row = rendered_rows.pop(index)
+        if isinstance(row, list):
+            row = _paste_tiles(
+                row, layout.sizes[index], layout.row_height, task_progres)
+            if key is not None:
+                rows_cache.add_row(key, row)
+        else:
+            for _ in layout.rows[index]:
+                task_progres.complate_subtask()
+        paste_x = (layout.width - layout.rows_widths[index]) // 2
+        image.paste(row, (paste_x, i * layout.row_height))
+    return image
+
+
+def _paste_tiles(
+        tiles: List[Future],
+        sizes: List[Tuple[int, int]],
+        row_height: int,
+        task_progres: ProgresCounter
+        ) -> Image:
+    """Create row image from decoded tiles"""
+    row_width = sum(size[0] for size in sizes)
+    row = Image.new('RGB', (row_width, row_height), BACKGROUND_COLOR)
+    paste_x = 0
+    for tile, size in zip(tiles, sizes):
+        row.paste(tile.result(), (paste_x, 0))
+        paste_x += size[0]
+        task_progres.complate_subtask()
+    return row
+
+
+def _create_tiles_executor(max_workers: Optional[int]) -> ThreadPoolExecutor:
+    """pillow releases GIL while decoding and resizing,
+    so tiles can be decoded in threads"""
+    if max_workers is None:
+        max_workers = os.cpu_count()
+    return ThreadPoolExecutor(max_workers=max_workers)
+
+
+def _start_collage_task(
+        layout: CollageLayout,
+        task_progres: ProgresCounter
+        ) -> None:
+    """set task of decoding all tiles of layout"""
+    images_amount = sum(len(row) for row in layout.rows)
+    task_progres.set_new_task('creating collage', max(images_amount, 1))
+
+
+def _write_png_chunk(file: BinaryIO, chunk_type: bytes, data: bytes) -> None:
+    file.write(struct.pack('>I', len(data)))
+    file.write(chunk_type)
+    file.write(data)
+    file.write(struct.pack('>I', zlib.crc32(chunk_type + data)))
+
+
+def _read_size(image: CollageImage) -> Tuple[int, int]:
+    """Returns displayed image size without decoding pixels"""
+    if image.size is not None:
+        return image.size
+    with Image.open(image.path) as img:
+        return orientation.displayed_size(img)
+
+
+def _load_tile(path: pathlib.Path, size: Tuple[int, int]) -> Image:
+    """Decode image resized to given size. Jpeg is decoded
+    in reduced scale, other images are reduced by integer factor
+    before resampling. Image is turned as it is displayed
+    after it is reduced."""
+    with Image.open(path) as img:
+        image_orientation = orientation.get_orientation(img)
+        if orientation.swaps_axes(image_orientation):
+            stored_size = (size[1], size[0])
+        else:
+            stored_size = size
+        img.draft(img.mode, stored_size)
+        factor = min(
+            img.width // stored_size[0], img.height // stored_size[1])
+        if factor >= 2:
+            tile = img.reduce(factor)
+        else:
+            tile = img
+        return orientation.transpose(tile, image_orientation).resize(size)
+
+
+def _scale_size(
+        size: Tuple[int, int],
+        target_height: int
+        ) -> Tuple[int, int]:
+    """resize tuple with (width, hight) to target_height
+    keeps width to height ratio"""
+
+    scale_factor = target_height / size[1]
+    width = int(size[0] * scale_factor)
+    return (width, target_height)
@@ -0,0 +1,127 @@
+import collections
+import contextlib
+import threading
+import time
+from typing import Callable, Iterator, NamedTuple
+from scripts.pillow_api import PhotoEditor
+
+
+class _Session(NamedTuple):
+    editor: PhotoEditor
+    # lock of requests using editor
+    lock: threading.Lock
+
+
+class EditSessions:
+    """Class keeps separate image editor for each user session.
+    Editors not used longer than time to live are removed,
+    when all editors use more memory than memory budget
+    least recently used editors are removed."""
+
+    def __init__(
+            self,
+            create_editor: Callable[[str], PhotoEditor],
+            time_to_live: float,
+            memory_budget: int,
+            clock: Callable[[], float] = time.monotonic
+            ) -> None:
+        """Sets basic values.
+
+        Args:
+            create_editor: function creating editor of session
+            with given id
+            time_to_live: number of seconds after which unused
+            editor is removed
+            memory_budget: max number of bytes used by all editors
+            clock: function returning current time in seconds
+        """
+
+        self._create_editor = create_editor
+        self._time_to_live = time_to_live
+        self._memory_budget = memory_budget
+        self._clock = clock
+        self._lock = threading.Lock()
+        # session id -> session, from least recently used
+        self._sessions = collections.OrderedDict()
+        # session id -> time of last usage
+        self._used = {}
+        # session id -> memory used by editor after last usage
+        self._memory = {}
+        # session id -> number of requests using editor
+        self._users = collections.Counter()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    @property
+    def memory(self) -> int:
+        """number of bytes used by all editors"""
+        return sum(self._memory.values())
+
+    @contextlib.contextmanager
+    def edit(self, session_id: str) -> Iterator[PhotoEditor]:
+        """Returns editor of given session, editor is created
+        when session has no editor.
+        Other requests of the same session wait until editor is returned.
+
+        Args:
+            session_id: id of user session
+        """
+
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = _Session(
+                    self._create_editor(session_id), threading.Lock())
+                self._sessions[session_id] = session
+            self._sessions.move_to_end(session_id)
+            self._used[session_id] = self._clock()
+            self._users[session_id] += 1
+        try:
+            with session.lock:
+                yield session.editor
+                memory = session.editor.memory
+            with self._lock:
+                if self._sessions.get(session_id) is session:
+                    self._memory[session_id] = memory
+                    self._used[session_id] = self._clock()
+        finally:
+            with self._lock:
+                self._users[session_id] -= 1
+                if self._users[session_id] == 0:
+                    del self._users[session_id]
+                self._evict(session_id)
+
+    def _evict(self, keep: str) -> None:
+        """Remove expired editors and least recently used editors
+        until all editors fit in memory budget, editors in use
+        are not removed. Must be called with lock.
+
+        Args:
+            keep: session which editor can't be removed
+        """
+
+        expire_time = self._clock() - self._time_to_live
+        for session_id in list(self._sessions):
+            if self._used[session_id] > expire_time:
+                break
+            if session_id != keep and not self._is_used(session_id):
+                self._remove(session_id)
+
+        for session_id in list(self._sessions):
+            if self.memory <= self._memory_budget:
+                break
+            if session_id != keep and not self._is_used(session_id):
+                self._remove(session_id)
+
+    def _is_used(self, session_id: str) -> bool:
+        return self._users[session_id] > 0
+
+    def _remove(self, session_id: str) -> None:
+        """remove editor of given session, must be called with lock"""
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return
+        del self._used[session_id]
+        self._memory.pop(session_id, None)
+        session.editor.close()
@@ -0,0 +1,118 @@
+import io
+from typing import BinaryIO, NamedTuple, Optional, Union
+from PIL import Image, features
+
+
+# pillow format name -> name of feature needed to write it
+_FORMATS_FEATURES = {
+    'WEBP': 'webp',
+    'AVIF': 'avif',
+}
+
+# pillow format name -> file extension
+_FORMATS_EXTENSIONS = {
+    'JPEG': '.jpg',
+    'PNG': '.png',
+    'WEBP': '.webp',
+    'AVIF': '.avif',
+}
+
+# pillow format name -> mimetype of files
+_FORMATS_MIMETYPES = {
+    'JPEG': 'image/jpeg',
+    'PNG': 'image/png',
+    'WEBP': 'image/webp',
+    'AVIF': 'image/avif',
+}
+
+# modes which can be saved in format, other modes are converted to RGB
+_FORMATS_MODES = {
+    'JPEG': ('RGB', 'L'),
+    'PNG': ('RGB', 'RGBA', 'L', 'LA', 'P', '1', 'I'),
+    'WEBP': ('RGB', 'RGBA'),
+    'AVIF': ('RGB', 'RGBA'),
+}
+
+
+class EncoderProfile(NamedTuple):
+    """Settings of image encoding, values that are None
+    are not passed to pillow, so pillow defaults are used"""
+    format: str = 'JPEG'
+    # 1-100 for JPEG, 0-100 for WEBP and AVIF
+    quality: Optional[int] = None
+    # JPEG only
+    progressive: bool = False
+    # JPEG and PNG only, makes file smaller with slower encoding
+    optimize: bool = False
+    # JPEG only, 0 (4:4:4), 1 (4:2:2) or 2 (4:2:0)
+    subsampling: Optional[Union[int, str]] = None
+    # WEBP only, 0 (fast) - 6 (small file)
+    method: Optional[int] = None
+    # AVIF only, 0 (small file) - 10 (fast)
+    speed: Optional[int] = None
+    # keep EXIF and color profile of source image
+    keep_metadata: bool = False
+
+    @property
+    def extension(self) -> str:
+        """extension of files in profile format"""
+        return _FORMATS_EXTENSIONS.get(self.format, '.' + self.format.lower())
+
+    @property
+    def mimetype(self) -> str:
+        return _FORMATS_MIMETYPES.get(
+            self.format, 'application/octet-stream')
+
+
+def is_supported(image_format: str) -> bool:
+    """check if installed pillow can write images in given format"""
+    feature = _FORMATS_FEATURES.get(image_format)
+    return feature is None or bool(features.check(feature))
+
+
+def save_image(
+        image: Image,
+        file: Union[str, BinaryIO],
+        profile: EncoderProfile
+        ) -> None:
+    """Save image encoded with given settings.
+
+    Args:
+        image: pillow image
+        file: path or binary file where image will be written
+        profile: encoding settings
+    """
+
+    modes = _FORMATS_MODES.get(profile.format)
+    if modes is not None and image.mode not in modes:
+        image = image.convert('RGB')
+    image.save(file, profile.format, **_encoder_options(image, profile))
+
+
+def encode_image(image: Image, profile: EncoderProfile) -> bytes:
+    """Returns bytes of image encoded with given settings"""
+    image_bytes = io.BytesIO()
+    save_image(image, image_bytes, profile)
+    return image_bytes.getvalue()
+
+
+def _encoder_options(image: Image, profile: EncoderProfile) -> dict:
+    """pillow save arguments of profile"""
+    options = {}
+    if profile.quality is not None:
+        options['quality'] = profile.quality
+    if profile.progressive:
+        options['progressive'] = True
+    if profile.optimize:
+        options['optimize'] = True
+    if profile.subsampling is not None:
+        options['subsampling'] = profile.subsampling
+    if profile.method is not None:
+        options['method'] = profile.method
+    if profile.speed is not None:
+        options['speed'] = profile.speed
+    if profile.keep_metadata:
+        for key in ('exif', 'icc_profile'):
+            if image.info.get(key):
+                options[key] = image.info[key]
+    return options
@@ -0,0 +1,586 @@
+import sqlite3
+import threading
+from typing import List, NamedTuple, Optional, Tuple
+
+
+# statements updating databases created by older versions of index,
+# database user_version keeps number of already applied statements
+_MIGRATIONS = [
+    # images can share one file, so file is no longer a key
+    'CREATE TABLE images_new ('
+    'id INTEGER PRIMARY KEY, '
+    'file TEXT NOT NULL, '
+    'position INTEGER NOT NULL, '
+    'name TEXT, '
+    'hash TEXT)',
+    'INSERT INTO images_new (file, position) '
+    'SELECT file, position FROM images',
+    'DROP TABLE images',
+    'ALTER TABLE images_new RENAME TO images',
+    'CREATE INDEX images_position ON images (position)',
+    'CREATE INDEX images_file ON images (file)',
+    'CREATE INDEX images_name ON images (name)',
+    'CREATE INDEX images_hash ON images (hash)',
+    # last used suffix for each duplicated name
+    'CREATE TABLE names ('
+    'name TEXT PRIMARY KEY, '
+    'duplicates INTEGER NOT NULL)',
+    # images metadata
+    'ALTER TABLE images ADD COLUMN width INTEGER',
+    'ALTER TABLE images ADD COLUMN height INTEGER',
+    'ALTER TABLE images ADD COLUMN byte_size INTEGER',
+    'ALTER TABLE images ADD COLUMN source TEXT',
+    # sizes were marked unread here, which made all files hashed again,
+    # statement is kept, so numbers of applied statements don't change
+    'SELECT 1',
+    # sizes are read again from files headers in displayed orientation
+    'ALTER TABLE images ADD COLUMN size_stale INTEGER NOT NULL DEFAULT 0',
+    'UPDATE images SET size_stale = 1 WHERE width IS NOT NULL',
+]
+
+# columns by which images can be sorted
+SORT_COLUMNS = ['name', 'width', 'height', 'byte_size', 'source']
+
+
+class ImageFile(NamedTuple):
+    """data of image file stored in images directory,
+    size is None when file is not an image"""
+    file: str
+    hash: str
+    width: Optional[int]
+    height: Optional[int]
+    byte_size: int
+
+
+class ImageMetadata(NamedTuple):
+    """data of galery image, values that were not read
+    from image file yet are None"""
+    position: int
+    name: Optional[str]
+    file: str
+    hash: Optional[str]
+    width: Optional[int]
+    height: Optional[int]
+    byte_size: Optional[int]
+    source: Optional[str]
+
+
+class ImagesIndex:
+    """class keeps persistent order of images from images directory
+    in a small sqlite database, so reading images order doesn't need
+    any changes in images files.
+    Each image has display name and file, many images can use one file."""
+
+    def __init__(self, database_path: str) -> None:
+        """Open (or create) index database.
+
+        Args:
+            database_path: path with file name and extension
+            where database will be store
+        """
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            database_path,
+            check_same_thread=False
+            )
+        with self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS images ('
+                'file TEXT PRIMARY KEY, '
+                'position INTEGER NOT NULL)'
+                )
+            self._connection.execute(
+                'CREATE INDEX IF NOT EXISTS images_position '
+                'ON images (position)'
+                )
+        self._migrate()
+
+    def close(self) -> None:
+        """close connection with database"""
+        with self._lock:
+            self._connection.close()
+
+    def count(self) -> int:
+        """
+        Returns:
+            number of indexed images
+        """
+
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT COUNT(*) FROM images').fetchone()
+        return row[0]
+
+    def contains(self, file: str) -> bool:
+        """
+        Args:
+            file: image file name with extension
+
+        Returns:
+            true when any image uses given file
+        """
+
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT 1 FROM images WHERE file = ?', (file,)).fetchone()
+        return row is not None
+
+    def get_hash_file(self, image_hash: str) -> Optional[str]:
+        """
+        Args:
+            image_hash: hash of image file content
+
+        Returns:
+            name of file with given content used by images,
+            None when no image uses it
+        """
+
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT file FROM images WHERE hash = ? LIMIT 1',
+                (image_hash,)
+                ).fetchone()
+        return None if row is None else row[0]
+
+    def get_file_hash(self, file: str) -> Optional[str]:
+        """
+        Args:
+            file: image file name with extension
+
+        Returns:
+            hash of file content, None when it is not known
+        """
+
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT hash FROM images WHERE file = ? AND hash IS NOT NULL',
+                (file,)
+                ).fetchone()
+        return None if row is None else row[0]
+
+    def set_file_metadata(self, image_file: ImageFile) -> None:
+        """Set data of file for all images using it.
+
+        Args:
+            image_file: data of image file
+        """
+
+        with self._lock, self._connection:
+            self._connection.execute(
+                'UPDATE images SET hash = ?, width = ?, height = ?, '
+                'byte_size = ?, size_stale = 0 WHERE file = ?',
+                (
+                    image_file.hash,
+                    image_file.width,
+                    image_file.height,
+                    image_file.byte_size,
+                    image_file.file
+                )
+                )
+
+    def set_file_size(
+            self,
+            file: str,
+            width: Optional[int],
+            height: Optional[int]
+            ) -> None:
+        """Set size of image for all images using file,
+        size is no longer stale.
+
+        Args:
+            file: image file name with extension
+            width: width of image, None when file is not an image
+            height: height of image, None when file is not an image
+        """
+
+        with self._lock, self._connection:
+            self._connection.execute(
+                'UPDATE images SET width = ?, height = ?, size_stale = 0 '
+                'WHERE file = ?',
+                (width, height, file)
+                )
+
+    def get_unread_files(self) -> List[str]:
+        """
+        Returns:
+            names of files which data was not read yet
+        """
+
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT DISTINCT file FROM images WHERE byte_size IS NULL'
+                ).fetchall()
+        return [row[0] for row in rows]
+
+    def get_stale_size_files(self) -> List[str]:
+        """
+        Returns:
+            names of read files which size has to be read again
+        """
+
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT DISTINCT file FROM images '
+                'WHERE size_stale = 1 AND byte_size IS NOT NULL'
+                ).fetchall()
+        return [row[0] for row in rows]
+
+    def get_metadata(self) -> List[ImageMetadata]:
+        """
+        Returns:
+            metadata of all indexed images ordered by position
+        """
+
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT position, name, file, hash, width, height, '
+                'byte_size, source FROM images ORDER BY position'
+                ).fetchall()
+        return [ImageMetadata(*row) for row in rows]
+
+    def get_files(self) -> List[str]:
+        """
+        Returns:
+            names of all indexed images files ordered by position
+        """
+
+        return [entry[0] for entry in self.get_entries()]
+
+    def get_entries(
+            self,
+            start: int = 0,
+            stop: Optional[int] = None
+            ) -> List[Tuple[str, Optional[str]]]:
+        """Read images of positions in range, rows are found by
+        positions index, so only rows of the range are read.
+
+        Args:
+            start: position of first image
+            stop: position after last image, by default all images
+            after start are read
+
+        Returns:
+            tuples (file name, display name) of indexed images
+            ordered by position, display name is None when image
+            was indexed without it
+        """
+
+        query = 'SELECT file, name FROM images WHERE position >= ?'
+        params = (start,)
+        if stop is not None:
+            query += ' AND position < ?'
+            params += (stop,)
+        with self._lock:
+            rows = self._connection.execute(
+                query + ' ORDER BY position', params).fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    def add_files(
+            self,
+            files: List[str],
+            names: Optional[List[str]] = None
+            ) -> None:
+        """Add images files at the end of images order.
+
+        Args:
+            files: names of images files in order to add
+            names: display names of images, by default images
+            are added without names
+        """
+
+        if names is None:
+            names = [None] * len(files)
+        with self._lock, self._connection:
+            start = self._count()
+            self._connection.executemany(
+                'INSERT INTO images (file, position, name) VALUES (?, ?, ?)',
+                [
+                    (file, start + i, name)
+                    for i, (file, name) in enumerate(zip(files, names))
+                ]
+                )
+
+    def add_image(
+            self,
+            image_file: ImageFile,
+            name: str,
+            unique_name: bool,
+            source: Optional[str] = None
+            ) -> str:
+        """Add image at the end of images order.
+
+        Args:
+            image_file: data of image file
+            name: display name of image
+            unique_name: if it is true and other image already has
+            the same name then number suffix is added to name
+            source: id of image in place where it comes from
+
+        Returns:
+            display name of added image
+        """
+
+        with self._lock, self._connection:
+            if unique_name and self._name_exists(name):
+                name = self._next_unique_name(name)
+            self._connection.execute(
+                'INSERT INTO images (file, position, name, hash, '
+                'width, height, byte_size, source) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (
+                    image_file.file,
+                    self._count(),
+                    name,
+                    image_file.hash,
+                    image_file.width,
+                    image_file.height,
+                    image_file.byte_size,
+                    source
+                )
+                )
+        return name
+
+    def replace_image(
+            self,
+            name: str,
+            image_file: ImageFile
+            ) -> Optional[str]:
+        """Change file of image with given display name,
+        image keeps its position and source.
+
+        Args:
+            name: display name of image
+            image_file: data of new image file
+
+        Returns:
+            name of previous image file, None when there is
+            no image with given name
+        """
+
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                'SELECT id, file FROM images WHERE name = ? '
+                'ORDER BY position LIMIT 1',
+                (name,)
+                ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                'UPDATE images SET file = ?, hash = ?, width = ?, '
+                'height = ?, byte_size = ? WHERE id = ?',
+                (
+                    image_file.file,
+                    image_file.hash,
+                    image_file.width,
+                    image_file.height,
+                    image_file.byte_size,
+                    row[0]
+                )
+                )
+        return row[1]
+
+    def replace_position(
+            self,
+            position: int,
+            file: str,
+            image_file: ImageFile
+            ) -> bool:
+        """Change file of image of given position, when image
+        still uses given file.
+
+        Args:
+            position: index of image in images order
+            file: name of file expected to be used by image
+            image_file: data of new image file
+
+        Returns:
+            true when file of image was changed
+        """
+
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                'UPDATE images SET file = ?, hash = ?, width = ?, '
+                'height = ?, byte_size = ? WHERE position = ? AND file = ?',
+                (
+                    image_file.file,
+                    image_file.hash,
+                    image_file.width,
+                    image_file.height,
+                    image_file.byte_size,
+                    position,
+                    file
+                )
+                )
+        return cursor.rowcount > 0
+
+    def remove_files(self, files: List[str]) -> None:
+        """Remove all images using given files from index
+        and close gaps in positions.
+
+        Args:
+            files: names of images files to remove
+        """
+
+        with self._lock, self._connection:
+            for file in files:
+                rows = self._connection.execute(
+                    'SELECT position FROM images WHERE file = ? '
+                    'ORDER BY position DESC',
+                    (file,)
+                    ).fetchall()
+                for row in rows:
+                    self._remove_position(row[0])
+
+    def remove_position(self, position: int) -> str:
+        """Remove image of given position and close gap in positions.
+
+        Args:
+            position: index of image in images order
+
+        Returns:
+            name of file used by removed image
+
+        Raises:
+            IndexError: there is no image on given position
+        """
+
+        with self._lock, self._connection:
+            self._check_position(position)
+            row = self._connection.execute(
+                'SELECT file FROM images WHERE position = ?',
+                (position,)
+                ).fetchone()
+            self._remove_position(position)
+        return row[0]
+
+    def swap_positions(self, first: int, second: int) -> None:
+        """Swap positions of two images.
+
+        Args:
+            first: index of first image
+            second: index of second image
+
+        Raises:
+            IndexError: there is no image on any of given positions
+        """
+
+        with self._lock, self._connection:
+            self._check_position(first)
+            self._check_position(second)
+            self._connection.execute(
+                'UPDATE images SET position = CASE position '
+                'WHEN ? THEN ? ELSE ? END '
+                'WHERE position IN (?, ?)',
+                (first, second, first, first, second)
+                )
+
+    def set_order(self, order: List[int]) -> None:
+        """Change positions of all images in one transaction.
+
+        Args:
+            order: permutation of current positions, value at index i
+            is current position of image that will be moved to position i
+        """
+
+        with self._lock, self._connection:
+            rows = self._connection.execute(
+                'SELECT id FROM images ORDER BY position').fetchall()
+            self._connection.executemany(
+                'UPDATE images SET position = ? WHERE id = ?',
+                [
+                    (position, rows[current][0])
+                    for position, current in enumerate(order)
+                    if position != current
+                ]
+                )
+
+    def sort(self, column: str, reverse: bool) -> None:
+        """Order images by value of given column, images without
+        value go last.
+
+        Args:
+            column: one of SORT_COLUMNS
+            reverse: sort in descending order
+
+        Raises:
+            ValueError: images can't be sorted by given column
+        """
+
+        if column not in SORT_COLUMNS:
+            raise ValueError(f'images can not be sorted by {column}')
+        direction = 'DESC' if reverse else 'ASC'
+        with self._lock, self._connection:
+            rows = self._connection.execute(
+                f'SELECT id FROM images ORDER BY {column} IS NULL, '
+                f'{column} {direction}, position'
+                ).fetchall()
+            self._connection.executemany(
+                'UPDATE images SET position = ? WHERE id = ?',
+                [(position, row[0]) for position, row in enumerate(rows)]
+                )
+
+    def clear(self) -> None:
+        """remove all images from index"""
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM images')
+            self._connection.execute('DELETE FROM names')
+
+    def _migrate(self) -> None:
+        """apply migrations that were not applied to database yet"""
+        with self._lock:
+            row = self._connection.execute('PRAGMA user_version').fetchone()
+            version = row[0]
+            if version >= len(_MIGRATIONS):
+                return
+            with self._connection:
+                self._connection.execute('BEGIN')
+                for statement in _MIGRATIONS[version:]:
+                    self._connection.execute(statement)
+                self._connection.execute(
+                    f'PRAGMA user_version = {len(_MIGRATIONS)}')
+
+    def _count(self) -> int:
+        """number of images, must be called with lock"""
+        return self._connection.execute(
+            'SELECT COUNT(*) FROM images').fetchone()[0]
+
+    def _name_exists(self, name: str) -> bool:
+        """check if any image has given name, must be called with lock"""
+        row = self._connection.execute(
+            'SELECT 1 FROM images WHERE name = ?', (name,)).fetchone()
+        return row is not None
+
+    def _next_unique_name(self, name: str) -> str:
+        """Create name with number suffix which is not used by any image.
+        Last used suffix is stored, so names are not checked from 1 again.
+        Must be called in transaction.
+        """
+
+        row = self._connection.execute(
+            'SELECT duplicates FROM names WHERE name = ?', (name,)).fetchone()
+        duplicates = 0 if row is None else row[0]
+        while True:
+            duplicates += 1
+            unique_name = f'{name}{duplicates}'
+            if not self._name_exists(unique_name):
+                break
+        self._connection.execute(
+            'INSERT OR REPLACE INTO names (name, duplicates) VALUES (?, ?)',
+            (name, duplicates)
+            )
+        return unique_name
+
+    def _check_position(self, position: int) -> None:
+        """raise IndexError when there is no image on given position"""
+        if not 0 <= position < self._count():
+            raise IndexError(f'no image on position {position}')
+
+    def _remove_position(self, position: int) -> None:
+        """remove row of given position, must be called in transaction"""
+        self._connection.execute(
+            'DELETE FROM images WHERE position = ?', (position,))
+        self._connection.execute(
+            'UPDATE images SET position = position - 1 WHERE position > ?',
+            (position,)
+            )
@@ -1,34 +1,96 @@
+import collections
+import hashlib
+import io
+import os
 import pathlib
-from typing import List, Tuple
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, List, Optional, Tuple, Union
+from PIL import Image
+from scripts.images_index import (
+    ImageFile, ImageMetadata, ImagesIndex, SORT_COLUMNS)
+import scripts.orientation as orientation
 from scripts.progres_counter import ProgresCounter
 
 
+# default name of file where images order is store
+INDEX_FILE_NAME = 'galery_index.db'
+# number of bytes read at once while calculating hash of file
+HASH_CHUNK_SIZE = 1024 * 1024
+# suffixes of files written to images directory before they are
+# added to galery, unfinished writes end with .tmp
+# and downloaded files not added yet end with .download
+UNFINISHED_FILES_SUFFIXES = ('.tmp', '.download')
+
+
+class IncorrectOrderExpection(Exception):
+    """Exception raised when new images order is not a permutation
+    of images positions"""
+    def __init__(self) -> None:
+        super().__init__('Incorrect images order')
+
+
+class IncorrectSortExpection(Exception):
+    """Exception raised when images can't be sorted by given value"""
+    def __init__(self) -> None:
+        super().__init__('Incorrect images sort')
+
+
 class ImagesManager:
     """class is used to manipulate images in a directory"""
 
     def __init__(
             self,
             images_path: str,
-            images_extension: str
+            images_extension: str,
+            index_path: str,
+            max_writers: int = 4
             ) -> None:
         """Sets basic class values.
 
         Args:
             images_path: folder where images are store
             images_extension: extension of images that will be using
+            index_path: path of images index database, it has to be
+            outside of images folder, otherwise every change of index
+            changes folder modification time and folder is read again
+            max_writers: max number of threads writing images files
+            at the same time while saving many images
         """
 
         self._images_path = images_path
         self._images_extension = images_extension
+        self._max_writers = max_writers
         self._FILE_PREFIX_SEPARATOR = '[#]'
+        self._index = ImagesIndex(index_path)
+        self._cache_lock = threading.RLock()
+        self._images_cache = None
+        self._index_mtime = None
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+    @property
+    def cache_hits(self) -> int:
+        """number of images listings returned from cache"""
+        return self._cache_hits
+
+    @property
+    def cache_misses(self) -> int:
+        """number of images listings read from images directory"""
+        return self._cache_misses
 
     def get_images_from_directory(
             self,
             task_progres: ProgresCounter
             ) -> List[pathlib.Path]:
         """Load images from the images directory.
-        It also formats all images names by adding prefix witf image index
-        to keep proper order.
+        Images order is read from the images index, files are never renamed.
+        Images that are not indexed yet (for example from galery created
+        with older version that kept order in names prefixes) are added
+        at the end of the order, keeping order given by their prefixes.
+        Result is cached until images directory modification time changes
+        or images are changed by this class.
 
         Args:
             task_progres: class to track task progress
@@ -37,94 +99,254 @@ class ImagesManager:
             list of all images from the images directory
         """
 
-        task_progres.set_new_task('loading images', 5)
+        return [image for image, _ in self._load_images(task_progres)]
 
-        # get all images from directory
-        path = pathlib.Path(self._images_path)
-        images = list(path.glob('*'+self._images_extension))
-        images.sort(key=lambda img: img.name)
-        task_progres.complate_subtask()
+    def get_images_names(
+            self,
+            task_progres: ProgresCounter
+            ) -> List[str]:
+        """Load display names of images from the images directory.
 
-        # select unordered images
-        ordered_images = []
-        unordered_images = []
-        for image in images:
-            if self.get_image_index(image.name) >= 0:
-                ordered_images.append(image)
-            else:
-                unordered_images.append(image)
-        task_progres.complate_subtask()
+        Args:
+            task_progres: class to track task progress
 
-        # reorder ordered images
-        index = 0
-        ordered_images.sort(key=lambda img: self.get_image_index(img.name))
-        for index in range(len(ordered_images)):
-            image = ordered_images[index]
-            name = self._trim_image_index(image.name)
-            name = self._add_image_index(name, index)
-            ordered_images[index] = self._rename_image(image, name)
-        task_progres.complate_subtask()
+        Returns:
+            list of names in the same order as images returned
+            by get_images_from_directory
+        """
 
-        # name unordered images
-        for image in unordered_images:
-            index = len(ordered_images)
-            new_name = self._add_image_index(image.name, index)
-            image = self._rename_image(image, new_name)
-            ordered_images.append(image)
-        task_progres.complate_subtask()
+        return [name for _, name in self._load_images(task_progres)]
+
+    def count_images(self, task_progres: ProgresCounter) -> int:
+        """
+        Args:
+            task_progres: class to track task progress
+
+        Returns:
+            number of images in the images directory
+        """
+
+        self._sync_index(task_progres)
+        return self._index.count()
+
+    def get_images_slice(
+            self,
+            start: int,
+            stop: int,
+            task_progres: ProgresCounter
+            ) -> List[Tuple[pathlib.Path, str]]:
+        """Load part of images from the images directory.
+        Only images of the slice are read from images index, so it takes
+        time proportional to slice size, not to number of all images,
+        unless images directory was changed since last reading.
+
+        Args:
+            start: index of first image
+            stop: index after last image
+            task_progres: class to track task progress
+
+        Returns:
+            list of tuples (image path, image display name)
+        """
+
+        self._sync_index(task_progres)
+        return self._format_entries(self._index.get_entries(start, stop))
+
+    def remove_unfinished_files(self) -> None:
+        """Remove files left in images directory by writes and downloads
+        interrupted by stopping the app. It should be called only
+        at app start, when no other process writes images,
+        files being written at the moment are removed too."""
+        with os.scandir(self._images_path) as entries:
+            for entry in entries:
+                if entry.name.endswith(UNFINISHED_FILES_SUFFIXES) \
+                        and entry.is_file():
+                    os.remove(entry.path)
+
+    def get_image_hash(self, file: str) -> Optional[str]:
+        """Returns hash of image file content. Images added to directory
+        not by this class have their hash calculated at first call.
+
+        Args:
+            file: image file name with extension
+
+        Returns:
+            hash of image content, None when file is not a galery image
+        """
+
+        if not self._index.contains(file):
+            return None
+        image_hash = self._index.get_file_hash(file)
+        if image_hash is None:
+            image_file = self._read_image_file(file)
+            self._index.set_file_metadata(image_file)
+            image_hash = image_file.hash
+        return image_hash
 
-        # sort images
+    def get_images_metadata(
+            self,
+            task_progres: ProgresCounter
+            ) -> List[ImageMetadata]:
+        """Load metadata of all images from the images directory.
+        Metadata is read from images index, files are read only
+        for images added to directory not by this class, sizes
+        read by older versions are read again from files headers.
+
+        Args:
+            task_progres: class to track task progress
+
+        Returns:
+            list of metadata in the same order as images returned
+            by get_images_from_directory
+        """
+
+        self._sync_index(task_progres)
+        unread_files = self._index.get_unread_files()
+        stale_files = self._index.get_stale_size_files()
+        if len(unread_files) + len(stale_files) == 0:
+            return self._index.get_metadata()
+        task_progres.set_new_task(
+            'reading images', len(unread_files) + len(stale_files))
+        for file in unread_files:
+            self._index.set_file_metadata(self._read_image_file(file))
+            task_progres.complate_subtask()
+        # only header is read, hash and byte size are still correct
+        for file in stale_files:
+            width, height = self._read_image_size(self._images_path + file)
+            self._index.set_file_size(file, width, height)
+            task_progres.complate_subtask()
         task_progres.complate_task()
-        return ordered_images
+        return self._index.get_metadata()
 
-    def save_images(
+    def sort_images(
             self,
-            images: List[Tuple[str, bytes]],
+            column: str,
+            reverse: bool,
             task_progres: ProgresCounter
             ) -> None:
-        """Save given images in the images directory
+        """Order images by value of their metadata.
 
         Args:
-            images: list of images to save,
-            tuple contains name of image and image data as bytes
+            column: name of metadata value, one of SORT_COLUMNS
+            reverse: sort in descending order
             task_progres: class to track task progress
+
+        Raises:
+            IncorrectSortExpection: images can't be sorted by given value
         """
 
-        task_progres.set_new_task('saving images', len(images))
-        for image in images:
-            self.save_image(image[0], image[1], True)
-            task_progres.complate_subtask()
+        if column not in SORT_COLUMNS:
+            raise IncorrectSortExpection()
+        self.get_images_metadata(task_progres)
+        task_progres.set_new_task(f'sort images by {column}', 1)
+        self._index.sort(column, reverse)
+        self._invalidate_cache()
+        task_progres.complate_task()
+
+    def save_images(
+            self,
+            images: Iterable[Tuple[str, Union[bytes, pathlib.Path]]],
+            task_progres: ProgresCounter,
+            images_amount: Optional[int] = None
+            ) -> None:
+        """Save given images in the images directory.
+        Images files are written by pool of threads while next images
+        are read from given iterable, only few images wait for writing
+        at once, so images can be streamed from download.
+        Images are added to galery in given order.
+
+        Args:
+            images: list or iterator of images to save,
+            tuple contains name of image, image data as bytes
+            or path of downloaded file in images directory
+            and optionally id of image in place where it comes from,
+            downloaded files are moved, not copied
+            task_progres: class to track task progress
+            images_amount: number of images to save, needed only when
+            images is an iterator
+        """
+
+        if images_amount is None:
+            images_amount = len(images)
+        task_progres.set_new_task('saving images', images_amount)
+        max_pending = self._max_writers * 2
+        pending = collections.deque()
+        with ThreadPoolExecutor(max_workers=self._max_writers) as writers:
+            try:
+                for image in images:
+                    if len(pending) >= max_pending:
+                        self._add_written_image(
+                            pending.popleft(), task_progres)
+                    future = writers.submit(self._write_image, image[1])
+                    source = image[2] if len(image) > 2 else None
+                    pending.append((image[0], source, future))
+            finally:
+                # images already given are added even if reading
+                # of next images failed
+                while len(pending) > 0:
+                    self._add_written_image(pending.popleft(), task_progres)
         task_progres.complate_task()
 
     def save_image(
             self,
             image_name: str,
             image: bytes,
-            create_new: bool
+            create_new: bool,
+            source: Optional[str] = None
             ) -> None:
         """save image in images directory.
+        Image file is named by hash of image bytes, so the same image
+        is stored only once, even when it is saved under many names.
 
         Args:
-            image_name: image with file will be save
+            image_name: name with which image will be displayed
             image: bytes of image
             create_new: if it is true and image of this name already
-            exist in directory then file will be creqted with unique sufix
+            exist then new image will be added with unique name sufix,
+            else image of this name will get new content
+            source: id of image in place where it comes from,
+            used only when new image is added
         """
 
-        generic_path = self._images_path+image_name+'{}'+self._images_extension
+        image_file = self._write_image(image)
         if create_new:
-            # if an other image with the same name already exist
-            # add a suffix to image
-            dupicates = 0
-            while True:
-                path = generic_path.format('' if dupicates == 0 else dupicates)
-                if not pathlib.Path(path).is_file():
-                    break
-                dupicates += 1
+            self._index.add_image(image_file, image_name, True, source)
         else:
-            path = generic_path.format('')
-        with open(path, 'wb') as image_file:
-            image_file.write(image)
+            old_file = self._index.replace_image(image_name, image_file)
+            if old_file is None:
+                self._index.add_image(image_file, image_name, False, source)
+            elif old_file != image_file.file:
+                self._unlink_unused_file(old_file)
+        self._invalidate_cache()
+
+    def replace_image_on_index(
+            self,
+            index: int,
+            image_file: str,
+            image: bytes
+            ) -> bool:
+        """Change content of image of given index, image keeps
+        its name and position. Content is not changed when image
+        doesn't use given file anymore, so images moved in meantime
+        are not overwritten.
+
+        Args:
+            index: index in list of images from images directory
+            image_file: name of file used by image
+            image: new bytes of image
+
+        Returns:
+            true when content of image was changed
+        """
+
+        new_file = self._write_image(image)
+        replaced = self._index.replace_position(index, image_file, new_file)
+        if replaced and image_file != new_file.file:
+            self._unlink_unused_file(image_file)
+        elif not replaced:
+            self._unlink_unused_file(new_file.file)
+        self._invalidate_cache()
+        return replaced
 
     def delete_all_images(
             self,
@@ -136,12 +358,14 @@ class ImagesManager:
             task_progres: class to track task progress
         """
 
-        images = self.get_images_from_directory(task_progres)
+        images = set(self.get_images_from_directory(task_progres))
         task_progres.set_new_task('deleteing images', len(images))
         for f in images:
             f.unlink()
             task_progres.complate_subtask()
         images = None
+        self._index.clear()
+        self._invalidate_cache()
         task_progres.complate_task()
 
     def delate_image_on_index(
@@ -154,12 +378,16 @@ class ImagesManager:
         Args:
             index: index in list of images from images directory
             task_progres: class to track task progress
+
+        Raises:
+            IndexError: there is no image of given index
         """
 
-        images = self.get_images_from_directory(task_progres)
+        self._sync_index(task_progres)
         task_progres.set_new_task(f'deleteing image {index}', 1)
-        image = images[index]
-        image.unlink()
+        file = self._index.remove_position(index)
+        self._unlink_unused_file(file)
+        self._invalidate_cache()
         task_progres.complate_task()
 
     def format_image_name(self, image_name: str) -> str:
@@ -172,7 +400,7 @@ class ImagesManager:
             formated name
         """
 
-        name = image_name.rstrip(self._images_extension)
+        name = image_name.removesuffix(self._images_extension)
         name = self._trim_image_index(name)
         return name
 
@@ -182,38 +410,59 @@ class ImagesManager:
             shift: int,
             task_progres: ProgresCounter
             ) -> None:
-        """Image position move by swap images poaition of given index
-        with other image. Image file of given index and other image
-        will be renamed, because position are defined by files sufix.
+        """Image position move by swap images position of given index
+        with other image. Only two positions in images index are changed,
+        so it takes the same time regardless of galery size.
 
         Args:
             index: index of image to move
             shift: number of indexs to change
             task_progres: class to track task progress
+
+        Raises:
+            IndexError: there is no image of given index
         """
 
-        images = self.get_images_from_directory(task_progres)
-        task_progres.set_new_task(f'move images {index} shift: {shift}', 2)
+        task_progres.set_new_task(f'move images {index} shift: {shift}', 1)
+        count = self._index.count()
+        if not 0 <= index < count:
+            raise IndexError(f'no image of index {index}')
 
         # calculate index of image to swap place with
         target_index = index + shift
-        target_index = self._clamp(target_index, 0, len(images)-1)
+        target_index = self._clamp(target_index, 0, count-1)
         if index != target_index:
-            f_image = images[index]
-            s_image = images[target_index]
-            # rename first image to temp name to avoid conflicts
-            f_image = self._rename_image(f_image, '_tmp' + f_image.name)
-            # rename second image to change index
-            name = self._trim_image_index(s_image.name)
-            name = self._add_image_index(name, index)
-            self._rename_image(s_image, name)
-            # rename first image to change index
-            name = self._trim_image_index(f_image.name)
-            name = self._add_image_index(name, target_index)
-            self._rename_image(f_image, name)
+            self._index.swap_positions(index, target_index)
+            self._invalidate_cache()
             task_progres.complate_subtask()
         task_progres.complate_task()
 
+    def reorder_images(
+            self,
+            order: List[int],
+            task_progres: ProgresCounter
+            ) -> None:
+        """Change order of all images at once.
+
+        Args:
+            order: permutation of images indexes, value at index i
+            is current index of image that will be moved to index i
+            task_progres: class to track task progress
+
+        Raises:
+            IncorrectOrderExpection: order is not a permutation
+            of images indexes
+        """
+
+        task_progres.set_new_task('reorder images', 1)
+        # bool is subclass of int, but True is not an index
+        if any(type(i) is not int for i in order) \
+                or sorted(order) != list(range(self._index.count())):
+            raise IncorrectOrderExpection()
+        self._index.set_order(order)
+        self._invalidate_cache()
+        task_progres.complate_task()
+
     def get_image_index(self, name: str) -> int:
         """read image index from image name
 
@@ -234,19 +483,276 @@ class ImagesManager:
         except (Exception):
             return -1
 
-    def _rename_image(self, image: pathlib.Path, name: str) -> pathlib.Path:
-        """Change name of  image file
+    def _load_images(
+            self,
+            task_progres: ProgresCounter
+            ) -> List[Tuple[pathlib.Path, str]]:
+        """Read images order from cache or from images index
+        synchronized with images directory.
+
+        Args:
+            task_progres: class to track task progress
+
+        Returns:
+            list of tuples (image path, image display name),
+            list must not be modified
+        """
+
+        with self._cache_lock:
+            self._sync_index(task_progres)
+            if self._images_cache is not None:
+                self._cache_hits += 1
+                return self._images_cache
+            self._cache_misses += 1
+            self._images_cache = self._format_entries(
+                self._index.get_entries())
+            return self._images_cache
+
+    def _sync_index(self, task_progres: ProgresCounter) -> None:
+        """Synchronize images index with images directory, when directory
+        was modified since last synchronization. Not indexed images
+        are added at the end of the order, images which files
+        no longer exist are removed.
+
+        Args:
+            task_progres: class to track task progress
+        """
+
+        with self._cache_lock:
+            mtime = os.stat(self._images_path).st_mtime_ns
+            if self._index_mtime == mtime:
+                return
+
+            task_progres.set_new_task('loading images', 3)
+
+            # get all images from directory
+            files = set(self._scan_directory())
+            task_progres.complate_subtask()
+
+            # remove from index images that no longer exist
+            indexed = set(self._index.get_files())
+            removed_files = indexed - files
+            if len(removed_files) > 0:
+                self._index.remove_files(list(removed_files))
+                self._images_cache = None
+            task_progres.complate_subtask()
+
+            # add not indexed images at the end
+            new_files = [f for f in files if f not in indexed]
+            if len(new_files) > 0:
+                new_files = self._sort_by_image_index(new_files)
+                new_names = [self.format_image_name(f) for f in new_files]
+                self._index.add_files(new_files, new_names)
+                self._images_cache = None
+
+            self._index_mtime = mtime
+            task_progres.complate_task()
+
+    def _format_entries(
+            self,
+            entries: List[Tuple[str, Optional[str]]]
+            ) -> List[Tuple[pathlib.Path, str]]:
+        """Returns tuples (image path, image display name)
+        of images index entries"""
+        path = pathlib.Path(self._images_path)
+        return [
+            (path / f, self.format_image_name(f) if n is None else n)
+            for f, n in entries
+        ]
+
+    def _scan_directory(self) -> List[str]:
+        """
+        Returns:
+            names of all images files from images directory
+        """
+
+        with os.scandir(self._images_path) as entries:
+            return [
+                entry.name for entry in entries
+                if entry.name.endswith(self._images_extension)
+                and entry.is_file()
+            ]
+
+    def _add_written_image(
+            self,
+            pending_image: Tuple[str, Optional[str], Future],
+            task_progres: ProgresCounter
+            ) -> None:
+        """Wait for image file to be written and add image to galery.
 
         Args:
-            image: path to image with extension
-            name: name to set
+            pending_image: name of image, source of image and future
+            with result of _write_image
+            task_progres: class to track task progress
+        """
+
+        name, source, future = pending_image
+        self._index.add_image(future.result(), name, True, source)
+        self._invalidate_cache()
+        task_progres.complate_subtask()
+
+    def _write_image(self, image: Union[bytes, pathlib.Path]) -> ImageFile:
+        """Write image bytes to file named by image hash.
+
+        Args:
+            image: bytes of image or path of downloaded file
 
         Returns:
-            path of renamed image
+            data of written image file
         """
 
-        full = f'{image.parent}/{name}'
-        return image.rename(full)
+        if isinstance(image, pathlib.Path):
+            return self._adopt_image_file(image)
+        image_hash = hashlib.sha256(image).hexdigest()
+        file = self._write_image_file(image_hash, image)
+        width, height = self._read_image_size(io.BytesIO(image))
+        return ImageFile(file, image_hash, width, height, len(image))
+
+    def _adopt_image_file(self, path: pathlib.Path) -> ImageFile:
+        """Rename downloaded file to file named by its hash,
+        file is hashed in chunks, so it is never read whole into memory.
+        File is removed when image with the same content is already saved,
+        file of that image is used then, or when it can't be renamed.
+
+        Args:
+            path: path of downloaded file in images directory
+
+        Returns:
+            data of image file
+        """
+
+        try:
+            image_hash = self._hash_file(str(path))
+            file = self._get_saved_file(image_hash)
+            if file is None:
+                file = image_hash + self._images_extension
+                os.replace(path, self._images_path + file)
+        finally:
+            # downloaded file is not left when it is not added
+            path.unlink(missing_ok=True)
+        image_file = self._images_path + file
+        width, height = self._read_image_size(image_file)
+        return ImageFile(
+            file, image_hash, width, height, os.stat(image_file).st_size)
+
+    def _read_image_file(self, file: str) -> ImageFile:
+        """Read data of file from images directory.
+
+        Args:
+            file: image file name with extension
+
+        Returns:
+            data of image file
+        """
+
+        path = self._images_path + file
+        width, height = self._read_image_size(path)
+        return ImageFile(
+            file,
+            self._hash_file(path),
+            width,
+            height,
+            os.stat(path).st_size
+            )
+
+    def _read_image_size(
+            self,
+            image
+            ) -> Tuple[Optional[int], Optional[int]]:
+        """Read displayed image size from image header
+        without decoding pixels.
+
+        Args:
+            image: path or file object of image
+
+        Returns:
+            tuple (width, height), values are None
+            when data is not an image
+        """
+
+        try:
+            with Image.open(image) as img:
+                return orientation.displayed_size(img)
+        except OSError:
+            return None, None
+
+    def _write_image_file(self, image_hash: str, image: bytes) -> str:
+        """Write image bytes to file named by image hash.
+        File is not written when image with the same content is already
+        saved, file of that image is used then.
+        File is written to temporary file first, so unfinished image
+        never appears in images directory.
+
+        Args:
+            image_hash: hash of image bytes
+            image: bytes of image
+
+        Returns:
+            name of image file
+        """
+
+        saved_file = self._get_saved_file(image_hash)
+        if saved_file is not None:
+            return saved_file
+        file = image_hash + self._images_extension
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=self._images_path)
+        try:
+            with os.fdopen(fd, 'wb') as image_file:
+                image_file.write(image)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, self._images_path + file)
+        return file
+
+    def _get_saved_file(self, image_hash: str) -> Optional[str]:
+        """Returns name of saved file with given content,
+        None when no image uses it or its file is missing.
+        File can be named other than by hash, when it was saved
+        before images files were named by their content."""
+        file = self._index.get_hash_file(image_hash)
+        if file is None or not os.path.exists(self._images_path + file):
+            return None
+        return file
+
+    def _hash_file(self, path: str) -> str:
+        """calculate hash of file content reading it in chunks"""
+        image_hash = hashlib.sha256()
+        with open(path, 'rb') as image_file:
+            for chunk in iter(lambda: image_file.read(HASH_CHUNK_SIZE), b''):
+                image_hash.update(chunk)
+        return image_hash.hexdigest()
+
+    def _unlink_unused_file(self, file: str) -> None:
+        """delete image file if none of images uses it"""
+        if not self._index.contains(file):
+            pathlib.Path(self._images_path + file).unlink(missing_ok=True)
+
+    def _invalidate_cache(self) -> None:
+        """force reading images from directory at next images listing"""
+        with self._cache_lock:
+            self._images_cache = None
+
+    def _sort_by_image_index(self, files: List[str]) -> List[str]:
+        """sort images files names, names with index prefix go first
+        in order of their indexes, then rest of names in alphabetical order
+
+        Args:
+            files: images files names
+
+        Returns:
+            sorted names
+        """
+
+        ordered_files = []
+        unordered_files = []
+        for file in sorted(files):
+            if self.get_image_index(file) >= 0:
+                ordered_files.append(file)
+            else:
+                unordered_files.append(file)
+        ordered_files.sort(key=self.get_image_index)
+        return ordered_files + unordered_files
 
     def _trim_image_index(self, name: str) -> str:
         """remove suffix that allows to read image index from its name
@@ -264,18 +770,6 @@ class ImagesManager:
             name = name[spearatr_index:]
         return name
 
-    def _add_image_index(self, name: str, index: int) -> str:
-        """add suffix that allows to read image index to its name
-
-        Args:
-            name: image name
-            index: number as index
-
-        Returns:
-            name with index sufix
-        """
-        return f'{index}{self._FILE_PREFIX_SEPARATOR}{name}'
-
     def _clamp(self, val: int, min: int, max: int) -> int:
         """keep value bettwen minimum and maximum values"""
         return min if val < min else max if val > max else val
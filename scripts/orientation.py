@@ -0,0 +1,152 @@
+import struct
+from typing import Optional, Tuple
+from PIL import Image, ImageOps
+
+
+# EXIF tag of transform which has to be applied on stored pixels
+# to display image, 1 when pixels are stored upright
+ORIENTATION_TAG = 0x0112
+
+_JPEG_START = b'\xff\xd8'
+# markers after which no metadata segments are expected
+_JPEG_SCAN_MARKERS = (0xDA, 0xD9)
+_JFIF_MARKER = 0xE0
+_EXIF_MARKER = 0xE1
+_EXIF_HEADER = b'Exif\x00\x00'
+# TIFF type of 2 bytes unsigned integer
+_SHORT_TYPE = 3
+
+# EXIF orientation -> transpose displaying stored pixels
+_TRANSPOSES = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+
+def get_orientation(image: Image) -> int:
+    """Returns EXIF orientation of opened image, 1 when it is not set"""
+    orientation = image.getexif().get(ORIENTATION_TAG, 1)
+    return orientation if orientation in range(1, 9) else 1
+
+
+def swaps_axes(orientation: int) -> bool:
+    """check if displayed image width is stored image height"""
+    return orientation >= 5
+
+
+def displayed_size(image: Image) -> Tuple[int, int]:
+    """Returns size of opened image after orientation is applied,
+    pixels are not decoded"""
+    if swaps_axes(get_orientation(image)):
+        return image.height, image.width
+    return image.size
+
+
+def exif_transpose(image: Image) -> Image:
+    """Returns image with pixels turned as image is displayed
+    and orientation removed from its EXIF,
+    image is not copied when it is stored upright"""
+    if get_orientation(image) == 1:
+        return image
+    return ImageOps.exif_transpose(image)
+
+
+def transpose(image: Image, orientation: int) -> Image:
+    """Returns image pixels turned by given orientation,
+    image metadata is not changed"""
+    if orientation not in _TRANSPOSES:
+        return image
+    return image.transpose(_TRANSPOSES[orientation])
+
+
+def set_jpeg_orientation(data: bytes, orientation: int) -> bytes:
+    """Returns jpeg file with given orientation in EXIF,
+    compressed pixels are copied without decoding.
+    Orientation value is overwritten in place when it is set,
+    otherwise EXIF segment is written again or added.
+
+    Args:
+        data: bytes of jpeg file
+        orientation: EXIF orientation 1-8
+
+    Raises:
+        ValueError: data is not jpeg file or orientation is incorrect
+    """
+
+    if orientation not in range(1, 9):
+        raise ValueError(f'incorrect orientation {orientation}')
+    if not data.startswith(_JPEG_START):
+        raise ValueError('image is not jpeg')
+
+    # position where new EXIF segment is inserted, after JFIF segment
+    insert_position = len(_JPEG_START)
+    position = insert_position
+    while position + 4 <= len(data) and data[position] == 0xFF:
+        marker = data[position + 1]
+        if marker in _JPEG_SCAN_MARKERS:
+            break
+        length = struct.unpack('>H', data[position + 2:position + 4])[0]
+        end = position + 2 + length
+        if marker == _JFIF_MARKER and position == insert_position:
+            insert_position = end
+        segment = data[position + 4:end]
+        if marker == _EXIF_MARKER and segment.startswith(_EXIF_HEADER):
+            tiff = _patch_orientation(
+                segment[len(_EXIF_HEADER):], orientation)
+            if tiff is None:
+                exif = Image.Exif()
+                exif.load(segment)
+                exif[ORIENTATION_TAG] = orientation
+                return data[:position] + _exif_segment(exif) + data[end:]
+            return data[:position + 4] + _EXIF_HEADER + tiff + data[end:]
+        position = end
+
+    exif = Image.Exif()
+    exif[ORIENTATION_TAG] = orientation
+    return (
+        data[:insert_position]
+        + _exif_segment(exif)
+        + data[insert_position:]
+    )
+
+
+def _patch_orientation(tiff: bytes, orientation: int) -> Optional[bytes]:
+    """Returns TIFF structure of EXIF with orientation value overwritten,
+    None when first directory has no orientation entry"""
+    if tiff[:2] == b'II':
+        order = '<'
+    elif tiff[:2] == b'MM':
+        order = '>'
+    else:
+        return None
+    try:
+        offset = struct.unpack(order + 'I', tiff[4:8])[0]
+        entries = struct.unpack(order + 'H', tiff[offset:offset + 2])[0]
+        for entry in range(offset + 2, offset + 2 + entries * 12, 12):
+            tag, tag_type, count = struct.unpack(
+                order + 'HHI', tiff[entry:entry + 8])
+            if tag == ORIENTATION_TAG:
+                if tag_type != _SHORT_TYPE or count != 1:
+                    return None
+                value = struct.pack(order + 'H', orientation)
+                return tiff[:entry + 8] + value + tiff[entry + 10:]
+    except struct.error:
+        return None
+    return None
+
+
+def _exif_segment(exif: Image.Exif) -> bytes:
+    """Returns jpeg APP1 segment with given EXIF"""
+    payload = exif.tobytes()
+    if not payload.startswith(_EXIF_HEADER):
+        payload = _EXIF_HEADER + payload
+    return (
+        bytes((0xFF, _EXIF_MARKER))
+        + struct.pack('>H', len(payload) + 2)
+        + payload
+    )
@@ -1,6 +1,18 @@
+import collections
+import io
 import pathlib
-from typing import Tuple
+import secrets
+from typing import (
+    BinaryIO, Callable, Iterable, List, NamedTuple, Optional, Tuple, Union
+)
 from PIL import Image, ImageFilter
+import scripts.adjustments as adjustments
+import scripts.orientation as orientation
+from scripts.collage import (
+    CollageImage, CollageRowsCache, create_collage, create_layout
+)
+from scripts.encoding import EncoderProfile, encode_image, save_image
+from scripts.progres_counter import ProgresCounter
 
 
 class NoEditFileExpection(Exception):
@@ -15,37 +27,352 @@ class EmptyGaleryExpection(Exception):
         super().__init__("galery is empty")
 
 
+class Geometry(NamedTuple):
+    """Symbolic rotation and reversal of image, one of 8 transforms
+    which map rectangle on itself. Image is first reversed in
+    horizontal axies (when mirrored) and then turned left
+    by 90 degrees given number of times."""
+    turns: int = 0
+    mirrored: bool = False
+
+    @property
+    def is_identity(self) -> bool:
+        return self.turns == 0 and not self.mirrored
+
+    def rotated(self, turns: int) -> 'Geometry':
+        """Returns geometry followed by given number of left turns"""
+        return Geometry((self.turns + turns) % 4, self.mirrored)
+
+    def flipped(self, horizontal: bool) -> 'Geometry':
+        """Returns geometry followed by reversal in horizontal
+        or vertical axies"""
+        geometry = Geometry(-self.turns % 4, not self.mirrored)
+        # vertical reversal is horizontal reversal turned upside down
+        return geometry if horizontal else geometry.rotated(2)
+
+    def followed_by(self, other: 'Geometry') -> 'Geometry':
+        """Returns geometry followed by other geometry"""
+        geometry = self.flipped(True) if other.mirrored else self
+        return geometry.rotated(other.turns)
+
+    def apply(self, image: Image) -> Image:
+        """Returns image transformed by single transpose"""
+        if self.is_identity:
+            return image
+        return image.transpose(_TRANSPOSES[self])
+
+
+_TRANSPOSES = {
+    Geometry(1, False): Image.Transpose.ROTATE_90,
+    Geometry(2, False): Image.Transpose.ROTATE_180,
+    Geometry(3, False): Image.Transpose.ROTATE_270,
+    Geometry(0, True): Image.Transpose.FLIP_LEFT_RIGHT,
+    Geometry(1, True): Image.Transpose.TRANSPOSE,
+    Geometry(2, True): Image.Transpose.FLIP_TOP_BOTTOM,
+    Geometry(3, True): Image.Transpose.TRANSVERSE,
+}
+
+# EXIF orientation -> geometry displaying stored pixels
+_ORIENTATIONS = {
+    1: Geometry(),
+    2: Geometry(0, True),
+    3: Geometry(2, False),
+    4: Geometry(2, True),
+    5: Geometry(1, True),
+    6: Geometry(3, False),
+    7: Geometry(3, True),
+    8: Geometry(1, False),
+}
+_ORIENTATIONS_VALUES = {
+    geometry: value for value, geometry in _ORIENTATIONS.items()
+}
+
+
+class EditState(NamedTuple):
+    """Edited image after some operations, geometry, table and matrix
+    are transforms not applied on image pixels yet.
+    Table maps values of each channel, matrix transforms colors,
+    only one of them is set at once"""
+    image: Image
+    geometry: Geometry = Geometry()
+    table: Optional[Tuple[float, ...]] = None
+    matrix: Optional[Tuple[float, ...]] = None
+
+    @property
+    def is_flat(self) -> bool:
+        """true when all transforms are applied on pixels"""
+        return (
+            self.geometry.is_identity
+            and self.table is None
+            and self.matrix is None
+        )
+
+    def flatten(self) -> 'EditState':
+        """Returns state with all transforms applied on pixels"""
+        if self.is_flat:
+            return self
+        state = self.flatten_colors()
+        return EditState(state.geometry.apply(state.image))
+
+    def flatten_colors(self) -> 'EditState':
+        """Returns state with table and matrix applied on pixels"""
+        if self.table is not None:
+            image = adjustments.apply_table(self.image, self.table)
+        elif self.matrix is not None:
+            image = adjustments.apply_matrix(self.image, self.matrix)
+        else:
+            return self
+        return EditState(image, self.geometry)
+
+    def adjusted(self, function: Callable[[float], float]) -> 'EditState':
+        """Returns state followed by mapping of channels values"""
+        state = self if self.matrix is None else self.flatten_colors()
+        table = state.table
+        if table is None:
+            table = adjustments.IDENTITY_TABLE
+        table = adjustments.compose_table(table, function)
+        return state._replace(table=table)
+
+    def transformed(self, matrix: Tuple[float, ...]) -> 'EditState':
+        """Returns state followed by colors transform"""
+        state = self if self.table is None else self.flatten_colors()
+        if state.matrix is not None:
+            matrix = adjustments.compose_matrix(state.matrix, matrix)
+        return state._replace(matrix=matrix)
+
+
+class EditOperation(NamedTuple):
+    """Recorded effect applied on edited image,
+    name is a key of _OPERATIONS"""
+    name: str
+    args: tuple = ()
+
+
+def _rotate(state: EditState, angle: int) -> EditState:
+    if angle % 90 == 0:
+        return state._replace(geometry=state.geometry.rotated(angle // 90))
+    image = state.flatten().image.rotate(angle, expand=True)
+    return EditState(image)
+
+
+def _flip(state: EditState, horizontal: bool) -> EditState:
+    return state._replace(geometry=state.geometry.flipped(horizontal))
+
+
+def _blur(state: EditState) -> EditState:
+    return EditState(state.flatten().image.filter(ImageFilter.BLUR))
+
+
+def _sharpen(state: EditState) -> EditState:
+    return EditState(state.flatten().image.filter(ImageFilter.SHARPEN))
+
+
+def _adjust(function_factory: Callable) -> Callable:
+    """Returns operation mapping channels values by function
+    created from operation arguments"""
+    return lambda state, *args: state.adjusted(function_factory(*args))
+
+
+def _transform(matrix_factory: Callable) -> Callable:
+    """Returns operation transforming colors by matrix
+    created from operation arguments"""
+    return lambda state, *args: state.transformed(matrix_factory(*args))
+
+
+# operation name -> function returning state after operation
+_OPERATIONS = {
+    'rotate': _rotate,
+    'flip': _flip,
+    'blur': _blur,
+    'sharpen': _sharpen,
+    'brightness': _adjust(adjustments.brightness),
+    'contrast': _adjust(adjustments.contrast),
+    'gamma': _adjust(adjustments.gamma),
+    'levels': _adjust(adjustments.levels),
+    'curves': _adjust(adjustments.curves),
+    'saturation': _transform(adjustments.saturation),
+    'grayscale': _transform(lambda: adjustments.saturation(0.0)),
+    'sepia': _transform(lambda: adjustments.SEPIA_MATRIX),
+}
+
+
+def _apply_operation(state: EditState, operation: EditOperation) -> EditState:
+    return _OPERATIONS[operation.name](state, *operation.args)
+
+
+def create_operation(name: str, args: Iterable = ()) -> EditOperation:
+    """Create effect which can be applied by replay_operations.
+
+    Args:
+        name: name of effect, the same as name of PhotoEditor
+        method without "edit_" prefix
+        args: arguments of effect method
+
+    Raises:
+        ValueError: no effect of given name or incorrect arguments
+
+    Returns:
+        recorded effect
+    """
+
+    if name not in _OPERATIONS:
+        raise ValueError(f'no edit effect as {name}')
+    operation = EditOperation(name, tuple(args))
+    try:
+        _apply_operation(EditState(Image.new('RGB', (1, 1))), operation)
+    except TypeError:
+        raise ValueError(f'incorrect arguments of edit effect {name}')
+    return operation
+
+
+def replay_operations(
+        image: Image,
+        operations: List[EditOperation]
+        ) -> Image:
+    """Returns image after all given effects"""
+    state = EditState(image)
+    for operation in operations:
+        state = _apply_operation(state, operation)
+    return state.flatten().image
+
+
+def _operations_geometry(
+        operations: Iterable[EditOperation]
+        ) -> Optional[Geometry]:
+    """Returns composed geometry of effects when they only turn
+    and reverse image, None when any effect changes pixels"""
+    image = Image.new('L', (1, 1))
+    state = EditState(image)
+    for operation in operations:
+        if operation.name not in ('rotate', 'flip'):
+            return None
+        state = _apply_operation(state, operation)
+    return state.geometry if state.image is image else None
+
+
+def _image_memory(image: Image) -> int:
+    """number of bytes of decoded image pixels"""
+    return image.width * image.height * len(image.getbands())
+
+
 class PhotoEditor:
     """Class is use to applay effect on images.
-    Images is store as a file in given path"""
+    Edited image is kept decoded in memory while editing,
+    it is encoded only when preview or edited image bytes are needed.
+    Rotations and reversals are only recorded and composed
+    into one transform, which is applied before other effect
+    or encoding.
+    Applied effects are kept in a log, so they can be undone
+    and redone. Every few effects decoded image is kept as a checkpoint,
+    undo replays effects from the nearest checkpoint before it.
+    Effects are applied on image downscaled to preview size,
+    the same effects are applied on full resolution image only
+    when edited image bytes are needed.
+    Jpeg images which were only turned and reversed can be saved
+    with orientation written in EXIF, without encoding.
+    Preview of edited image can be store as a file in given path
+    or kept only in memory, each change of edited image
+    changes editor version."""
 
-    def __init__(self, edit_file_path: str) -> None:
+    def __init__(
+            self,
+            edit_file_path: Optional[str],
+            checkpoint_interval: int = 4,
+            history_memory: int = 256 * 1024 * 1024,
+            preview_size: Optional[int] = 1920,
+            preview_profile: EncoderProfile = EncoderProfile(),
+            save_profile: EncoderProfile = EncoderProfile(),
+            orientation_metadata: bool = False
+            ) -> None:
         """Sets basic values.
 
         Args:
             edit_file_path: path with the file name and file extension
-            on which the image manipulations will be performed
+            where preview of edited image will be save,
+            None to keep preview only in memory
+            checkpoint_interval: number of effects between checkpoints
+            history_memory: max number of bytes of decoded images kept
+            as checkpoints, least recently used checkpoints are removed
+            preview_size: max width and height of edited preview image,
+            None to edit image in full resolution
+            preview_profile: encoding settings of preview image
+            save_profile: encoding settings of edited image bytes
+            orientation_metadata: save turned and reversed jpeg images
+            by changing EXIF orientation, so they are not encoded
+            and lose no quality
         """
         self._edit_file_path = edit_file_path
         self._edit_file_name = 'none'
+        self._checkpoint_interval = checkpoint_interval
+        self._history_memory = history_memory
+        self._preview_size = preview_size
+        self._preview_profile = preview_profile
+        self._save_profile = save_profile
+        self._orientation_metadata = orientation_metadata
+        # bytes of image set to edit
+        self._source_bytes = None
+        # decoded image set to edit, downscaled to preview size,
+        # None when it wasn't decoded yet
+        self._source_image = None
+        # true when decoded image is smaller than image set to edit
+        self._source_downscaled = False
+        # all recorded effects, including undone ones
+        self._operations = []
+        # number of applied effects
+        self._position = 0
+        # edited image after applied effects, None when it wasn't decoded
+        self._state = None
+        # number of applied effects -> edited image state
+        self._checkpoints = collections.OrderedDict()
+        self._checkpoints_memory = 0
+        # encoded edited image, None when image was changed since encoding
+        self._image_bytes = None
+        self._preview_bytes = None
+        self._preview_outdated = False
+        # versions of different editors are never the same
+        self._version_prefix = secrets.token_hex(8)
+        # number of changes of edited image
+        self._generation = 0
 
-    def set_edit_image(self, image: pathlib.Path):
+    def set_edit_image(
+            self,
+            image: pathlib.Path,
+            name: Optional[str] = None
+            ):
         """Set images as image to apply efectson.
-        Image of given path will be copy to editor directory.
+        Image of given path will be copy to preview path.
         Also sets _edit_file_name as image name without
 
         Args:
             image: path of image to copy
+            name: name of edited image, by default image file name
+            without extension
         """
 
         with image.open('rb') as f:
             image_bytes = f.read()
-        with open(self._edit_file_path, 'wb') as f:
-            f.write(image_bytes)
-        self._edit_file_name = image.stem
+        self.set_edit_image_bytes(
+            image_bytes, image.stem if name is None else name)
+
+    def set_edit_image_bytes(self, image_bytes: bytes, name: str) -> None:
+        """Set image of given bytes as image to apply effects on,
+        bytes are written to preview path when it is set.
+
+        Args:
+            image_bytes: bytes of image file
+            name: name of edited image
+        """
+
+        if self._edit_file_path is not None:
+            with open(self._edit_file_path, 'wb') as f:
+                f.write(image_bytes)
+        self._set_source(image_bytes)
+        self._edit_file_name = name
 
     def get_edit_image_bytes(self) -> bytes:
-        """Returns bytes of images at edit path.
+        """Returns bytes of edited image, image is encoded
+        only if it was changed since last call.
+        When no image was set to edit bytes of preview file are returned.
 
         Raises:
             NoEditFileExpection: image file to edit not exist
@@ -54,65 +381,410 @@ class PhotoEditor:
             bytes of edited images
         """
 
+        if self._image_bytes is not None:
+            return self._image_bytes
+        if self._source_bytes is None:
+            return self._read_edit_file()
+        if self._orientation_metadata:
+            self._image_bytes = self._get_oriented_source_bytes()
+            if self._image_bytes is not None:
+                return self._image_bytes
+        if self._is_source_state():
+            # effects cancelled each other
+            self._image_bytes = self._source_bytes
+        elif self._source_downscaled:
+            # replay effects in full resolution
+            image = replay_operations(
+                self._decode_source(None),
+                self._operations[:self._position]
+                )
+            self._image_bytes = encode_image(image, self._save_profile)
+        elif self._save_profile == self._preview_profile:
+            self._image_bytes = self.get_preview_bytes()
+        else:
+            self._state = self._get_state().flatten()
+            self._image_bytes = encode_image(
+                self._state.image, self._save_profile)
+        return self._image_bytes
+
+    def render_preview(self) -> None:
+        """Save edited image downscaled to preview size in preview path
+        if it was changed since last render,
+        does nothing when preview is kept only in memory"""
+        if not self._preview_outdated or self._edit_file_path is None:
+            return
+        with open(self._edit_file_path, 'wb') as f:
+            f.write(self.get_preview_bytes())
+        self._preview_outdated = False
+
+    def get_preview_bytes(self) -> bytes:
+        """Returns encoded edited image downscaled to preview size,
+        image is encoded only if it was changed since last call.
+
+        Raises:
+            NoEditFileExpection: no image was set to edit and
+            preview file not exist
+        """
+
+        if self._preview_bytes is not None:
+            return self._preview_bytes
+        if self._source_bytes is None:
+            return self._read_edit_file()
+        if self._is_source_state() and not self._source_downscaled:
+            # effects cancelled each other
+            self._preview_bytes = self._source_bytes
+        else:
+            self._state = self._get_state().flatten()
+            self._preview_bytes = encode_image(
+                self._state.image, self._preview_profile)
+        return self._preview_bytes
+
+    @property
+    def preview_mimetype(self) -> str:
+        """mimetype of preview bytes, preview of not changed image
+        has format of image set to edit"""
+        preview_bytes = self._preview_bytes
+        if preview_bytes is None or preview_bytes is not self._source_bytes:
+            return self._preview_profile.mimetype
         try:
-            with pathlib.Path(self._edit_file_path).open('rb') as f:
-                image_bytes = f.read()
+            with Image.open(io.BytesIO(preview_bytes)) as img:
+                return img.get_format_mimetype()
         except Exception:
-            raise NoEditFileExpection()
-        return image_bytes
+            return self._preview_profile.mimetype
+
+    @property
+    def version(self) -> str:
+        """identifier of edited image, changes after each change
+        of edited image and is unique for each editor"""
+        return f'{self._version_prefix}-{self._generation}'
 
     @property
     def edit_file_name(self) -> str:
         return self._edit_file_name
 
-    def _get_edit_image(self) -> Image:
-        """Read edit image file as pillow image."""
-        try:
-            img = Image.open(self._edit_file_path)
-        except Exception:
-            raise NoEditFileExpection()
-        return img
+    @property
+    def memory(self) -> int:
+        """approximate number of bytes used by edited image,
+        its history and encoded copies"""
+        memory = self._checkpoints_memory
+        buffers = {
+            id(data): len(data)
+            for data in (
+                self._source_bytes, self._image_bytes, self._preview_bytes)
+            if data is not None
+        }
+        images = {
+            id(image): _image_memory(image)
+            for image in (
+                self._source_image,
+                None if self._state is None else self._state.image)
+            if image is not None
+        }
+        return memory + sum(buffers.values()) + sum(images.values())
+
+    def close(self) -> None:
+        """Remove edited image and its preview file"""
+        self._set_source(None)
+        if self._edit_file_path is not None:
+            pathlib.Path(self._edit_file_path).unlink(missing_ok=True)
+
+    @property
+    def can_undo(self) -> bool:
+        return self._position > 0
 
-    def _save_edit_image(self, image: Image) -> None:
-        """Save pillow image as file in edit path."""
-        image.save(self._edit_file_path)
+    @property
+    def can_redo(self) -> bool:
+        return self._position < len(self._operations)
+
+    def undo(self) -> None:
+        """Revert last applied effect, does nothing when
+        there is no effect to revert"""
+        if not self.can_undo:
+            return
+        self._state = self._replay(self._position - 1)
+        self._position -= 1
+        self._set_changed()
+
+    def redo(self) -> None:
+        """Applay again last reverted effect, does nothing when
+        there is no effect to applay"""
+        if not self.can_redo:
+            return
+        operation = self._operations[self._position]
+        self._state = _apply_operation(self._get_state(), operation)
+        self._position += 1
+        self._add_checkpoint()
+        self._set_changed()
 
     def edit_rotate(self, angle: int) -> None:
-        """Applay rotation of given angle on edited file
+        """Applay rotation of given angle on edited image
         angle < 0 rotate in left"""
-        image = self._get_edit_image()
-        image = image.rotate(angle, expand=True)
-        self._save_edit_image(image)
+        self._apply(EditOperation('rotate', (angle,)))
 
     def edit_flip(self, horizontal: bool) -> None:
-        """Applay reversal in horizontal or vertical axies on edited file"""
-        image = self._get_edit_image()
-        if horizontal:
-            image = image.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
-        else:
-            image = image.transpose(Image.Transpose.FLIP_TOP_BOTTOM)
-        self._save_edit_image(image)
+        """Applay reversal in horizontal or vertical axies on edited image"""
+        self._apply(EditOperation('flip', (horizontal,)))
 
     def edit_blur(self) -> None:
-        """Applay blur on edited file"""
-        image = self._get_edit_image()
-        image = image.filter(ImageFilter.BLUR)
-        self._save_edit_image(image)
+        """Applay blur on edited image"""
+        self._apply(EditOperation('blur'))
+
+    def edit_sharpen(self) -> None:
+        """Applay sharpen on edited image"""
+        self._apply(EditOperation('sharpen'))
+
+    def edit_brightness(self, factor: float) -> None:
+        """Multiply channels values of edited image by factor"""
+        self._apply(EditOperation('brightness', (factor,)))
+
+    def edit_contrast(self, factor: float) -> None:
+        """Multiply distance of channels values from middle gray
+        by factor on edited image"""
+        self._apply(EditOperation('contrast', (factor,)))
+
+    def edit_gamma(self, gamma: float) -> None:
+        """Applay gamma correction on edited image,
+        gamma above 1 brightens image
+
+        Raises:
+            ValueError: gamma is not positive
+        """
+        self._apply(EditOperation('gamma', (gamma,)))
+
+    def edit_levels(
+            self,
+            black: int,
+            white: int,
+            gamma: float = 1.0
+            ) -> None:
+        """Stretch channels values between black and white point
+        to full range on edited image
+
+        Raises:
+            ValueError: white point is not above black point
+            or gamma is not positive
+        """
+        self._apply(EditOperation('levels', (black, white, gamma)))
+
+    def edit_curves(self, points: List[Tuple[int, int]]) -> None:
+        """Map channels values of edited image by curve going
+        linearly through given (input, output) points
+
+        Raises:
+            ValueError: less than two points or repeated inputs
+        """
+        points = tuple(tuple(point) for point in points)
+        self._apply(EditOperation('curves', (points,)))
+
+    def edit_saturation(self, factor: float) -> None:
+        """Multiply colors distance from gray by factor on edited image"""
+        self._apply(EditOperation('saturation', (factor,)))
+
+    def edit_grayscale(self) -> None:
+        """Remove colors from edited image"""
+        self._apply(EditOperation('grayscale'))
+
+    def edit_sepia(self) -> None:
+        """Applay sepia tone on edited image"""
+        self._apply(EditOperation('sepia'))
+
+    def _apply(self, operation: EditOperation) -> None:
+        """Applay effect on edited image and add it to log,
+        reverted effects can't be redone after it.
+
+        Raises:
+            NoEditFileExpection: image file to edit not exist
+        """
+
+        if self._source_bytes is None:
+            # edit preview file when no image was set to edit
+            self._set_source(self._read_edit_file())
+        state = _apply_operation(self._get_state(), operation)
+        del self._operations[self._position:]
+        for position in list(self._checkpoints):
+            if position > self._position:
+                self._remove_checkpoint(position)
+        self._state = state
+        self._operations.append(operation)
+        self._position += 1
+        self._add_checkpoint()
+        self._set_changed()
+
+    def _get_oriented_source_bytes(self) -> Optional[bytes]:
+        """Returns image set to edit with applied turns and reversals
+        written as EXIF orientation, None when image is not jpeg
+        or effects change pixels"""
+        geometry = _operations_geometry(self._operations[:self._position])
+        if geometry is None:
+            return None
+        if geometry.is_identity:
+            return self._source_bytes
+        try:
+            with Image.open(io.BytesIO(self._source_bytes)) as img:
+                if img.format != 'JPEG':
+                    return None
+                source_orientation = orientation.get_orientation(img)
+        except Exception:
+            return None
+        geometry = _ORIENTATIONS[source_orientation].followed_by(geometry)
+        return orientation.set_jpeg_orientation(
+            self._source_bytes, _ORIENTATIONS_VALUES[geometry])
+
+    def _is_source_state(self) -> bool:
+        """check if edited image is the same as image set to edit"""
+        state = self._get_state()
+        return state.image is self._source_image and state.is_flat
+
+    def _set_source(self, image_bytes: Optional[bytes]) -> None:
+        """Start edit session of image with given bytes"""
+        self._source_bytes = image_bytes
+        self._source_image = None
+        self._source_downscaled = False
+        self._operations = []
+        self._position = 0
+        self._state = None
+        self._checkpoints.clear()
+        self._checkpoints_memory = 0
+        self._image_bytes = image_bytes
+        # source larger than preview size is encoded from downscaled image
+        self._preview_bytes = (
+            image_bytes if self._fits_preview_size(image_bytes) else None)
+        self._preview_outdated = False
+        self._generation += 1
+
+    def _fits_preview_size(self, image_bytes: Optional[bytes]) -> bool:
+        """check if image of given bytes is not larger than preview size,
+        only image header is read"""
+        if image_bytes is None or self._preview_size is None:
+            return True
+        try:
+            with Image.open(io.BytesIO(image_bytes)) as img:
+                return max(img.size) <= self._preview_size
+        except Exception:
+            # image can't be decoded, error is raised on edit
+            return True
+
+    def _set_changed(self) -> None:
+        self._image_bytes = None
+        self._preview_bytes = None
+        self._preview_outdated = True
+        self._generation += 1
+
+    def _get_state(self) -> EditState:
+        """Returns state of edited image after applied effects"""
+        if self._state is None:
+            self._state = self._replay(self._position)
+        return self._state
+
+    def _replay(self, position: int) -> EditState:
+        """Returns state after given number of effects,
+        effects are applied from the nearest checkpoint"""
+        start = max(
+            (p for p in self._checkpoints if p <= position),
+            default=0
+            )
+        if start == 0:
+            state = EditState(self._get_source_image())
+        else:
+            self._checkpoints.move_to_end(start)
+            state = self._checkpoints[start]
+        for operation in self._operations[start:position]:
+            state = _apply_operation(state, operation)
+        return state
+
+    def _get_source_image(self) -> Image:
+        """Returns image set to edit downscaled to preview size,
+        image is decoded only once.
+
+        Raises:
+            NoEditFileExpection: image can't be decoded
+        """
+
+        if self._source_image is None:
+            self._source_image = self._decode_source(self._preview_size)
+        return self._source_image
+
+    def _decode_source(self, max_size: Optional[int]) -> Image:
+        """Decode image set to edit.
+
+        Args:
+            max_size: max width and height of decoded image,
+            None to decode in full resolution
+
+        Raises:
+            NoEditFileExpection: image can't be decoded
+        """
+
+        try:
+            img = Image.open(io.BytesIO(self._source_bytes))
+            if max_size is not None and max(img.size) > max_size:
+                # jpeg is decoded at reduced scale
+                img.draft(img.mode, (max_size, max_size))
+                img.thumbnail((max_size, max_size))
+                self._source_downscaled = True
+            img.load()
+            # image is edited as it is displayed
+            img = orientation.exif_transpose(img)
+        except Exception:
+            raise NoEditFileExpection()
+        return img
+
+    def _add_checkpoint(self) -> None:
+        """Keep current state as checkpoint when it is time for it,
+        removes least recently used checkpoints above memory limit"""
+        if self._position % self._checkpoint_interval != 0:
+            return
+        if self._state.image is self._source_image:
+            # only transforms were applied, replay is cheap
+            return
+        if self._position in self._checkpoints:
+            self._remove_checkpoint(self._position)
+        self._checkpoints[self._position] = self._state
+        self._checkpoints_memory += _image_memory(self._state.image)
+        while self._checkpoints_memory > self._history_memory:
+            self._remove_checkpoint(next(iter(self._checkpoints)))
+
+    def _remove_checkpoint(self, position: int) -> None:
+        state = self._checkpoints.pop(position)
+        self._checkpoints_memory -= _image_memory(state.image)
+
+    def _read_edit_file(self) -> bytes:
+        """Returns bytes of preview file.
+
+        Raises:
+            NoEditFileExpection: preview file not exist
+        """
+
+        if self._edit_file_path is None:
+            raise NoEditFileExpection()
+        try:
+            with pathlib.Path(self._edit_file_path).open('rb') as f:
+                return f.read()
+        except Exception:
+            raise NoEditFileExpection()
 
     def save_images_as_collage(
             self,
-            images_rows: pathlib.Path,
+            images_rows: List[List[Union[pathlib.Path, CollageImage]]],
             single_image_height: int,
-            save_path: str
+            save_path: Union[str, BinaryIO],
+            task_progres: Optional[ProgresCounter] = None,
+            rows_cache: Optional[CollageRowsCache] = None,
+            profile: EncoderProfile = EncoderProfile()
             ) -> None:
         """Create one image with all images from the given list,
         keeps images order in rows and columns.
 
         Args:
-            images_rows: list of rows with images
+            images_rows: list of rows with images paths or images
+            with known sizes
             single_image_height: number of pixeles with each row will be save
             save_path: path with file name and extension
-            where file will be save
+            or binary file where file will be save
+            task_progres: class to track task progress
+            rows_cache: cache of rendered rows, by default rows
+            are not cached
+            profile: encoding settings of collage
 
         Raises:
             EmptyGaleryExpection: when image_rows list is empty
@@ -121,45 +793,17 @@ class PhotoEditor:
         if images_rows is None or len(images_rows) == 0:
             raise EmptyGaleryExpection()
 
-        # calculate total size
-        total_height = single_image_height * len(images_rows)
-        row_widths = []
-        for row in images_rows:
-            row_width = 0
-            for img_path in row:
-                img = Image.open(img_path)
-                new_size = self._format_img_size(img.size, single_image_height)
-                row_width += new_size[0]
-            row_widths.append(row_width)
-        total_width = max(row_widths)
-
-        # crete main image
-        bg_color = (51, 62, 73)
-        main_image = Image.new('RGB', (total_width, total_height), bg_color)
-
-        # paste single image
-        paste_y = 0
-        for row_index, row in enumerate(images_rows):
-            paste_x = int((total_width - row_widths[row_index]) / 2)
-            for img_path in row:
-                img = Image.open(img_path)
-                size = self._format_img_size(img.size, single_image_height)
-                img = img.resize(size)
-                main_image.paste(img, (paste_x, paste_y))
-                paste_x += size[0]
-            paste_y += single_image_height
-
-        # save
-        main_image.save(save_path, 'JPEG')
-
-    def _format_img_size(
-            self,
-            size: Tuple[int, int],
-            target_height: int
-            ) -> Tuple[int, int]:
-        """resize tuple with (width, hight) to target_height
-        keeps width to height ratio"""
-
-        scale_factor = target_height / size[1]
-        width = int(size[0] * scale_factor)
-        return (width, target_height)
+        images_rows = [
+            [
+                image if isinstance(image, CollageImage)
+                else CollageImage(image)
+                for image in row
+            ]
+            for row in images_rows
+        ]
+        layout = create_layout(images_rows, single_image_height)
+        if task_progres is None:
+            task_progres = ProgresCounter(0, 100)
+        main_image = create_collage(
+            layout, task_progres, rows_cache=rows_cache)
+        save_image(main_image, save_path, profile)
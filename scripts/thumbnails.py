@@ -0,0 +1,156 @@
+import collections
+import os
+import pathlib
+import tempfile
+import threading
+from typing import List
+from PIL import Image
+from scripts.encoding import EncoderProfile, save_image
+import scripts.orientation as orientation
+
+
+class IncorrectThumbnailSizeExpection(Exception):
+    def __init__(self) -> None:
+        super().__init__('Incorrect thumbnail size')
+
+
+class ThumbnailsCache:
+    """Class creates downscaled copies of images and keeps them as files.
+    Thumbnail is created at first request, files are named by hash
+    of source image content, so changed image gets new thumbnails.
+    When files take more space than disk budget least recently used
+    thumbnails are removed."""
+
+    def __init__(
+            self,
+            cache_path: str,
+            sizes: List[int],
+            disk_budget: int,
+            profile: EncoderProfile = EncoderProfile()
+            ) -> None:
+        """Sets basic values and reads thumbnails created before.
+
+        Args:
+            cache_path: folder where thumbnails are store
+            sizes: available heights of thumbnails in pixels
+            disk_budget: max number of bytes of all thumbnails files
+            profile: encoding settings of thumbnails files
+        """
+
+        self._cache_path = cache_path
+        self._sizes = sorted(sizes)
+        self._disk_budget = disk_budget
+        self._profile = profile
+        self._extension = profile.extension
+        self._lock = threading.Lock()
+        # thumbnail file name -> file size, from least recently used
+        self._files = collections.OrderedDict()
+        self._total_size = 0
+        os.makedirs(cache_path, exist_ok=True)
+        self._load_files()
+
+    @property
+    def sizes(self) -> List[int]:
+        return list(self._sizes)
+
+    @property
+    def total_size(self) -> int:
+        """number of bytes of all thumbnails files"""
+        return self._total_size
+
+    def get_thumbnail(
+            self,
+            image: pathlib.Path,
+            image_hash: str,
+            size: int
+            ) -> pathlib.Path:
+        """Returns thumbnail of image, creates it when it doesn't exist.
+
+        Args:
+            image: path of source image
+            image_hash: hash of source image content
+            size: height of thumbnail, one of available sizes
+
+        Raises:
+            IncorrectThumbnailSizeExpection: size is not available
+
+        Returns:
+            path of thumbnail file
+        """
+
+        if size not in self._sizes:
+            raise IncorrectThumbnailSizeExpection()
+        file = f'{image_hash}_{size}{self._extension}'
+        path = pathlib.Path(self._cache_path + file)
+        with self._lock:
+            if file in self._files:
+                self._files.move_to_end(file)
+                # keep usage order after restart
+                os.utime(path)
+                return path
+
+        self._create_thumbnail(image, path, size)
+
+        with self._lock:
+            if file not in self._files:
+                self._files[file] = path.stat().st_size
+                self._total_size += self._files[file]
+            self._evict(file)
+        return path
+
+    def _create_thumbnail(
+            self,
+            image: pathlib.Path,
+            path: pathlib.Path,
+            size: int
+            ) -> None:
+        """Save downscaled image, thumbnail is written to temporary file
+        first, so unfinished file is never served.
+
+        Args:
+            image: path of source image
+            path: path of thumbnail file
+            size: height of thumbnail
+        """
+
+        with Image.open(image) as img:
+            # only displayed height is limited, jpeg is decoded
+            # at reduced scale and turned after downscaling
+            if orientation.swaps_axes(orientation.get_orientation(img)):
+                img.thumbnail((size, img.height))
+            else:
+                img.thumbnail((img.width, size))
+            img = orientation.exif_transpose(img)
+            fd, tmp_path = tempfile.mkstemp(
+                suffix='.tmp', dir=self._cache_path)
+            with os.fdopen(fd, 'wb') as f:
+                save_image(img, f, self._profile)
+        os.replace(tmp_path, path)
+
+    def _evict(self, keep: str) -> None:
+        """Remove least recently used thumbnails until all files
+        fit in disk budget, must be called with lock.
+
+        Args:
+            keep: thumbnail file that can't be removed
+        """
+
+        while self._total_size > self._disk_budget and len(self._files) > 1:
+            file, file_size = self._files.popitem(last=False)
+            if file == keep:
+                self._files[file] = file_size
+                continue
+            self._total_size -= file_size
+            pathlib.Path(self._cache_path + file).unlink(missing_ok=True)
+
+    def _load_files(self) -> None:
+        """read thumbnails files ordered by last usage"""
+        with os.scandir(self._cache_path) as entries:
+            files = [
+                entry for entry in entries
+                if entry.name.endswith(self._extension) and entry.is_file()
+            ]
+        files.sort(key=lambda entry: entry.stat().st_mtime_ns)
+        for entry in files:
+            self._files[entry.name] = entry.stat().st_size
+            self._total_size += entry.stat().st_size
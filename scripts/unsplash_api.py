@@ -1,9 +1,25 @@
+import collections
+import os
+import pathlib
 import requests
-from typing import List, Tuple
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import (
+    Callable, Iterable, Iterator, List, Optional, Tuple, Union
+)
 from typing import Dict
 from scripts.progres_counter import ProgresCounter
 
 
+# max number of images on one page of unsplash search
+MAX_PAGE_SIZE = 30
+# number of bytes of image kept in memory while downloading to file
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# suffix of completely downloaded files, unfinished files end with .tmp
+DOWNLOADED_FILE_SUFFIX = '.download'
+
+
 class IncorrectPageResultExpection(Exception):
     def __init__(self) -> None:
         super().__init__('Incorrect page result')
@@ -23,6 +39,60 @@ class NoImageResolutionExpection(Exception):
     pass
 
 
+class ImagesDownloader:
+    """Class downloads images in pool of threads over one HTTP session,
+    so connections are reused between images and search pages.
+    Number of connections to one host is limited, downloads above
+    the limit wait for free connection."""
+
+    def __init__(self, max_workers: int = 8, max_per_host: int = 4) -> None:
+        """Sets basic values.
+
+        Args:
+            max_workers: max number of images downloaded at once
+            max_per_host: max number of connections to one host
+        """
+
+        self._max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=max_per_host, pool_block=True)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    @property
+    def session(self) -> requests.Session:
+        """HTTP session with pool of connections used by downloads"""
+        return self._session
+
+    def submit(
+            self,
+            image: Dict[str, str],
+            resolution: str,
+            alternative_name: str,
+            download_path: Optional[str] = None
+            ) -> Future:
+        """Start image download, future result is the same
+        as result of _download_image"""
+        return self._executor.submit(
+            _download_image,
+            image,
+            resolution,
+            alternative_name,
+            self._session,
+            download_path
+            )
+
+    def close(self) -> None:
+        """Wait for started downloads and close connections"""
+        self._executor.shutdown()
+        self._session.close()
+
+
 def _get_url(
         query: str,
         images_amount: int,
@@ -72,20 +142,27 @@ def get_resolutions() -> List[str]:
 def _download_image(
         image: Dict[str, str],
         resolution: str,
-        alternative_name: str
-        ) -> Tuple[str, bytes]:
-    """download image from url and returns image bytes and title
+        alternative_name: str,
+        session: Optional[requests.Session] = None,
+        download_path: Optional[str] = None
+        ) -> Tuple[str, Union[bytes, pathlib.Path], str]:
+    """download image from url and returns image bytes, title and id
 
     Args:
         image: unsplash image JSON
         resolution: resolution of image
         alternative_name: title that will be use when image not have own title
+        session: HTTP session reusing connections, by default
+        new connection is opened
+        download_path: folder where image is downloaded as file,
+        by default image is downloaded to memory
 
     Raises:
         NoImageResolutionExpection: image doesn't contain given resolution
 
     Returns:
-        images tumples (title, data bytes)
+        images tumples (title, data bytes or path of downloaded file,
+        unsplash id)
     """
 
     image_title = image['alt_description']
@@ -97,23 +174,70 @@ def _download_image(
     if resolution not in urls:
         raise NoImageResolutionExpection()
     image_url = urls[resolution]
-    image_result = requests.get(image_url)
-    return (image_title, image_result.content)
+    get = requests.get if session is None else session.get
+    if download_path is not None:
+        path = _download_file(get, image_url, download_path)
+        return (image_title, path, image.get('id'))
+    image_result = get(image_url)
+    return (image_title, image_result.content, image.get('id'))
+
+
+def _download_file(
+        get: Callable[..., requests.Response],
+        url: str,
+        download_path: str
+        ) -> pathlib.Path:
+    """Download file in chunks, only one chunk is kept in memory.
+    File is written to temporary file, which is renamed
+    when download is complete, so unfinished file is never used.
 
+    Args:
+        get: function sending GET request
+        url: url of file
+        download_path: folder where file is downloaded
 
-def search_images(
+    Returns:
+        path of downloaded file
+    """
+
+    fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=download_path)
+    try:
+        with os.fdopen(fd, 'wb') as f, get(url, stream=True) as result:
+            for chunk in result.iter_content(DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    path = pathlib.Path(tmp_path).with_suffix(DOWNLOADED_FILE_SUFFIX)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _remove_downloaded_file(future: Future) -> None:
+    """remove file of download which result is not needed"""
+    if future.cancelled() or future.exception() is not None:
+        return
+    image_data = future.result()
+    if isinstance(image_data[1], pathlib.Path):
+        image_data[1].unlink(missing_ok=True)
+
+
+def _get_page_images(
         query: str,
-        images_amount: int,
+        page_size: int,
         resolution: str,
-        task_progres: ProgresCounter
-        ) -> List[Tuple[str, bytes]]:
-    """Request images from unsplash.com and return them as list
+        page: int = 1,
+        session: Optional[requests.Session] = None
+        ) -> Tuple[List[Dict[str, str]], bool]:
+    """request page with images JSONs from unsplash.com
 
     Args:
         query: subject of the image
-        images_amount: target number of images to search
+        page_size: number of images on page
         resolution: resolution of image
-        task_progres: class to track task progress
+        page: number of page with images
+        session: HTTP session reusing connections, by default
+        new connection is opened
 
     Raises:
         IncorrectQueryExpection: query is none or empty
@@ -121,34 +245,257 @@ def search_images(
         IncorrectPageResultExpection: result from page is no a json
 
     Returns:
-        list of images tumples (title, data bytes)
+        list of unsplash images JSONs and true when it is the last page
     """
 
-    task_progres.set_new_task('seraching for ' + str(query), images_amount)
-
     if resolution not in get_resolutions():
         raise IncorrectResolutionExpection()
 
-    page_url = _get_url(query, images_amount, 1)
-    page_result = requests.get(page_url)
+    page_url = _get_url(query, page_size, page)
+    get = requests.get if session is None else session.get
+    page_result = get(page_url)
 
     try:
         json_data = page_result.json()
         images = json_data['results']
+        total_pages = json_data.get('total_pages')
     except Exception:
         raise IncorrectPageResultExpection()
+    is_last = len(images) < page_size or (
+        total_pages is not None and page >= total_pages)
+    return images, is_last
+
+
+def _iterate_pages_images(
+        query: str,
+        images_amount: int,
+        resolution: str,
+        first_page: Tuple[List[Dict[str, str]], bool],
+        session: Optional[requests.Session] = None
+        ) -> Iterator[Dict[str, str]]:
+    """iterate through images JSONs of following pages.
+    Next page is requested while images of current page are downloaded
+    when current page has not enough images, otherwise it is requested
+    only when images of current page are skipped.
+
+    Args:
+        query: subject of the image
+        images_amount: target number of images to search
+        resolution: resolution of image
+        first_page: result of _get_page_images for first page
+        session: HTTP session reusing connections, by default
+        new connection is opened for each page
+
+    Raises:
+        IncorrectPageResultExpection: result from page is no a json
+
+    Returns:
+        iterator of unsplash images JSONs
+    """
+
+    page_size = min(images_amount, MAX_PAGE_SIZE)
+    images, is_last = first_page
+    page = 1
+    # number of images on already requested pages
+    images_number = len(images)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        while len(images) > 0:
+            next_page = None
+            if not is_last and images_number < images_amount:
+                next_page = executor.submit(
+                    _get_page_images,
+                    query,
+                    page_size,
+                    resolution,
+                    page + 1,
+                    session
+                    )
+            yield from images
+            if is_last:
+                return
+            page += 1
+            if next_page is None:
+                images, is_last = _get_page_images(
+                    query, page_size, resolution, page, session)
+            else:
+                images, is_last = next_page.result()
+            images_number += len(images)
+
+
+def _download_images(
+        images: Iterable[Dict[str, str]],
+        resolution: str,
+        alternative_name: str,
+        images_amount: int,
+        download_path: Optional[str] = None
+        ) -> Iterator[Tuple[str, Union[bytes, pathlib.Path], str]]:
+    """download images one by one, skips images without given resolution
+
+    Args:
+        images: unsplash images JSONs
+        resolution: resolution of image
+        alternative_name: title that will be use when image not have own title
+        images_amount: max number of images to download
+        download_path: folder where images are downloaded as files,
+        by default images are downloaded to memory
+
+    Returns:
+        iterator of images tumples (title, data bytes or path
+        of downloaded file, unsplash id)
+    """
 
-    output = []
     for image_json in images:
+        if images_amount <= 0:
+            break
         try:
-            image_data = _download_image(image_json, resolution, query)
+            if download_path is None:
+                image_data = _download_image(
+                    image_json, resolution, alternative_name)
+            else:
+                image_data = _download_image(
+                    image_json,
+                    resolution,
+                    alternative_name,
+                    download_path=download_path
+                    )
         except NoImageResolutionExpection:
             continue
-        output.append(image_data)
         images_amount -= 1
+        yield image_data
+
+
+def _download_images_concurrently(
+        images: Iterable[Dict[str, str]],
+        resolution: str,
+        alternative_name: str,
+        images_amount: int,
+        downloader: ImagesDownloader,
+        download_path: Optional[str] = None
+        ) -> Iterator[Tuple[str, Union[bytes, pathlib.Path], str]]:
+    """download few images at once, images are returned in given order,
+    skips images without given resolution
+
+    Args:
+        images: unsplash images JSONs
+        resolution: resolution of image
+        alternative_name: title that will be use when image not have own title
+        images_amount: max number of images to download
+        downloader: pool downloading images
+        download_path: folder where images are downloaded as files,
+        by default images are downloaded to memory
+
+    Returns:
+        iterator of images tumples (title, data bytes or path
+        of downloaded file, unsplash id)
+    """
+
+    images = iter(images)
+    pending = collections.deque()
+    try:
+        while images_amount > 0:
+            # only images which can be needed are downloaded
+            while len(pending) < min(images_amount, downloader.max_workers):
+                image_json = next(images, None)
+                if image_json is None:
+                    break
+                pending.append(downloader.submit(
+                    image_json, resolution, alternative_name, download_path))
+            if len(pending) == 0:
+                break
+            try:
+                image_data = pending.popleft().result()
+            except NoImageResolutionExpection:
+                continue
+            images_amount -= 1
+            yield image_data
+    finally:
+        # downloads not started yet are not needed,
+        # files of started downloads are removed
+        for future in pending:
+            if not future.cancel():
+                future.add_done_callback(_remove_downloaded_file)
+
+
+def iterate_images(
+        query: str,
+        images_amount: int,
+        resolution: str,
+        downloader: Optional[ImagesDownloader] = None,
+        download_path: Optional[str] = None
+        ) -> Iterator[Tuple[str, Union[bytes, pathlib.Path], str]]:
+    """Request images from unsplash.com. First page with images
+    is requested immediately, but images are downloaded when iterator
+    reach them, so images can be saved while next images are downloaded.
+    With downloader few next images are downloaded at once.
+    Following pages are requested until given number of images
+    is downloaded or there are no more images.
+    With download path images are streamed to files, so memory
+    usage doesn't depend on images sizes.
+
+    Args:
+        query: subject of the image
+        images_amount: target number of images to search
+        resolution: resolution of image
+        downloader: pool downloading images, pages are requested
+        over its session, by default images are downloaded one by one
+        download_path: folder where images are downloaded as files,
+        by default images are downloaded to memory
+
+    Raises:
+        IncorrectQueryExpection: query is none or empty
+        IncorrectResolutionExpection: given resolution is not supported
+        IncorrectPageResultExpection: result from page is no a json
+
+    Returns:
+        iterator of images tumples (title, data bytes or path
+        of downloaded file, unsplash id)
+    """
+
+    session = None if downloader is None else downloader.session
+    first_page = _get_page_images(
+        query, min(images_amount, MAX_PAGE_SIZE), resolution, 1, session)
+    images = _iterate_pages_images(
+        query, images_amount, resolution, first_page, session)
+    if downloader is None:
+        return _download_images(
+            images, resolution, query, images_amount, download_path)
+    return _download_images_concurrently(
+        images, resolution, query, images_amount, downloader, download_path)
+
+
+def search_images(
+        query: str,
+        images_amount: int,
+        resolution: str,
+        task_progres: ProgresCounter,
+        downloader: Optional[ImagesDownloader] = None
+        ) -> List[Tuple[str, bytes, str]]:
+    """Request images from unsplash.com and return them as list
+
+    Args:
+        query: subject of the image
+        images_amount: target number of images to search
+        resolution: resolution of image
+        task_progres: class to track task progress
+        downloader: pool downloading images, by default images
+        are downloaded one by one
+
+    Raises:
+        IncorrectQueryExpection: query is none or empty
+        IncorrectResolutionExpection: given resolution is not supported
+        IncorrectPageResultExpection: result from page is no a json
+
+    Returns:
+        list of images tumples (title, data bytes, unsplash id)
+    """
+
+    task_progres.set_new_task('seraching for ' + str(query), images_amount)
+
+    output = []
+    images = iterate_images(query, images_amount, resolution, downloader)
+    for image_data in images:
+        output.append(image_data)
         task_progres.complate_subtask()
-        if images_amount <= 0:
-            break
 
     task_progres.complate_task()
     return output
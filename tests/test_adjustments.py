@@ -0,0 +1,78 @@
+from PIL import Image
+import pytest
+import scripts.adjustments as adjustments
+
+
+def _gradient():
+    return Image.frombytes('L', (256, 1), bytes(range(256)))
+
+
+def _sequential(image, functions):
+    for function in functions:
+        image = image.point(
+            lambda value: int(adjustments._clamp(function(value)) + 0.5))
+    return image
+
+
+def test_fused_table_matches_sequential_adjustments():
+    functions = [
+        adjustments.brightness(1.3),
+        adjustments.contrast(1.5),
+        adjustments.gamma(0.8),
+        adjustments.levels(10, 240),
+    ]
+    table = adjustments.IDENTITY_TABLE
+    for function in functions:
+        table = adjustments.compose_table(table, function)
+    fused = adjustments.apply_table(_gradient(), table).tobytes()
+    expected = _sequential(_gradient(), functions).tobytes()
+    # sequential adjustments round values after each step
+    assert max(abs(a - b) for a, b in zip(fused, expected)) <= 2
+
+
+def test_curves():
+    function = adjustments.curves([(255, 255), (0, 0), (128, 64)])
+    assert function(0) == 0
+    assert function(64) == 32
+    assert function(192) == pytest.approx(64 + 191 * 64 / 127)
+
+
+def test_incorrect_arguments():
+    with pytest.raises(ValueError):
+        adjustments.gamma(0)
+    with pytest.raises(ValueError):
+        adjustments.levels(200, 100)
+    with pytest.raises(ValueError):
+        adjustments.curves([(0, 0)])
+    for value in (float('nan'), float('inf'), float('-inf')):
+        for function in (
+                adjustments.brightness,
+                adjustments.contrast,
+                adjustments.gamma,
+                adjustments.saturation
+                ):
+            with pytest.raises(ValueError):
+                function(value)
+        with pytest.raises(ValueError):
+            adjustments.levels(0, 255, value)
+        with pytest.raises(ValueError):
+            adjustments.levels(0, value)
+
+
+def test_compose_matrix():
+    image = Image.new('RGB', (1, 1), (200, 100, 50))
+    saturation = adjustments.saturation(0.5)
+    matrix = adjustments.compose_matrix(saturation, adjustments.SEPIA_MATRIX)
+    fused = adjustments.apply_matrix(image, matrix).getpixel((0, 0))
+    expected = adjustments.apply_matrix(
+        adjustments.apply_matrix(image, saturation),
+        adjustments.SEPIA_MATRIX
+        ).getpixel((0, 0))
+    assert all(abs(a - b) <= 1 for a, b in zip(fused, expected))
+
+
+def test_grayscale_matrix():
+    image = Image.new('RGB', (1, 1), (200, 100, 50))
+    pixel = adjustments.apply_matrix(
+        image, adjustments.saturation(0)).getpixel((0, 0))
+    assert pixel[0] == pixel[1] == pixel[2]
@@ -0,0 +1,103 @@
+from scripts.images_manager import ImagesManager, INDEX_FILE_NAME
+from scripts.progres_counter import ProgresCounter
+from pathlib import Path
+from PIL import Image
+import io
+import pytest
+import scripts.batch_edit as batch_edit
+import scripts.pillow_api as pillow
+
+
+IMAGES_PATH = str(Path(__file__).parent.resolve())+'/test_management/'
+IMAGE_EXTENSION = '.jpg'
+# index is kept outside of images folder
+INDEX_PATH = str(Path(__file__).parent.resolve()) + '/' + INDEX_FILE_NAME
+
+
+def _cler_test_folder():
+    for f in Path(IMAGES_PATH).glob('*' + IMAGE_EXTENSION):
+        f.unlink()
+    index = Path(INDEX_PATH)
+    if index.exists():
+        index.unlink()
+
+
+def _create_image_bytes(size):
+    image_bytes = io.BytesIO()
+    Image.new('RGB', size, (200, 100, 50)).save(image_bytes, 'JPEG')
+    return image_bytes.getvalue()
+
+
+def _images_sizes(im):
+    sizes = []
+    for path in im.get_images_from_directory(ProgresCounter(0, 100)):
+        with Image.open(path) as img:
+            sizes.append(img.size)
+    return sizes
+
+
+def _images_sizes_of(im, indexes):
+    paths = im.get_images_from_directory(ProgresCounter(0, 100))
+    sizes = []
+    for index in indexes:
+        with Image.open(paths[index]) as img:
+            sizes.append(img.size)
+    return sizes
+
+
+def test_edit_images():
+    _cler_test_folder()
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    im.save_image('a', _create_image_bytes((30, 20)), False)
+    im.save_image('b', _create_image_bytes((40, 10)), False)
+    im.save_image('c', _create_image_bytes((50, 10)), False)
+    operations = [
+        pillow.create_operation('rotate', [90]),
+        pillow.create_operation('grayscale'),
+    ]
+    progres = ProgresCounter(0, 100)
+    result = batch_edit.edit_images(
+        im, operations, progres, [0, 2], max_workers=2)
+    assert result == (2, [])
+    assert progres.progres == 100
+    assert _images_sizes(im) == [(20, 30), (40, 10), (10, 50)]
+    assert im.get_images_names(progres) == ['a', 'b', 'c']
+    with Image.open(im.get_images_from_directory(progres)[0]) as img:
+        r, g, b = img.convert('RGB').getpixel((5, 5))
+        assert abs(r - g) <= 2 and abs(g - b) <= 2
+    assert len(list(Path(IMAGES_PATH).glob('*' + IMAGE_EXTENSION))) == 3
+
+
+def test_edit_images_shared_executor():
+    _cler_test_folder()
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    im.save_image('a', _create_image_bytes((30, 20)), False)
+    im.save_image('b', b'not an image', False)
+    im.save_image('c', _create_image_bytes((50, 10)), False)
+    operations = [pillow.create_operation('rotate', [90])]
+    with batch_edit.create_executor(2) as executor:
+        for _ in range(2):
+            result = batch_edit.edit_images(
+                im, operations, ProgresCounter(0, 100), executor=executor)
+            assert result.edited == 2
+            assert result.failed == [1]
+    assert _images_sizes_of(im, [0, 2]) == [(30, 20), (50, 10)]
+
+
+def test_edit_images_incorrect_index():
+    _cler_test_folder()
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    im.save_image('a', _create_image_bytes((30, 20)), False)
+    with pytest.raises(ValueError):
+        batch_edit.edit_images(
+            im, [pillow.create_operation('blur')], ProgresCounter(0, 100),
+            [1])
+
+
+def test_create_incorrect_operation():
+    with pytest.raises(ValueError):
+        pillow.create_operation('fly')
+    with pytest.raises(ValueError):
+        pillow.create_operation('blur', [1])
+    with pytest.raises(ValueError):
+        pillow.create_operation('gamma', [0])
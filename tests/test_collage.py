@@ -0,0 +1,148 @@
+from scripts.collage import CollageImage, create_collage, create_layout
+from scripts.progres_counter import ProgresCounter
+from PIL import Image
+import io
+import scripts.collage as collage
+import scripts.orientation as orientation
+
+
+def _create_image(tmp_path, name, size, color=(200, 100, 50)):
+    path = tmp_path / name
+    Image.new('RGB', size, color).save(path)
+    return path
+
+
+def test_create_collage_layout(tmp_path):
+    wide = _create_image(tmp_path, 'a.png', (200, 100))
+    square = _create_image(tmp_path, 'b.png', (50, 50))
+    layout = create_layout(
+        [[CollageImage(wide), CollageImage(square)], [CollageImage(square)]],
+        50
+        )
+    image = create_collage(layout, ProgresCounter(0, 100))
+    assert image.size == (150, 100)
+    # second row is centered
+    assert image.getpixel((0, 75)) == collage.BACKGROUND_COLOR
+    assert image.getpixel((75, 75)) == (200, 100, 50)
+
+
+def test_create_collage_uses_given_sizes(tmp_path):
+    path = _create_image(tmp_path, 'a.png', (200, 100))
+    image = create_collage(
+        create_layout([[CollageImage(path, (100, 100))]], 50),
+        ProgresCounter(0, 100))
+    assert image.size == (50, 50)
+
+
+def test_load_tile_decodes_jpeg_in_reduced_scale(tmp_path, monkeypatch):
+    path = _create_image(tmp_path, 'a.jpg', (2000, 1600))
+    decoded_sizes = []
+    resize = Image.Image.resize
+
+    def recorded_resize(img, size, *args, **kwargs):
+        decoded_sizes.append(img.size)
+        return resize(img, size, *args, **kwargs)
+    monkeypatch.setattr(Image.Image, 'resize', recorded_resize)
+    tile = collage._load_tile(path, (250, 200))
+    assert tile.size == (250, 200)
+    assert decoded_sizes == [(250, 200)]
+
+
+def test_load_tile_reduces_other_images(tmp_path):
+    path = _create_image(tmp_path, 'a.png', (1000, 800))
+    tile = collage._load_tile(path, (100, 80))
+    assert tile.size == (100, 80)
+    assert tile.getpixel((50, 40)) == (200, 100, 50)
+
+
+def test_save_collage_png_in_strips(tmp_path):
+    images = [
+        CollageImage(_create_image(tmp_path, f'{i}.png', (40 + i, 30), color))
+        for i, color in enumerate([(255, 0, 0), (0, 255, 0), (0, 0, 255)])
+    ]
+    layout = create_layout([images[:2], images[2:], images[1:2]], 20)
+    png = io.BytesIO()
+    # budget fits one row in strip
+    collage.save_collage_png(
+        layout, png, layout.width * 20 * 6, ProgresCounter(0, 100))
+    png.seek(0)
+    with Image.open(png) as img:
+        assert img.size == (layout.width, layout.height)
+        expected = create_collage(layout, ProgresCounter(0, 100))
+        assert img.tobytes() == expected.tobytes()
+
+
+def test_create_collage_in_threads(tmp_path):
+    images = [
+        CollageImage(_create_image(tmp_path, f'{i}.png', (30, 30), (i, 0, 0)))
+        for i in range(10)
+    ]
+    layout = create_layout([images[:4], images[4:8], images[8:]], 10)
+    progres = ProgresCounter(0, 100)
+    image = create_collage(layout, progres, max_workers=4)
+    assert progres.progres == 100
+    assert [image.getpixel((5 + 10 * i, 5))[0] for i in range(4)] == \
+        [0, 1, 2, 3]
+    assert image.getpixel((15, 25))[0] == 8
+
+
+def _count_decoded_tiles(monkeypatch):
+    decoded = []
+    load_tile = collage._load_tile
+
+    def counted_load_tile(path, size):
+        decoded.append(path)
+        return load_tile(path, size)
+    monkeypatch.setattr(collage, '_load_tile', counted_load_tile)
+    return decoded
+
+
+def test_create_collage_with_rows_cache(tmp_path, monkeypatch):
+    images = [
+        CollageImage(
+            _create_image(tmp_path, f'{i}.png', (30, 20), (i * 20, 0, 0)),
+            hash=str(i)
+            )
+        for i in range(4)
+    ]
+    rows_cache = collage.CollageRowsCache(str(tmp_path) + '/rows/', 10**9)
+    layout = create_layout([images[:2], images[2:]], 10)
+    expected = create_collage(layout, ProgresCounter(0, 100))
+    decoded = _count_decoded_tiles(monkeypatch)
+    first = create_collage(
+        layout, ProgresCounter(0, 100), rows_cache=rows_cache)
+    assert len(decoded) == 4
+    second = create_collage(
+        layout, ProgresCounter(0, 100), rows_cache=rows_cache)
+    assert len(decoded) == 4
+    assert first.tobytes() == expected.tobytes()
+    assert second.tobytes() == expected.tobytes()
+
+    # only changed row is rendered again
+    changed = CollageImage(images[3].path, hash='changed')
+    layout = create_layout([images[:2], [images[2], changed]], 10)
+    create_collage(layout, ProgresCounter(0, 100), rows_cache=rows_cache)
+    assert decoded[4:] == [images[2].path, images[3].path]
+
+
+def test_rows_cache_disk_budget(tmp_path):
+    rows_cache = collage.CollageRowsCache(str(tmp_path) + '/', 250)
+    rows_cache.add_row('a', Image.new('RGB', (10, 5)))
+    rows_cache.add_row('b', Image.new('RGB', (10, 5)))
+    assert rows_cache.get_row('a', (10, 5)) is None
+    assert rows_cache.get_row('b', (10, 5)).size == (10, 5)
+    assert rows_cache.total_size == 150
+    # rows are read again after restart
+    rows_cache = collage.CollageRowsCache(str(tmp_path) + '/', 250)
+    assert rows_cache.get_row('b', (10, 5)) is not None
+
+
+def test_create_collage_honors_exif_orientation(tmp_path):
+    image = Image.new('RGB', (200, 100), (200, 100, 50))
+    exif = Image.Exif()
+    exif[orientation.ORIENTATION_TAG] = 6
+    path = tmp_path / 'a.jpg'
+    image.save(path, exif=exif.tobytes())
+    layout = create_layout([[CollageImage(path)]], 50)
+    assert layout.sizes == [[(25, 50)]]
+    assert create_collage(layout, ProgresCounter(0, 100)).size == (25, 50)
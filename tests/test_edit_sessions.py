@@ -0,0 +1,85 @@
+from scripts.edit_sessions import EditSessions
+from scripts.pillow_api import PhotoEditor
+import pathlib
+
+
+IMAGES_PATH = str(pathlib.Path(__file__).parent.resolve()) + '/test_images/'
+TEST_FILE_PATH = pathlib.Path(IMAGES_PATH + 'test_img.jpg')
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.time = 0.0
+
+    def __call__(self) -> float:
+        return self.time
+
+
+def _create_sessions(tmp_path, time_to_live=60, memory_budget=10**9):
+    clock = _Clock()
+    sessions = EditSessions(
+        lambda session_id: PhotoEditor(f'{tmp_path}/{session_id}.jpg'),
+        time_to_live,
+        memory_budget,
+        clock
+        )
+    return sessions, clock
+
+
+def test_sessions_are_separate(tmp_path):
+    sessions, _ = _create_sessions(tmp_path)
+    with sessions.edit('a') as editor:
+        editor.set_edit_image(TEST_FILE_PATH)
+        editor.edit_rotate(90)
+    with sessions.edit('b') as editor:
+        editor.set_edit_image(TEST_FILE_PATH)
+    with sessions.edit('a') as editor:
+        assert editor.can_undo
+    with sessions.edit('b') as editor:
+        assert not editor.can_undo
+    assert len(sessions) == 2
+    assert (tmp_path / 'a.jpg').exists()
+    assert (tmp_path / 'b.jpg').exists()
+
+
+def test_remove_expired_sessions(tmp_path):
+    sessions, clock = _create_sessions(tmp_path)
+    with sessions.edit('a') as editor:
+        editor.set_edit_image(TEST_FILE_PATH)
+    clock.time = 61
+    with sessions.edit('b') as editor:
+        editor.set_edit_image(TEST_FILE_PATH)
+    assert len(sessions) == 1
+    assert not (tmp_path / 'a.jpg').exists()
+    assert (tmp_path / 'b.jpg').exists()
+
+
+def test_remove_least_recently_used_sessions(tmp_path):
+    sessions, _ = _create_sessions(tmp_path)
+    with sessions.edit('a') as editor:
+        editor.set_edit_image(TEST_FILE_PATH)
+    memory = sessions.memory
+    assert memory > 0
+
+    sessions, _ = _create_sessions(tmp_path, memory_budget=2 * memory)
+    for session_id in ('a', 'b', 'c'):
+        with sessions.edit(session_id) as editor:
+            editor.set_edit_image(TEST_FILE_PATH)
+        with sessions.edit('a'):
+            pass
+    assert len(sessions) == 2
+    assert sessions.memory <= 2 * memory
+    assert (tmp_path / 'a.jpg').exists()
+    assert not (tmp_path / 'b.jpg').exists()
+    assert (tmp_path / 'c.jpg').exists()
+
+
+def test_used_session_is_not_removed(tmp_path):
+    sessions, clock = _create_sessions(tmp_path, memory_budget=0)
+    with sessions.edit('a') as editor:
+        editor.set_edit_image(TEST_FILE_PATH)
+        clock.time = 61
+        with sessions.edit('b') as other_editor:
+            other_editor.set_edit_image(TEST_FILE_PATH)
+        assert (tmp_path / 'a.jpg').exists()
+    assert len(sessions) == 1
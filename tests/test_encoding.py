@@ -0,0 +1,57 @@
+from scripts.encoding import EncoderProfile, encode_image
+from PIL import Image
+import io
+import pytest
+import scripts.encoding as encoding
+
+
+def _create_image(mode='RGB', size=(64, 48)):
+    return Image.new(mode, size, 'red')
+
+
+def _open(image_bytes):
+    return Image.open(io.BytesIO(image_bytes))
+
+
+def test_default_profile_uses_pillow_defaults():
+    image = _create_image()
+    expected = io.BytesIO()
+    image.save(expected, 'JPEG')
+    assert encode_image(image, EncoderProfile()) == expected.getvalue()
+
+
+def test_jpeg_profile():
+    profile = EncoderProfile(
+        'JPEG', quality=70, progressive=True, optimize=True, subsampling=0)
+    with _open(encode_image(_create_image(), profile)) as img:
+        assert img.format == 'JPEG'
+        assert img.info.get('progressive') == 1
+
+
+def test_converts_mode_not_supported_by_format():
+    with _open(encode_image(_create_image('RGBA'), EncoderProfile())) as img:
+        assert img.mode == 'RGB'
+
+
+def test_strip_and_keep_metadata():
+    image = _create_image()
+    exif = Image.Exif()
+    exif[0x010F] = 'camera'
+    source = _open(encode_image(image, EncoderProfile()))
+    source.info['exif'] = exif.tobytes()
+    with _open(encode_image(source, EncoderProfile())) as img:
+        assert 'exif' not in img.info
+    profile = EncoderProfile(keep_metadata=True)
+    with _open(encode_image(source, profile)) as img:
+        assert img.getexif()[0x010F] == 'camera'
+
+
+@pytest.mark.skipif(
+    not encoding.is_supported('WEBP'), reason='no webp support')
+def test_webp_profile():
+    profile = EncoderProfile('WEBP', quality=50, method=0)
+    assert profile.extension == '.webp'
+    assert profile.mimetype == 'image/webp'
+    with _open(encode_image(_create_image('LA'), profile)) as img:
+        assert img.format == 'WEBP'
+        assert img.size == (64, 48)
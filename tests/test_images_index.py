@@ -0,0 +1,206 @@
+from scripts.images_index import ImageFile, ImagesIndex
+import scripts.images_index as images_index
+from pathlib import Path
+import pytest
+import sqlite3
+
+
+DATABASE_PATH = str(Path(__file__).parent.resolve())+'/test_management/t.db'
+
+
+def _image_file(file, image_hash, size=(1, 1)):
+    return ImageFile(file, image_hash, size[0], size[1], 10)
+
+
+def _create_index():
+    path = Path(DATABASE_PATH)
+    if path.exists():
+        path.unlink()
+    return ImagesIndex(DATABASE_PATH)
+
+
+def test_add_files():
+    index = _create_index()
+    index.add_files(['b', 'a'])
+    index.add_files(['c'])
+    assert index.get_files() == ['b', 'a', 'c']
+    assert index.count() == 3
+    assert index.contains('a')
+    assert not index.contains('d')
+
+
+def test_index_is_persistent():
+    index = _create_index()
+    index.add_files(['b', 'a'])
+    index.close()
+    index = ImagesIndex(DATABASE_PATH)
+    assert index.get_files() == ['b', 'a']
+
+
+def test_remove_files():
+    index = _create_index()
+    index.add_files(['a', 'b', 'c', 'd'])
+    index.remove_files(['b', 'd', 'x'])
+    assert index.get_files() == ['a', 'c']
+    index.add_files(['e'])
+    assert index.get_files() == ['a', 'c', 'e']
+
+
+def test_remove_position():
+    index = _create_index()
+    index.add_files(['a', 'b', 'c'])
+    index.remove_position(0)
+    assert index.get_files() == ['b', 'c']
+
+
+def test_swap_positions():
+    index = _create_index()
+    index.add_files(['a', 'b', 'c'])
+    index.swap_positions(0, 2)
+    assert index.get_files() == ['c', 'b', 'a']
+
+
+def test_get_entries_range():
+    index = _create_index()
+    index.add_files(['a', 'b', 'c', 'd'], ['a', None, 'c', 'd'])
+    assert index.get_entries(1, 3) == [('b', None), ('c', 'c')]
+    assert index.get_entries(2) == [('c', 'c'), ('d', 'd')]
+    assert index.get_entries(3, 10) == [('d', 'd')]
+
+
+def test_incorrect_position():
+    index = _create_index()
+    index.add_files(['a', 'b'])
+    for position in (-1, 2):
+        with pytest.raises(IndexError):
+            index.remove_position(position)
+        with pytest.raises(IndexError):
+            index.swap_positions(0, position)
+    assert index.get_files() == ['a', 'b']
+
+
+def test_set_order():
+    index = _create_index()
+    index.add_files(['a', 'b', 'c'])
+    index.set_order([1, 2, 0])
+    assert index.get_files() == ['b', 'c', 'a']
+
+
+def test_clear():
+    index = _create_index()
+    index.add_files(['a', 'b', 'c'])
+    index.clear()
+    assert index.count() == 0
+
+
+def test_add_image_unique_name():
+    index = _create_index()
+    assert index.add_image(_image_file('f', 'h'), 'a', True) == 'a'
+    assert index.add_image(_image_file('f', 'h'), 'a', True) == 'a1'
+    assert index.add_image(_image_file('g', 'h2'), 'a', False) == 'a'
+    assert index.get_entries() == [('f', 'a'), ('f', 'a1'), ('g', 'a')]
+    assert index.get_hash_file('h2') == 'g'
+    assert index.get_hash_file('h3') is None
+
+
+def test_replace_image():
+    index = _create_index()
+    index.add_image(_image_file('f', 'h'), 'a', True)
+    index.add_image(_image_file('g', 'h2'), 'b', True)
+    assert index.replace_image('b', _image_file('e', 'h3')) == 'g'
+    assert index.replace_image('c', _image_file('e', 'h3')) is None
+    assert index.get_entries() == [('f', 'a'), ('e', 'b')]
+    assert not index.contains('g')
+
+
+def test_remove_shared_file():
+    index = _create_index()
+    index.add_image(_image_file('f', 'h'), 'a', True)
+    index.add_image(_image_file('f', 'h'), 'b', True)
+    assert index.remove_position(0) == 'f'
+    assert index.contains('f')
+    index.remove_files(['f'])
+    assert index.count() == 0
+
+
+def test_migrate_order_index():
+    path = Path(DATABASE_PATH)
+    if path.exists():
+        path.unlink()
+    connection = sqlite3.connect(DATABASE_PATH)
+    with connection:
+        connection.execute(
+            'CREATE TABLE images (file TEXT PRIMARY KEY, position INTEGER)')
+        connection.executemany(
+            'INSERT INTO images (file, position) VALUES (?, ?)',
+            [('b', 0), ('a', 1)]
+            )
+    connection.close()
+    index = ImagesIndex(DATABASE_PATH)
+    assert index.get_entries() == [('b', None), ('a', None)]
+    index.add_image(_image_file('b', 'h'), 'c', True)
+    assert index.get_files() == ['b', 'a', 'b']
+
+
+def test_migrate_stale_sizes():
+    path = Path(DATABASE_PATH)
+    if path.exists():
+        path.unlink()
+    # database before sizes were read in displayed orientation
+    version = images_index._MIGRATIONS.index('SELECT 1')
+    connection = sqlite3.connect(DATABASE_PATH)
+    with connection:
+        connection.execute(
+            'CREATE TABLE images (file TEXT PRIMARY KEY, position INTEGER)')
+        for statement in images_index._MIGRATIONS[:version]:
+            connection.execute(statement)
+        connection.executemany(
+            'INSERT INTO images (file, position, hash, width, height, '
+            'byte_size) VALUES (?, ?, ?, ?, ?, ?)',
+            [('f', 0, 'h', 4, 3, 10), ('g', 1, 'h2', None, None, 5)]
+            )
+        connection.execute(f'PRAGMA user_version = {version}')
+    connection.close()
+    index = ImagesIndex(DATABASE_PATH)
+    assert index.get_unread_files() == []
+    assert index.get_stale_size_files() == ['f']
+    index.set_file_size('f', 3, 4)
+    assert index.get_stale_size_files() == []
+    assert index.get_metadata()[0] == (0, None, 'f', 'h', 3, 4, 10, None)
+
+
+def test_metadata():
+    index = _create_index()
+    index.add_files(['x'])
+    index.add_image(_image_file('f', 'h', (4, 3)), 'a', True, 'id')
+    index.replace_image('a', _image_file('g', 'h2', (5, 6)))
+    metadata = index.get_metadata()
+    assert metadata[0].file == 'x'
+    assert metadata[0].byte_size is None
+    assert metadata[1] == (1, 'a', 'g', 'h2', 5, 6, 10, 'id')
+    index.set_file_metadata(_image_file('x', 'h3', (7, 8)))
+    assert index.get_metadata()[0] == (0, None, 'x', 'h3', 7, 8, 10, None)
+    assert index.get_file_hash('x') == 'h3'
+
+
+def test_sort():
+    index = _create_index()
+    index.add_image(_image_file('a', 'h', (4, 3)), 'a', True)
+    index.add_image(_image_file('b', 'h', (2, 3)), 'b', True)
+    index.add_files(['c'])
+    index.add_image(_image_file('d', 'h', (3, 3)), 'd', True)
+    index.sort('width', False)
+    assert index.get_files() == ['b', 'd', 'a', 'c']
+    index.sort('width', True)
+    assert index.get_files() == ['a', 'd', 'b', 'c']
+    with pytest.raises(ValueError):
+        index.sort('position; DROP TABLE images', False)
+
+
+def test_replace_position():
+    index = _create_index()
+    index.add_image(_image_file('f', 'h'), 'a', True)
+    index.add_image(_image_file('f', 'h'), 'b', True)
+    assert index.replace_position(1, 'f', _image_file('e', 'h2'))
+    assert not index.replace_position(0, 'g', _image_file('e', 'h2'))
+    assert index.get_entries() == [('f', 'a'), ('e', 'b')]
@@ -1,10 +1,19 @@
-from scripts.images_manager import ImagesManager
+from scripts.images_manager import ImagesManager, INDEX_FILE_NAME
 from scripts.progres_counter import ProgresCounter
 from pathlib import Path
+from PIL import Image
+import hashlib
+import io
+import os
+import pytest
+import sqlite3
+import scripts.images_manager as imgManager
 
 
 IMAGES_PATH = str(Path(__file__).parent.resolve())+'/test_management/'
 IMAGE_EXTENSION = '.jpg'
+# index is kept outside of images folder
+INDEX_PATH = str(Path(__file__).parent.resolve()) + '/' + INDEX_FILE_NAME
 
 
 def _cler_test_folder():
@@ -12,179 +21,576 @@ def _cler_test_folder():
     images = list(path.glob('*' + IMAGE_EXTENSION))
     for f in images:
         f.unlink()
+    index = Path(INDEX_PATH)
+    if index.exists():
+        index.unlink()
 
 
 def _create_path(name):
     return IMAGES_PATH + name + IMAGE_EXTENSION
 
 
-def _create_bytes():
-    return bytes('test', 'UTF-8')
+def _create_bytes(text='test'):
+    return bytes(text, 'UTF-8')
+
+
+def _count_files():
+    return len(list(Path(IMAGES_PATH).glob('*' + IMAGE_EXTENSION)))
 
 
 def test_save_image():
     _cler_test_folder()
-    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION)
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
     im.save_image('t', _create_bytes(), False)
-    path = Path(IMAGES_PATH)
-    assert len(list(path.glob('*' + IMAGE_EXTENSION))) == 1
-    with Path(_create_path('t')).open('rb') as f:
+    assert _count_files() == 1
+    assert _images_names(im) == ['t']
+    image = im.get_images_from_directory(ProgresCounter(0, 100))[0]
+    with image.open('rb') as f:
         byt = f.read()
     assert byt == _create_bytes()
 
 
 def test_save_image_dupicated_name():
     _cler_test_folder()
-    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION)
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
     im.save_image('t', _create_bytes(), False)
-    assert len(list(Path(IMAGES_PATH).glob('*' + IMAGE_EXTENSION))) == 1
+    assert _count_files() == 1
     im.save_image('t', _create_bytes(), False)
-    assert len(list(Path(IMAGES_PATH).glob('*' + IMAGE_EXTENSION))) == 1
+    assert _count_files() == 1
+    assert _images_names(im) == ['t']
+
+
+def test_save_image_replace_content():
+    _cler_test_folder()
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    im.save_image('a', _create_bytes('a'), False)
+    im.save_image('t', _create_bytes('b'), False)
+    im.save_image('a', _create_bytes('c'), False)
+    assert _count_files() == 2
+    assert _images_names(im) == ['a', 't']
+    image = im.get_images_from_directory(ProgresCounter(0, 100))[0]
+    with image.open('rb') as f:
+        assert f.read() == _create_bytes('c')
 
 
 def test_save_image_dupicated_name_create_new():
     _cler_test_folder()
-    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION)
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
     im.save_image('t', _create_bytes(), True)
-    path = Path(IMAGES_PATH)
-    assert len(list(path.glob('*' + IMAGE_EXTENSION))) == 1
+    assert _count_files() == 1
+    im.save_image('t', _create_bytes('other'), True)
+    assert _count_files() == 2
+    im.save_image('t', _create_bytes('other'), True)
+    assert _count_files() == 2
+    assert _images_names(im) == ['t', 't1', 't2']
+
+
+def test_save_image_dupicated_name_taken_suffix():
+    _cler_test_folder()
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    im.save_image('t1', _create_bytes(), True)
     im.save_image('t', _create_bytes(), True)
-    assert len(list(path.glob('*' + IMAGE_EXTENSION))) == 2
+    im.save_image('t', _create_bytes(), True)
+    im.save_image('t', _create_bytes(), True)
+    assert _images_names(im) == ['t1', 't', 't2', 't3']
+
+
+def test_get_image_hash():
+    _cler_test_folder()
+    _create_files(['a'])
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    im.save_image('b', _create_bytes('b'), True)
+    images = im.get_images_from_directory(ProgresCounter(0, 100))
+    assert images[1].name == 'a.jpg'
+    a_hash = hashlib.sha256(_create_bytes()).hexdigest()
+    assert im.get_image_hash(images[1].name) == a_hash
+    assert im.get_image_hash(images[1].name) == a_hash
+    assert im.get_image_hash(images[0].name) == images[0].stem
+    assert im.get_image_hash('missing.jpg') is None
+
+
+def _create_image_bytes(size):
+    image = io.BytesIO()
+    Image.new('RGB', size).save(image, 'JPEG')
+    return image.getvalue()
+
+
+def test_get_images_metadata():
+    _cler_test_folder()
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    image = _create_image_bytes((8, 6))
+    im.save_images([
+        ('a', image, 'unsplash-id'),
+        ('b', _create_bytes())
+        ], ProgresCounter(0, 100))
+    with open(_create_path('c'), 'wb') as f:
+        f.write(_create_image_bytes((3, 4)))
+    metadata = im.get_images_metadata(ProgresCounter(0, 100))
+    assert [m.name for m in metadata] == ['a', 'b', 'c']
+    assert metadata[0].width == 8
+    assert metadata[0].height == 6
+    assert metadata[0].byte_size == len(image)
+    assert metadata[0].source == 'unsplash-id'
+    assert metadata[0].hash == hashlib.sha256(image).hexdigest()
+    assert metadata[1].width is None
+    assert metadata[1].byte_size == len(_create_bytes())
+    assert metadata[2].width == 3
+    assert metadata[2].height == 4
+
+
+def test_get_images_metadata_edit():
+    _cler_test_folder()
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    im.save_image('a', _create_image_bytes((8, 6)), True, 'id')
+    im.save_image('a', _create_image_bytes((6, 8)), False)
+    metadata = im.get_images_metadata(ProgresCounter(0, 100))
+    assert len(metadata) == 1
+    assert (metadata[0].width, metadata[0].height) == (6, 8)
+    assert metadata[0].source == 'id'
+
+
+def test_get_images_metadata_stale_sizes(monkeypatch):
+    _cler_test_folder()
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    im.save_image('a', _create_image_bytes((8, 6)), True)
+    connection = sqlite3.connect(INDEX_PATH)
+    with connection:
+        connection.execute(
+            'UPDATE images SET width = 6, height = 8, size_stale = 1')
+    connection.close()
+
+    def no_hash_file(path):
+        raise AssertionError('file is hashed again')
+    monkeypatch.setattr(im, '_hash_file', no_hash_file)
+    metadata = im.get_images_metadata(ProgresCounter(0, 100))
+    assert (metadata[0].width, metadata[0].height) == (8, 6)
+
+
+def test_sort_images():
+    _cler_test_folder()
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    im.save_images([
+        ('b', _create_image_bytes((3, 1))),
+        ('c', _create_image_bytes((1, 1))),
+        ('a', _create_image_bytes((2, 1)))
+        ], ProgresCounter(0, 100))
+    im.sort_images('name', False, ProgresCounter(0, 100))
+    assert _images_names(im) == ['a', 'b', 'c']
+    im.sort_images('width', True, ProgresCounter(0, 100))
+    assert _images_names(im) == ['b', 'a', 'c']
+    with pytest.raises(imgManager.IncorrectSortExpection):
+        im.sort_images('position', True, ProgresCounter(0, 100))
+
+
+def test_save_image_same_content_as_legacy_file():
+    _cler_test_folder()
+    image = _create_image_bytes((8, 6))
+    with open(_create_path('legacy'), 'wb') as f:
+        f.write(image)
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    # reading metadata sets hash of file not named by its content
+    im.get_images_metadata(ProgresCounter(0, 100))
+    im.save_image('copy', image, True)
+    assert _images_names(im) == ['legacy', 'copy']
+    assert _images_files(im) == ['legacy.jpg', 'legacy.jpg']
+    assert _count_files() == 1
 
 
 def test_save_images():
+    _cler_test_folder()
+    images = [
+        ('a', _create_bytes('a')),
+        ('d', _create_bytes('d')),
+        ('c', _create_bytes('c'))
+    ]
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    im.save_images(images, ProgresCounter(0, 100))
+    assert _count_files() == 3
+
+
+def test_save_images_same_content():
     _cler_test_folder()
     images = [
         ('a', _create_bytes()),
         ('d', _create_bytes()),
         ('c', _create_bytes())
     ]
-    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION)
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
     im.save_images(images, ProgresCounter(0, 100))
-    assert len(list(Path(IMAGES_PATH).glob('*' + IMAGE_EXTENSION))) == 3
+    assert _count_files() == 1
+    assert _images_names(im) == ['a', 'd', 'c']
+
+
+def test_save_images_from_iterator():
+    _cler_test_folder()
+    images = ((str(i), _create_bytes(str(i))) for i in range(20))
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH, 2)
+    im.save_images(images, ProgresCounter(0, 100), 20)
+    assert _count_files() == 20
+    assert _images_names(im) == [str(i) for i in range(20)]
+
+
+def test_save_images_from_downloaded_files():
+    _cler_test_folder()
+    image = _create_image_bytes((8, 6))
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    downloaded = []
+    for name in ('a.download', 'b.download'):
+        path = Path(IMAGES_PATH + name)
+        path.write_bytes(image)
+        downloaded.append(path)
+    im.save_images([
+        ('a', downloaded[0], 'id'),
+        ('b', downloaded[1])
+        ], ProgresCounter(0, 100))
+    # files are moved and the same content is stored once
+    assert not downloaded[0].exists()
+    assert not downloaded[1].exists()
+    assert _count_files() == 1
+    metadata = im.get_images_metadata(ProgresCounter(0, 100))
+    assert [m.name for m in metadata] == ['a', 'b']
+    assert metadata[0].hash == hashlib.sha256(image).hexdigest()
+    assert (metadata[0].width, metadata[0].height) == (8, 6)
+    assert metadata[0].byte_size == len(image)
+    assert metadata[0].source == 'id'
+
+
+def test_save_images_downloaded_file_same_as_legacy_file():
+    _cler_test_folder()
+    image = _create_image_bytes((8, 6))
+    with open(_create_path('legacy'), 'wb') as f:
+        f.write(image)
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    im.get_images_metadata(ProgresCounter(0, 100))
+    downloaded = Path(IMAGES_PATH + 'copy.download')
+    downloaded.write_bytes(image)
+    im.save_images([('copy', downloaded)], ProgresCounter(0, 100))
+    assert not downloaded.exists()
+    assert _images_names(im) == ['legacy', 'copy']
+    assert _images_files(im) == ['legacy.jpg', 'legacy.jpg']
+    assert _count_files() == 1
+
+
+def test_remove_unfinished_files():
+    _cler_test_folder()
+    unfinished = [
+        Path(IMAGES_PATH + 'a.tmp'),
+        Path(IMAGES_PATH + 'b.download')
+        ]
+    for path in unfinished:
+        path.write_bytes(_create_bytes())
+    _create_files(['c'])
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    # files can be written by other processes
+    assert all(path.exists() for path in unfinished)
+    im.remove_unfinished_files()
+    assert not any(path.exists() for path in unfinished)
+    assert _images_names(im) == ['c']
+
+
+def test_save_images_iterator_error():
+    def images():
+        yield ('a', _create_bytes('a'))
+        yield ('b', _create_bytes('b'))
+        raise ValueError()
+
+    _cler_test_folder()
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    with pytest.raises(ValueError):
+        im.save_images(images(), ProgresCounter(0, 100), 3)
+    assert _images_names(im) == ['a', 'b']
+
+
+def _create_files(names):
+    for name in names:
+        with open(_create_path(name), 'wb') as f:
+            f.write(_create_bytes())
+
+
+def _images_files(im):
+    images = im.get_images_from_directory(ProgresCounter(0, 100))
+    return [image.name for image in images]
+
+
+def _images_names(im):
+    return im.get_images_names(ProgresCounter(0, 100))
 
 
 # test  get_images_from_directory and get_image_index
-def test_get_images():
+def test_get_images_migrate_prefixes():
     test_input_list = [
-        ('0[#]d', _create_bytes()),
-        ('0[#]d', _create_bytes()),
-        ('[#]d', _create_bytes()),
-        ('a', _create_bytes()),
-        ('a', _create_bytes()),
-        ('a', _create_bytes()),
-        ('a[#]a', _create_bytes()),
-        ('[#]d', _create_bytes()),
-        ('1[#]d2', _create_bytes()),
-        ('10[#]d3', _create_bytes()),
-        ('[#]b', _create_bytes()),
-        ('[#]a', _create_bytes())
+        '0[#]d',
+        '[#]d',
+        'a',
+        'a1',
+        'a[#]a',
+        '1[#]d2',
+        '10[#]d3',
+        '[#]b',
         ]
     test_output_list = [
         '0[#]d.jpg',
-        '1[#]d1.jpg',
-        '2[#]d2.jpg',
-        '3[#]d3.jpg',
-        '4[#][#]a.jpg',
-        '5[#][#]b.jpg',
-        '6[#][#]d.jpg',
-        '7[#][#]d1.jpg',
-        '8[#]a.jpg',
-        '9[#]a1.jpg',
-        '10[#]a2.jpg',
-        '11[#]a[#]a.jpg'
+        '1[#]d2.jpg',
+        '10[#]d3.jpg',
+        '[#]b.jpg',
+        '[#]d.jpg',
+        'a.jpg',
+        'a1.jpg',
+        'a[#]a.jpg',
         ]
     _cler_test_folder()
-    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION)
-    im.save_images(test_input_list, ProgresCounter(0, 100))
-    images_o = im.get_images_from_directory(ProgresCounter(0, 100))
-    assert len(images_o) == len(test_output_list)
-    for o, t in zip(images_o, test_output_list):
-        assert o.name == t
-    images_o = im.get_images_from_directory(ProgresCounter(0, 100))
-    assert len(images_o) == len(test_output_list)
-    for o, t in zip(images_o, test_output_list):
-        assert o.name == t
+    _create_files(test_input_list)
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    assert _images_files(im) == test_output_list
+    assert _images_files(im) == test_output_list
+    # order is kept by index, not by files names
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    assert _images_files(im) == test_output_list
+    assert _images_names(im) == ['d', 'd2', 'd3', 'b', 'd', 'a', 'a1', 'a']
+
+
+def test_get_images_keeps_save_order():
+    _cler_test_folder()
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    im.save_images([
+        ('c', _create_bytes()),
+        ('a', _create_bytes()),
+        ('b', _create_bytes())
+        ], ProgresCounter(0, 100))
+    assert _images_names(im) == ['c', 'a', 'b']
+
+
+def test_get_images_directory_changes():
+    _cler_test_folder()
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    im.save_images([
+        ('c', _create_bytes('c')),
+        ('a', _create_bytes('a')),
+        ('b', _create_bytes('b'))
+        ], ProgresCounter(0, 100))
+    im.get_images_from_directory(ProgresCounter(0, 100))[1].unlink()
+    _create_files(['e', 'd'])
+    assert _images_names(im) == ['c', 'b', 'd', 'e']
+
+
+def test_get_images_cache():
+    _cler_test_folder()
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    im.save_images([
+        ('a', _create_bytes()),
+        ('b', _create_bytes())
+        ], ProgresCounter(0, 100))
+    assert _images_names(im) == ['a', 'b']
+    assert im.cache_misses == 1
+    assert _images_names(im) == ['a', 'b']
+    assert im.cache_hits == 1
+    assert im.cache_misses == 1
+    im.move_image_position(0, 1, ProgresCounter(0, 100))
+    assert _images_names(im) == ['b', 'a']
+    assert im.cache_misses == 2
+
+
+def test_get_images_cache_directory_changes():
+    _cler_test_folder()
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    im.save_image('a', _create_bytes('a'), True)
+    assert _images_names(im) == ['a']
+    _create_files(['b'])
+    # make sure that modification time changes on coarse timestamps
+    mtime = os.stat(IMAGES_PATH).st_mtime_ns + 10**9
+    os.utime(IMAGES_PATH, ns=(mtime, mtime))
+    assert _images_names(im) == ['a', 'b']
+    assert im.cache_hits == 0
+
+
+def test_get_images_slice():
+    _cler_test_folder()
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    im.save_images(
+        [(str(i), _create_bytes(str(i))) for i in range(6)],
+        ProgresCounter(0, 100)
+        )
+    assert im.count_images(ProgresCounter(0, 100)) == 6
+    images = im.get_images_slice(2, 4, ProgresCounter(0, 100))
+    assert [name for _, name in images] == ['2', '3']
+    paths = im.get_images_from_directory(ProgresCounter(0, 100))
+    assert [path for path, _ in images] == paths[2:4]
+    assert im.get_images_slice(5, 10, ProgresCounter(0, 100))[0][1] == '5'
+
+
+def test_move_image_position_doesnt_read_directory(monkeypatch):
+    _cler_test_folder()
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    im.save_images(
+        [(str(i), _create_bytes(str(i))) for i in range(4)],
+        ProgresCounter(0, 100)
+        )
+    im.count_images(ProgresCounter(0, 100))
+    scans = []
+    scan_directory = im._scan_directory
+
+    def counted_scan_directory():
+        scans.append(1)
+        return scan_directory()
+    monkeypatch.setattr(im, '_scan_directory', counted_scan_directory)
+    for _ in range(5):
+        im.move_image_position(0, 1, ProgresCounter(0, 100))
+        im.get_images_slice(0, 2, ProgresCounter(0, 100))
+    assert len(scans) == 0
+    assert _images_names(im) == ['1', '0', '2', '3']
+
+
+def test_get_images_slice_after_changes():
+    _cler_test_folder()
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    im.save_images(
+        [(str(i), _create_bytes(str(i))) for i in range(4)],
+        ProgresCounter(0, 100)
+        )
+    misses = im.cache_misses
+    im.move_image_position(0, 1, ProgresCounter(0, 100))
+    images = im.get_images_slice(0, 2, ProgresCounter(0, 100))
+    assert [name for _, name in images] == ['1', '0']
+    im.delate_image_on_index(1, ProgresCounter(0, 100))
+    _create_files(['4'])
+    images = im.get_images_slice(1, 4, ProgresCounter(0, 100))
+    assert [name for _, name in images] == ['2', '3', '4']
+    assert im.count_images(ProgresCounter(0, 100)) == 4
+    # pages are read from images index, not from images listing
+    assert im.cache_misses == misses
 
 
 def test_move_image_position():
     input = [
-        ('0[#]a', _create_bytes()),
-        ('1[#]b', _create_bytes()),
-        ('2[#]c', _create_bytes()),
-    ]
-    output = [
-        '0[#]a.jpg',
-        '1[#]c.jpg',
-        '2[#]b.jpg',
+        ('a', _create_bytes()),
+        ('b', _create_bytes()),
+        ('c', _create_bytes()),
     ]
+    output = ['a', 'c', 'b']
     _cler_test_folder()
-    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION)
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
     im.save_images(input, ProgresCounter(0, 100))
     im.move_image_position(1, 1, ProgresCounter(0, 100))
-    images_o = im.get_images_from_directory(ProgresCounter(0, 100))
-    assert len(images_o) == len(input)
-    for o, t in zip(images_o, output):
-        assert o.name == t
+    assert _images_names(im) == output
 
 
 def test_move_image_position_neg():
     input = [
-        ('0[#]a', _create_bytes()),
-        ('1[#]b', _create_bytes()),
-        ('2[#]c', _create_bytes()),
-    ]
-    output = [
-        '0[#]b.jpg',
-        '1[#]a.jpg',
-        '2[#]c.jpg',
+        ('a', _create_bytes()),
+        ('b', _create_bytes()),
+        ('c', _create_bytes()),
     ]
+    output = ['b', 'a', 'c']
     _cler_test_folder()
-    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION)
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
     im.save_images(input, ProgresCounter(0, 100))
     im.move_image_position(1, -1, ProgresCounter(0, 100))
-    images_o = im.get_images_from_directory(ProgresCounter(0, 100))
-    assert len(images_o) == len(input)
-    for o, t in zip(images_o, output):
-        assert o.name == t
+    assert _images_names(im) == output
 
 
-def test_delete_img_index():
-    test_input_list = [
-        ('0[#]d', _create_bytes()),
-        ('0[#]d', _create_bytes()),
-        ('[#]d', _create_bytes()),
+def test_move_image_position_out_of_range():
+    input = [
         ('a', _create_bytes()),
+        ('b', _create_bytes()),
+    ]
+    _cler_test_folder()
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    im.save_images(input, ProgresCounter(0, 100))
+    im.move_image_position(1, 4, ProgresCounter(0, 100))
+    assert _images_names(im) == ['a', 'b']
+
+
+def test_move_image_position_incorrect_index():
+    input = [
+        ('a', _create_bytes()),
+        ('b', _create_bytes()),
+    ]
+    _cler_test_folder()
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    im.save_images(input, ProgresCounter(0, 100))
+    for index, shift in ((2, 0), (5, -1), (-1, 1), (-3, 0)):
+        with pytest.raises(IndexError):
+            im.move_image_position(index, shift, ProgresCounter(0, 100))
+    assert _images_names(im) == ['a', 'b']
+
+
+def test_reorder_images():
+    input = [
         ('a', _create_bytes()),
+        ('b', _create_bytes()),
+        ('c', _create_bytes()),
+        ('d', _create_bytes()),
+    ]
+    _cler_test_folder()
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    im.save_images(input, ProgresCounter(0, 100))
+    im.reorder_images([2, 0, 3, 1], ProgresCounter(0, 100))
+    assert _images_names(im) == ['c', 'a', 'd', 'b']
+
+
+def test_reorder_images_incorrect_order():
+    input = [
         ('a', _create_bytes()),
-        ('a[#]a', _create_bytes()),
-        ('[#]d', _create_bytes()),
-        ('1[#]d2', _create_bytes()),
-        ('10[#]d3', _create_bytes()),
-        ('[#]b', _create_bytes()),
-        ('[#]a', _create_bytes())
+        ('b', _create_bytes()),
+    ]
+    _cler_test_folder()
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    im.save_images(input, ProgresCounter(0, 100))
+    with pytest.raises(imgManager.IncorrectOrderExpection):
+        im.reorder_images([0], ProgresCounter(0, 100))
+    with pytest.raises(imgManager.IncorrectOrderExpection):
+        im.reorder_images([1, 1], ProgresCounter(0, 100))
+    for order in ([True, False], [1.0, 0], ['1', '0']):
+        with pytest.raises(imgManager.IncorrectOrderExpection):
+            im.reorder_images(order, ProgresCounter(0, 100))
+    assert _images_names(im) == ['a', 'b']
+
+
+def test_delete_img_index():
+    test_input_list = [
+        ('d', _create_bytes('1')),
+        ('d', _create_bytes('2')),
+        ('a', _create_bytes('3')),
+        ('[#]b', _create_bytes('4')),
+        ('a', _create_bytes('5'))
         ]
     test_output_list = [
-        '0[#]d.jpg',
-        '1[#]d1.jpg',
-        '2[#]d2.jpg',
-        '3[#]d3.jpg',
-        '4[#][#]a.jpg',
-        '5[#][#]b.jpg',
-        '6[#][#]d1.jpg',
-        '7[#]a.jpg',
-        '8[#]a1.jpg',
-        '9[#]a2.jpg',
-        '10[#]a[#]a.jpg'
+        'd',
+        'd1',
+        '[#]b',
+        'a1'
         ]
     _cler_test_folder()
-    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION)
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
     im.save_images(test_input_list, ProgresCounter(0, 100))
-    im.delate_image_on_index(6, ProgresCounter(0, 100))
-    images_o = im.get_images_from_directory(ProgresCounter(0, 100))
-    assert len(images_o) == len(test_output_list)
-    for o, t in zip(images_o, test_output_list):
-        assert o.name == t
+    im.delate_image_on_index(2, ProgresCounter(0, 100))
+    assert _images_names(im) == test_output_list
+    assert _count_files() == 4
+
+
+def test_delete_img_index_shared_file():
+    _cler_test_folder()
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    im.save_image('a', _create_bytes(), True)
+    im.save_image('b', _create_bytes(), True)
+    im.delate_image_on_index(0, ProgresCounter(0, 100))
+    assert _images_names(im) == ['b']
+    assert _count_files() == 1
+    im.delate_image_on_index(0, ProgresCounter(0, 100))
+    assert _images_names(im) == []
+    assert _count_files() == 0
+
+
+def test_delete_img_index_incorrect_index():
+    _cler_test_folder()
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    im.save_image('a', _create_bytes('a'), True)
+    im.save_image('b', _create_bytes('b'), True)
+    for index in (2, -1):
+        with pytest.raises(IndexError):
+            im.delate_image_on_index(index, ProgresCounter(0, 100))
+    assert _images_names(im) == ['a', 'b']
+    assert _count_files() == 2
 
 
 def test_delete_all():
@@ -194,7 +600,7 @@ def test_delete_all():
         ('2[#]c', _create_bytes()),
     ]
     _cler_test_folder()
-    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION)
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
     im.save_images(input, ProgresCounter(0, 100))
     im.delete_all_images(ProgresCounter(0, 100))
     images_o = im.get_images_from_directory(ProgresCounter(0, 100))
@@ -202,7 +608,7 @@ def test_delete_all():
 
 
 def test_format_img_name():
-    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION)
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
     assert im.format_image_name('0[#]test.jpg') == 'test'
     assert im.format_image_name('[#]test.jpg') == 'test'
     assert im.format_image_name('[#]0[#]test.jpg') == '0[#]test'
@@ -211,3 +617,14 @@ def test_format_img_name():
     assert im.format_image_name('test') == 'test'
     assert im.format_image_name('test.jpg') == 'test'
     assert im.format_image_name('test.ww.jpg') == 'test.ww'
+    assert im.format_image_name('dog.jpg') == 'dog'
+    assert im.format_image_name('0[#]peg.jpg') == 'peg'
+    assert im.format_image_name('jpeg') == 'jpeg'
+
+
+def test_get_images_migrate_names_ending_like_extension():
+    _cler_test_folder()
+    _create_files(['dog', 'jpeg', '0[#]egg'])
+    im = ImagesManager(IMAGES_PATH, IMAGE_EXTENSION, INDEX_PATH)
+    assert _images_names(im) == ['egg', 'dog', 'jpeg']
+    _cler_test_folder()
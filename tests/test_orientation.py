@@ -0,0 +1,73 @@
+from scripts.orientation import set_jpeg_orientation
+from PIL import Image
+import io
+import pytest
+import scripts.orientation as orientation
+
+
+def _jpeg_bytes(exif=None):
+    image = Image.new('RGB', (40, 20), (255, 0, 0))
+    # marker in top left corner shows orientation
+    image.paste((0, 0, 255), (0, 0, 10, 10))
+    image_bytes = io.BytesIO()
+    if exif is None:
+        image.save(image_bytes, 'JPEG', quality=95)
+    else:
+        image.save(image_bytes, 'JPEG', quality=95, exif=exif)
+    return image_bytes.getvalue()
+
+
+def _open(image_bytes):
+    return Image.open(io.BytesIO(image_bytes))
+
+
+def test_set_orientation_without_exif():
+    source = _jpeg_bytes()
+    oriented = set_jpeg_orientation(source, 6)
+    with _open(oriented) as img:
+        assert orientation.get_orientation(img) == 6
+        assert orientation.displayed_size(img) == (20, 40)
+        turned = orientation.exif_transpose(img)
+        assert turned.size == (20, 40)
+        # left turn moves top left corner to top right corner
+        assert turned.getpixel((15, 5))[2] > 200
+    # compressed pixels are not changed
+    assert oriented.endswith(source[source.index(b'\xff\xda'):])
+
+
+def test_set_orientation_overwrites_value_in_place():
+    exif = Image.Exif()
+    exif[orientation.ORIENTATION_TAG] = 1
+    exif[0x010F] = 'camera'
+    source = _jpeg_bytes(exif.tobytes())
+    oriented = set_jpeg_orientation(source, 3)
+    assert len(oriented) == len(source)
+    with _open(oriented) as img:
+        assert orientation.get_orientation(img) == 3
+        assert img.getexif()[0x010F] == 'camera'
+
+
+def test_set_orientation_adds_tag_to_exif():
+    exif = Image.Exif()
+    exif[0x010F] = 'camera'
+    oriented = set_jpeg_orientation(_jpeg_bytes(exif.tobytes()), 8)
+    with _open(oriented) as img:
+        assert orientation.get_orientation(img) == 8
+        assert img.getexif()[0x010F] == 'camera'
+
+
+def test_set_orientation_incorrect_data():
+    with pytest.raises(ValueError):
+        set_jpeg_orientation(b'not jpeg', 6)
+    with pytest.raises(ValueError):
+        set_jpeg_orientation(_jpeg_bytes(), 9)
+
+
+def test_transpose_matches_exif_transpose():
+    source = _jpeg_bytes()
+    for value in range(1, 9):
+        with _open(set_jpeg_orientation(source, value)) as img:
+            img.load()
+            expected = orientation.exif_transpose(img)
+            assert orientation.transpose(img, value).tobytes() == \
+                expected.tobytes()
@@ -1,7 +1,12 @@
+import io
+import itertools
+from scripts.encoding import EncoderProfile
 from scripts.pillow_api import PhotoEditor
 import pathlib
 import os
 import pytest
+from PIL import Image
+import scripts.orientation as orientation
 import scripts.pillow_api as pillow
 
 
@@ -102,3 +107,242 @@ def test_save_as_collage_empty():
     images = []
     with pytest.raises(pillow.EmptyGaleryExpection):
         editor.save_images_as_collage(images, 300, EDIT_FILE_PATH)
+
+
+def test_edit_keeps_preview_until_render(tmp_path):
+    edit_path = str(tmp_path / 'edit_img.jpg')
+    editor = PhotoEditor(edit_path)
+    editor.set_edit_image(pathlib.Path(TEST_FILE_PATH))
+    editor.edit_blur()
+    editor.edit_flip(False)
+    with open(edit_path, 'rb') as f:
+        preview_bytes = f.read()
+    with open(TEST_FILE_PATH, 'rb') as f:
+        assert preview_bytes == f.read()
+    editor.render_preview()
+    with open(edit_path, 'rb') as f:
+        assert f.read() == editor.get_edit_image_bytes()
+
+
+def test_geometry_composition():
+    image = Image.frombytes('L', (3, 2), bytes(range(6)))
+    operations = [
+        (lambda g: g.rotated(1), Image.Transpose.ROTATE_90),
+        (lambda g: g.rotated(-1), Image.Transpose.ROTATE_270),
+        (lambda g: g.flipped(True), Image.Transpose.FLIP_LEFT_RIGHT),
+        (lambda g: g.flipped(False), Image.Transpose.FLIP_TOP_BOTTOM),
+    ]
+    for sequence in itertools.product(operations, repeat=3):
+        geometry = pillow.Geometry()
+        expected = image
+        for compose, transpose in sequence:
+            geometry = compose(geometry)
+            expected = expected.transpose(transpose)
+        assert geometry.apply(image).tobytes() == expected.tobytes()
+
+
+def test_edit_rotate_full_turn(tmp_path):
+    edit_path = str(tmp_path / 'edit_img.jpg')
+    editor = PhotoEditor(edit_path)
+    editor.set_edit_image(pathlib.Path(TEST_FILE_PATH))
+    for _ in range(4):
+        editor.edit_rotate(90)
+    editor.edit_flip(True)
+    editor.edit_flip(True)
+    _are_images_the_same(editor, TEST_FILE_PATH)
+
+
+def test_undo_redo(tmp_path):
+    edit_path = str(tmp_path / 'edit_img.jpg')
+    editor = PhotoEditor(edit_path, checkpoint_interval=2)
+    editor.set_edit_image(pathlib.Path(TEST_FILE_PATH))
+    editor.edit_flip(False)
+    editor.edit_blur()
+    editor.edit_blur()
+    editor.undo()
+    editor.undo()
+    _are_images_the_same(editor, IMAGES_PATH + 'test_img_vflip.jpg')
+    editor.undo()
+    _are_images_the_same(editor, TEST_FILE_PATH)
+    assert not editor.can_undo
+    editor.redo()
+    _are_images_the_same(editor, IMAGES_PATH + 'test_img_vflip.jpg')
+    assert editor.can_redo
+
+
+def test_edit_after_undo_removes_redo(tmp_path):
+    edit_path = str(tmp_path / 'edit_img.jpg')
+    editor = PhotoEditor(edit_path)
+    editor.set_edit_image(pathlib.Path(TEST_FILE_PATH))
+    editor.edit_flip(False)
+    editor.undo()
+    editor.edit_blur()
+    assert not editor.can_redo
+    editor.redo()
+    _are_images_the_same(editor, IMAGES_PATH + 'test_img_blur.jpg')
+
+
+def test_undo_with_checkpoints_over_memory_limit(tmp_path):
+    edit_path = str(tmp_path / 'edit_img.jpg')
+    editor = PhotoEditor(
+        edit_path, checkpoint_interval=1, history_memory=1)
+    editor.set_edit_image(pathlib.Path(TEST_FILE_PATH))
+    editor.edit_blur()
+    editor.edit_rotate(90)
+    editor.edit_blur()
+    editor.undo()
+    editor.undo()
+    _are_images_the_same(editor, IMAGES_PATH + 'test_img_blur.jpg')
+
+
+def test_edit_on_preview(tmp_path):
+    edit_path = str(tmp_path / 'edit_img.jpg')
+    editor = PhotoEditor(edit_path, preview_size=100)
+    editor.set_edit_image(pathlib.Path(TEST_FILE_PATH))
+    editor.edit_blur()
+    editor.render_preview()
+    with Image.open(edit_path) as img:
+        assert max(img.size) <= 100
+    _are_images_the_same(editor, IMAGES_PATH + 'test_img_blur.jpg')
+
+
+def test_adjustments_are_applied_in_one_pass(monkeypatch, tmp_path):
+    edit_path = str(tmp_path / 'edit_img.jpg')
+    calls = []
+    apply_table = pillow.adjustments.apply_table
+
+    def counted_apply_table(image, table):
+        calls.append(table)
+        return apply_table(image, table)
+    monkeypatch.setattr(pillow.adjustments, 'apply_table', counted_apply_table)
+    editor = PhotoEditor(edit_path)
+    editor.set_edit_image(pathlib.Path(TEST_FILE_PATH))
+    editor.edit_brightness(1.1)
+    editor.edit_contrast(1.2)
+    editor.edit_gamma(1.2)
+    editor.edit_levels(16, 240)
+    editor.edit_curves([(0, 0), (64, 48), (192, 208), (255, 255)])
+    editor.edit_rotate(90)
+    editor.get_edit_image_bytes()
+    assert len(calls) == 1
+
+
+def test_color_adjustments(tmp_path):
+    edit_path = str(tmp_path / 'edit_img.jpg')
+    editor = PhotoEditor(edit_path)
+    editor.set_edit_image(pathlib.Path(TEST_FILE_PATH))
+    editor.edit_sepia()
+    editor.edit_saturation(1.5)
+    editor.edit_grayscale()
+    editor.edit_sharpen()
+    editor.render_preview()
+    with Image.open(edit_path) as img:
+        r, g, b = img.convert('RGB').getpixel((200, 200))
+        assert abs(r - g) <= 2 and abs(g - b) <= 2
+
+
+def test_incorrect_adjustment_is_not_recorded(tmp_path):
+    edit_path = str(tmp_path / 'edit_img.jpg')
+    editor = PhotoEditor(edit_path)
+    editor.set_edit_image(pathlib.Path(TEST_FILE_PATH))
+    with pytest.raises(ValueError):
+        editor.edit_gamma(0)
+    for value in (float('nan'), float('inf')):
+        with pytest.raises(ValueError):
+            editor.edit_brightness(value)
+        with pytest.raises(ValueError):
+            editor.edit_saturation(value)
+    assert not editor.can_undo
+    assert len(editor.get_preview_bytes()) > 0
+
+
+def test_preview_and_save_profiles(tmp_path):
+    edit_path = str(tmp_path / 'edit_img.jpg')
+    editor = PhotoEditor(
+        edit_path,
+        preview_profile=EncoderProfile(quality=10),
+        save_profile=EncoderProfile(quality=95)
+        )
+    editor.set_edit_image(pathlib.Path(TEST_FILE_PATH))
+    editor.edit_blur()
+    editor.render_preview()
+    preview_size = pathlib.Path(edit_path).stat().st_size
+    assert len(editor.get_edit_image_bytes()) > preview_size
+
+
+def test_preview_in_memory():
+    editor = PhotoEditor(None, preview_profile=EncoderProfile('PNG'))
+    with pytest.raises(pillow.NoEditFileExpection):
+        editor.get_preview_bytes()
+    editor.set_edit_image(pathlib.Path(TEST_FILE_PATH))
+    with open(TEST_FILE_PATH, 'rb') as f:
+        assert editor.get_preview_bytes() == f.read()
+    assert editor.preview_mimetype == 'image/jpeg'
+    editor.edit_blur()
+    editor.render_preview()
+    assert editor.get_preview_bytes().startswith(b'\x89PNG')
+    assert editor.preview_mimetype == 'image/png'
+
+
+def test_preview_of_downscaled_source():
+    editor = PhotoEditor(None, preview_size=100)
+    editor.set_edit_image(pathlib.Path(TEST_FILE_PATH))
+    with Image.open(io.BytesIO(editor.get_preview_bytes())) as img:
+        assert max(img.size) <= 100
+    editor.edit_rotate(90)
+    editor.undo()
+    with Image.open(io.BytesIO(editor.get_preview_bytes())) as img:
+        assert max(img.size) <= 100
+    with open(TEST_FILE_PATH, 'rb') as f:
+        assert editor.get_edit_image_bytes() == f.read()
+
+
+def test_version_changes_with_edits():
+    editor = PhotoEditor(None)
+    other_editor = PhotoEditor(None)
+    assert editor.version != other_editor.version
+    editor.set_edit_image(pathlib.Path(TEST_FILE_PATH))
+    versions = [editor.version]
+    editor.edit_rotate(90)
+    versions.append(editor.version)
+    editor.undo()
+    versions.append(editor.version)
+    editor.get_preview_bytes()
+    assert editor.version == versions[-1]
+    assert len(set(versions)) == 3
+
+
+def test_orientations_match_exif_transpose():
+    image = Image.frombytes('L', (3, 2), bytes(range(6)))
+    for value, geometry in pillow._ORIENTATIONS.items():
+        expected = orientation.transpose(image, value)
+        assert geometry.apply(image).tobytes() == expected.tobytes()
+
+
+def test_save_turns_as_exif_orientation(tmp_path):
+    with open(TEST_FILE_PATH, 'rb') as f:
+        source_bytes = f.read()
+    # source image is already displayed turned right
+    source_path = tmp_path / 'oriented.jpg'
+    source_path.write_bytes(
+        orientation.set_jpeg_orientation(source_bytes, 6))
+    editor = PhotoEditor(None, orientation_metadata=True)
+    editor.set_edit_image(source_path)
+    editor.edit_rotate(90)
+    editor.edit_flip(True)
+    image_bytes = editor.get_edit_image_bytes()
+    source_scan = source_bytes[source_bytes.index(b'\xff\xda'):]
+    assert image_bytes.endswith(source_scan)
+
+    with Image.open(source_path) as img:
+        expected = orientation.exif_transpose(img)
+        expected = expected.transpose(Image.Transpose.ROTATE_90)
+        expected = expected.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        assert orientation.exif_transpose(img).tobytes() == \
+            expected.tobytes()
+
+    editor.edit_blur()
+    with Image.open(io.BytesIO(editor.get_edit_image_bytes())) as img:
+        assert orientation.get_orientation(img) == 1
+        assert img.size == expected.size
@@ -0,0 +1,66 @@
+from scripts.encoding import EncoderProfile
+from scripts.thumbnails import ThumbnailsCache
+from PIL import Image
+import pathlib
+import pytest
+import scripts.thumbnails as thumbnails
+
+
+IMAGES_PATH = str(pathlib.Path(__file__).parent.resolve()) + '/test_images/'
+TEST_FILE_PATH = pathlib.Path(IMAGES_PATH + 'test_img.jpg')
+
+
+def _create_cache(tmp_path, disk_budget=10**9):
+    return ThumbnailsCache(str(tmp_path) + '/', [128, 256], disk_budget)
+
+
+def test_get_thumbnail_size(tmp_path):
+    cache = _create_cache(tmp_path)
+    thumbnail = cache.get_thumbnail(TEST_FILE_PATH, 'a', 256)
+    with Image.open(thumbnail) as img:
+        assert img.size == (192, 256)
+    thumbnail = cache.get_thumbnail(TEST_FILE_PATH, 'a', 128)
+    with Image.open(thumbnail) as img:
+        assert img.size == (96, 128)
+
+
+def test_get_thumbnail_cached(tmp_path):
+    cache = _create_cache(tmp_path)
+    thumbnail = cache.get_thumbnail(TEST_FILE_PATH, 'a', 256)
+    mtime = thumbnail.stat().st_mtime_ns
+    # source image is not read again
+    missing = pathlib.Path(str(tmp_path) + '/missing.jpg')
+    assert cache.get_thumbnail(missing, 'a', 256) == thumbnail
+    assert thumbnail.stat().st_mtime_ns >= mtime
+    cache = _create_cache(tmp_path)
+    assert cache.total_size == thumbnail.stat().st_size
+    assert cache.get_thumbnail(missing, 'a', 256) == thumbnail
+
+
+def test_get_thumbnail_incorrect_size(tmp_path):
+    cache = _create_cache(tmp_path)
+    with pytest.raises(thumbnails.IncorrectThumbnailSizeExpection):
+        cache.get_thumbnail(TEST_FILE_PATH, 'a', 100)
+
+
+def test_evict_least_recently_used(tmp_path):
+    cache = _create_cache(tmp_path)
+    a = cache.get_thumbnail(TEST_FILE_PATH, 'a', 128)
+    b = cache.get_thumbnail(TEST_FILE_PATH, 'b', 128)
+    budget = a.stat().st_size + b.stat().st_size
+    cache = _create_cache(tmp_path, budget)
+    cache.get_thumbnail(TEST_FILE_PATH, 'a', 128)
+    c = cache.get_thumbnail(TEST_FILE_PATH, 'c', 128)
+    assert a.exists()
+    assert not b.exists()
+    assert c.exists()
+    assert cache.total_size <= budget
+
+
+def test_get_thumbnail_in_profile_format(tmp_path):
+    profile = EncoderProfile('PNG', optimize=True)
+    cache = ThumbnailsCache(str(tmp_path) + '/', [128], 10**9, profile)
+    thumbnail = cache.get_thumbnail(TEST_FILE_PATH, 'a', 128)
+    assert thumbnail.suffix == '.png'
+    with Image.open(thumbnail) as img:
+        assert img.format == 'PNG'
@@ -1,7 +1,10 @@
 from scripts.unsplash_api import get_resolutions, search_images
 from scripts.progres_counter import ProgresCounter
+import http.server
 import pytest
 import requests
+import threading
+import time
 import scripts.unsplash_api as unsplash
 
 
@@ -61,6 +64,23 @@ def test_search_images_result(monkeypatch):
     assert result[0][1] is None
 
 
+def test_iterate_images_downloads_lazily(monkeypatch):
+    downloads = []
+
+    def fake_counted_download(image, resolution, alternative_name):
+        downloads.append(image)
+        return fake_image_download(image, resolution, alternative_name)
+
+    monkeypatch.setattr(requests, "get", fake_images_api_get)
+    monkeypatch.setattr(unsplash, "_download_image", fake_counted_download)
+    images = unsplash.iterate_images('cat', 2, 'small')
+    assert len(downloads) == 0
+    next(images)
+    assert len(downloads) == 1
+    assert len(list(images)) == 1
+    assert len(downloads) == 2
+
+
 def test_search_images_invalid_input():
     with pytest.raises(unsplash.IncorrectQueryExpection):
         search_images(None, 1, 'small', progress)
@@ -76,3 +96,182 @@ def test_search_images_invalid_input():
 
     with pytest.raises(AttributeError):
         search_images('test', 1, 'small', None)
+
+
+class _StubImagesHandler(http.server.BaseHTTPRequestHandler):
+    # connections are kept alive between requests
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            server.clients.add(self.client_address)
+        time.sleep(0.05)
+        body = self.path.encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with server.lock:
+            server.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = http.server.ThreadingHTTPServer(
+        ('127.0.0.1', 0), _StubImagesHandler)
+    server.lock = threading.Lock()
+    server.active = 0
+    server.max_active = 0
+    server.clients = set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _stub_page_get(server, images_number, real_get=requests.get):
+    url = f'http://127.0.0.1:{server.server_address[1]}'
+    results = [
+        {
+            'id': str(i),
+            'alt_description': None,
+            'description': f'image {i}',
+            'urls': {'small': f'{url}/{i}'}
+        }
+        for i in range(images_number)
+    ]
+    # image without requested resolution is skipped
+    results.insert(
+        1, {'alt_description': None, 'description': None, 'urls': {}})
+
+    def fake_get(*args, **kwargs):
+        # images are downloaded from stub server, url is last argument,
+        # after session when session get is replaced
+        if args[-1].startswith(url):
+            return real_get(*args, **kwargs)
+        return FakeResponse({'results': results})
+    return fake_get
+
+
+def _unpooled_get(*args, **kwargs):
+    raise AssertionError('request sent without downloader session')
+
+
+def test_search_images_concurrently(monkeypatch, stub_server):
+    monkeypatch.setattr(
+        requests.Session,
+        "get",
+        _stub_page_get(stub_server, 8, requests.Session.get)
+        )
+    # pages are requested over the same session as images
+    monkeypatch.setattr(requests, "get", _unpooled_get)
+    downloader = unsplash.ImagesDownloader(max_workers=6, max_per_host=2)
+    try:
+        result = search_images('cat', 6, 'small', progress, downloader)
+    finally:
+        downloader.close()
+    assert [image[2] for image in result] == [str(i) for i in range(6)]
+    assert result[0] == ('image 0', b'/0', '0')
+    assert stub_server.max_active == 2
+    # connections are reused
+    assert len(stub_server.clients) <= 2
+
+
+def _fake_pages_get(pages_number, page_size, requested_pages):
+    def fake_get(url, *args, **kwargs):
+        page = int(url.split('&page=')[1])
+        per_page = int(url.split('&per_page=')[1].split('&')[0])
+        requested_pages.append(page)
+        results = [
+            {'id': f'{page}-{i}', 'urls': {}}
+            for i in range(min(per_page, page_size))
+        ]
+        return FakeResponse({'results': results, 'total_pages': pages_number})
+    return fake_get
+
+
+def _fake_id_download(image, resolution, alternative_name):
+    # every third image has no requested resolution
+    if image['id'].endswith('2'):
+        raise unsplash.NoImageResolutionExpection()
+    return (alternative_name, None, image['id'])
+
+
+def test_search_images_many_pages(monkeypatch):
+    requested_pages = []
+    monkeypatch.setattr(
+        requests, "get", _fake_pages_get(3, 30, requested_pages))
+    monkeypatch.setattr(unsplash, "_download_image", _fake_id_download)
+    result = search_images('cat', 70, 'small', progress)
+    assert len(result) == 70
+    assert len({image[2] for image in result}) == 70
+    assert requested_pages == [1, 2, 3]
+
+
+def test_search_images_replaces_skipped_images(monkeypatch):
+    requested_pages = []
+    monkeypatch.setattr(
+        requests, "get", _fake_pages_get(2, 3, requested_pages))
+    monkeypatch.setattr(unsplash, "_download_image", _fake_id_download)
+    result = search_images('cat', 3, 'small', progress)
+    assert [image[2] for image in result] == ['1-0', '1-1', '2-0']
+    assert requested_pages == [1, 2]
+
+
+def test_search_images_stops_at_last_page(monkeypatch):
+    requested_pages = []
+    monkeypatch.setattr(
+        requests, "get", _fake_pages_get(1, 30, requested_pages))
+    monkeypatch.setattr(unsplash, "_download_image", _fake_id_download)
+    images = list(unsplash.iterate_images('cat', 30, 'small'))
+    assert len(images) == 27
+    assert requested_pages == [1]
+
+
+def test_iterate_images_prefetches_next_page(monkeypatch):
+    requested_pages = []
+    next_page_requested = threading.Event()
+    fake_get = _fake_pages_get(2, 30, requested_pages)
+
+    def fake_signalling_get(url, *args, **kwargs):
+        response = fake_get(url, *args, **kwargs)
+        if requested_pages[-1] == 2:
+            next_page_requested.set()
+        return response
+
+    monkeypatch.setattr(requests, "get", fake_signalling_get)
+    monkeypatch.setattr(unsplash, "_download_image", _fake_id_download)
+    images = unsplash.iterate_images('cat', 40, 'small')
+    next(images)
+    # next page is requested while first page images are used
+    assert next_page_requested.wait(5)
+    assert len(list(images)) == 39
+
+
+def test_download_images_to_files(monkeypatch, stub_server, tmp_path):
+    monkeypatch.setattr(requests, "get", _stub_page_get(stub_server, 3))
+    monkeypatch.setattr(
+        requests.Session,
+        "get",
+        _stub_page_get(stub_server, 3, requests.Session.get)
+        )
+    images = list(unsplash.iterate_images(
+        'cat', 2, 'small', download_path=str(tmp_path)))
+    downloader = unsplash.ImagesDownloader(max_workers=2)
+    try:
+        images += list(unsplash.iterate_images(
+            'cat', 2, 'small', downloader, str(tmp_path)))
+    finally:
+        downloader.close()
+    paths = [image[1] for image in images]
+    assert [path.read_bytes() for path in paths] == [b'/0', b'/1'] * 2
+    assert all(path.parent == tmp_path for path in paths)
+    # only completed downloads are left
+    assert sorted(tmp_path.iterdir()) == sorted(paths)